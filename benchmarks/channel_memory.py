@@ -0,0 +1,77 @@
+"""
+Бенчмарк памяти ``Channel`` в байтах на сообщение для ``MESSAGES`` небольших
+сообщений: прежнее хранение списком объектов ``Message``
+и массивы отправителей, смещений и общий буфер содержимого.
+
+Каждый вариант измеряется в отдельном процессе по приросту RSS.
+
+Запуск: ``python -m benchmarks.channel_memory``
+"""
+
+from multiprocessing import Process, Queue
+from os import sysconf
+from time import perf_counter
+
+from model import ChannelId, Message
+from server.database.memory_database.channel import Channel
+
+MESSAGES = 10_000_000
+CHANNELS = 1_000
+CONTENT_SIZE = 16
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * sysconf("SC_PAGE_SIZE")
+
+
+def content(i: int) -> bytes:
+    return i.to_bytes(8, "little") * (CONTENT_SIZE // 8)
+
+
+def fill_list(result: Queue):
+    before = rss()
+    channels = [[] for _ in range(CHANNELS)]
+    start = perf_counter()
+
+    for i in range(MESSAGES):
+        channels[i % CHANNELS].append(Message(1, content(i)))
+
+    result.put((rss() - before, perf_counter() - start))
+
+
+def fill_channels(result: Queue):
+    before = rss()
+    channels = [Channel(ChannelId((1, 2 + i))) for i in range(CHANNELS)]
+    start = perf_counter()
+
+    for i in range(MESSAGES):
+        channels[i % CHANNELS].add_message(Message(1, content(i)))
+
+    result.put((rss() - before, perf_counter() - start))
+
+
+def main():
+    print(f"сообщений: {MESSAGES}, содержимое: {CONTENT_SIZE} байт")
+
+    for name, target in (
+        ("список Message", fill_list),
+        ("массивы Channel", fill_channels),
+    ):
+        result = Queue()
+        process = Process(target=target, args=(result,))
+
+        process.start()
+
+        memory, elapsed = result.get()
+
+        process.join()
+
+        print(
+            f"{name}: {memory / MESSAGES:.1f} байт на сообщение, "
+            f"{MESSAGES / elapsed:.0f} сообщений/с"
+        )
+
+
+if __name__ == "__main__":
+    main()
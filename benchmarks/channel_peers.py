@@ -0,0 +1,87 @@
+"""
+Микробенчмарк ``MemoryDatabase.get_channel_peers`` в зависимости
+от общего количества каналов в базе данных.
+
+Сравнивает прежний перебор всех каналов с индексом собеседников клиента.
+У измеряемого клиента всегда ``DEGREE`` собеседников.
+
+Запуск: ``python -m benchmarks.channel_peers``
+"""
+
+from time import perf_counter
+
+from model import Id
+from server.database import MemoryDatabase
+
+CHANNEL_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+DEGREE = 10
+DURATION = 0.5
+
+
+def _scan_channel_peers(database: MemoryDatabase, client_id: Id) -> list[Id]:
+    result = []
+
+    for channel in database._channels:
+        if channel.clients[0] == client_id:
+            result.append(channel.clients[1])
+        elif channel.clients[1] == client_id:
+            result.append(channel.clients[0])
+
+    return result
+
+
+def populate(channels_count: int) -> tuple[MemoryDatabase, Id]:
+    """
+    Создаёт базу данных с заданным количеством каналов
+    и возвращает её вместе с ID измеряемого клиента.
+    """
+
+    database = MemoryDatabase()
+    client_id = database.register_client(b"password")
+    clients = [database.register_client(b"password") for _ in range(1_000)]
+
+    for i in range(DEGREE):
+        database.add_message(client_id, clients[i], b"message")
+
+    for i in range(channels_count - DEGREE):
+        sender_id = clients[i % len(clients)]
+        receiver_id = database.register_client(b"password")
+
+        database.add_message(sender_id, receiver_id, b"message")
+
+    return database, client_id
+
+
+def measure(function, *args) -> float:
+    """
+    Возвращает среднее время вызова функции в микросекундах.
+    """
+
+    calls = 0
+    start = perf_counter()
+
+    while (elapsed := perf_counter() - start) < DURATION:
+        function(*args)
+        calls += 1
+
+    return elapsed / calls * 1e6
+
+
+def main():
+    for channels_count in CHANNEL_COUNTS:
+        database, client_id = populate(channels_count)
+
+        assert _scan_channel_peers(database, client_id) == database.get_channel_peers(
+            client_id
+        )
+
+        scan = measure(_scan_channel_peers, database, client_id)
+        index = measure(database.get_channel_peers, client_id)
+
+        print(
+            f"каналов {channels_count}: перебор {scan:.1f} мкс, индекс {index:.2f} мкс"
+        )
+
+
+if __name__ == "__main__":
+    main()
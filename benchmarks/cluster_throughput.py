@@ -0,0 +1,167 @@
+"""
+Бенчмарк пропускной способности ``run_cluster`` при 1, 2, 4 и 8 рабочих
+процессах: количество сообщений в секунду, доставленных получателям.
+
+Кластер запускается в отдельном процессе, клиенты - в нескольких других.
+Каждый отправитель посылает сообщения своему получателю; ядро распределяет
+подключения между рабочими процессами, поэтому при нескольких процессах
+часть сообщений проходит через ``MessageRouter``.
+
+База данных общая для всех рабочих процессов и находится в процессе
+``DatabaseManager``, поэтому при большом количестве ядер ограничивает
+пропускную способность уже она. Результаты имеют смысл лишь на машине
+с количеством ядер не меньше количества рабочих процессов и процессов клиентов.
+
+Запуск: ``python -m benchmarks.cluster_throughput``
+"""
+
+import sys
+from asyncio import gather, run, sleep
+from multiprocessing import Process, Queue
+from os import cpu_count
+from signal import SIGTERM, signal
+from time import perf_counter
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+    load_der_private_key,
+    load_der_public_key,
+)
+
+from client import Client
+from server.cluster import run_cluster
+
+HOST = "127.0.0.1"
+PORT = 18_800
+DURATION = 3.0
+CLIENT_PROCESSES = 4
+PAIRS_PER_PROCESS = 8
+MESSAGES_IN_FLIGHT = 8
+WORKERS = [1, 2, 4, 8]
+
+
+def serve(workers: int, private_key: bytes):
+    signal(SIGTERM, lambda *_: sys.exit())
+
+    run_cluster(workers, load_der_private_key(private_key, None), HOST, PORT)
+
+
+async def connect(public_key) -> Client:
+    client = Client()
+
+    await client.connect(HOST, PORT, public_key)
+    await client.register(b"password")
+
+    return client
+
+
+async def load(public_key: bytes) -> int:
+    """
+    Возвращает количество доставленных получателям сообщений за ``DURATION``.
+    """
+
+    public_key = load_der_public_key(public_key)
+    received = 0
+
+    async def on_message(_):
+        nonlocal received
+
+        received += 1
+
+    async def send(sender: Client, receiver_id, deadline: float):
+        while perf_counter() < deadline:
+            await sender.send_message(receiver_id, b"message")
+
+    pairs = []
+
+    for _ in range(PAIRS_PER_PROCESS):
+        sender, receiver = await gather(connect(public_key), connect(public_key))
+        receiver.on_message = on_message
+
+        pairs.append((sender, receiver))
+
+    deadline = perf_counter() + DURATION
+
+    await gather(
+        *(
+            send(sender, receiver.get_id(), deadline)
+            for sender, receiver in pairs
+            for _ in range(MESSAGES_IN_FLIGHT)
+        )
+    )
+    await sleep(0.5)
+
+    for sender, receiver in pairs:
+        await gather(sender.disconnect(), receiver.disconnect())
+
+    return received
+
+
+def run_load(public_key: bytes, result: Queue):
+    result.put(run(load(public_key)))
+
+
+def measure(workers: int, key, target=serve) -> float:
+    """
+    Возвращает количество доставленных сообщений в секунду.
+
+    :param workers: количество рабочих процессов или потоков сервера
+    :param key: приватный ключ сервера
+    :param target: функция, запускающая сервер, с аргументами как у ``serve``
+    """
+
+    server = Process(
+        target=target,
+        args=(
+            workers,
+            key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption()),
+        ),
+    )
+    server.start()
+
+    try:
+        run(sleep(1.0 + 0.2 * workers))
+
+        result = Queue()
+        clients = [
+            Process(
+                target=run_load,
+                args=(
+                    key.public_key().public_bytes(
+                        Encoding.DER, PublicFormat.SubjectPublicKeyInfo
+                    ),
+                    result,
+                ),
+            )
+            for _ in range(CLIENT_PROCESSES)
+        ]
+
+        for client in clients:
+            client.start()
+
+        received = sum(result.get() for _ in clients)
+
+        for client in clients:
+            client.join()
+
+        return received / DURATION
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    key = generate_private_key(public_exponent=65537, key_size=2048)
+
+    print(f"ядер: {cpu_count()}")
+
+    for workers in WORKERS:
+        print(f"рабочих процессов {workers}: {measure(workers, key):.0f} сообщений/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Бенчмарк задержки цикла событий ``Server`` под нагрузкой рукопожатиями RSA
+и большими сообщениями при разных способах выполнения криптографии:
+в потоке цикла событий, в пуле потоков и в пуле процессов.
+
+Сервер запускается в отдельном процессе, клиенты - в нескольких других.
+Задержка цикла событий берётся из ``ServerMetrics``.
+
+Запуск: ``python -m benchmarks.crypto_offload``
+"""
+
+from asyncio import create_task, gather, open_connection, run, sleep
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Event, Pool, Process, Queue
+from os import urandom
+from time import perf_counter
+from typing import Callable, Optional
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+    load_der_private_key,
+    load_der_public_key,
+)
+
+from client import Client
+from network.streams.encrypted_packet_splitter_stream import (
+    CryptoExecutor,
+    exchange_key,
+)
+from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
+from server.database import MemoryDatabase
+from server.server import Server
+
+HOST = "127.0.0.1"
+PORT = 18_600
+DURATION = 5.0
+KEY_SIZE = 4096
+HANDSHAKE_PROCESSES = 2
+HANDSHAKES_PER_PROCESS = 8
+MESSAGE_SIZE = 1024 * 1024
+EXECUTORS: dict[str, Callable[[], Optional[Executor]]] = {
+    "цикл событий": lambda: None,
+    "пул потоков": lambda: ThreadPoolExecutor(4),
+    "пул процессов": lambda: ProcessPoolExecutor(4),
+}
+
+
+def serve(private_key: bytes, executor_name: str, stop, result: Queue):
+    executor = EXECUTORS[executor_name]()
+
+    async def main():
+        server = Server(
+            MemoryDatabase(),
+            load_der_private_key(private_key, None),
+            crypto_executor=CryptoExecutor(
+                executor, None if executor is None else 64 * 1024
+            ),
+        )
+        task = create_task(server.handle_connections(HOST, PORT))
+
+        while not stop.is_set():
+            await sleep(0.05)
+
+        result.put(server.metrics.max_event_loop_lag)
+        task.cancel()
+
+    run(main())
+
+    if executor is not None:
+        executor.shutdown()
+
+
+def handshake(public_key: bytes) -> int:
+    """
+    Устанавливает соединения в режиме rsa в течение ``DURATION`` секунд
+    и возвращает их количество.
+    """
+
+    server_key = load_der_public_key(public_key)
+
+    async def worker(deadline: float) -> int:
+        count = 0
+
+        while perf_counter() < deadline:
+            reader, writer = await open_connection(HOST, PORT)
+            stream = SimplePacketSplitterStream(reader, writer)
+
+            await exchange_key(stream, server_key, modes=("rsa",))
+            await stream.close()
+
+            count += 1
+
+        return count
+
+    async def main() -> int:
+        deadline = perf_counter() + DURATION
+
+        return sum(
+            await gather(*(worker(deadline) for _ in range(HANDSHAKES_PER_PROCESS)))
+        )
+
+    return run(main())
+
+
+def send_messages(public_key: bytes) -> int:
+    """
+    Отправляет большие сообщения в течение ``DURATION`` секунд
+    и возвращает их количество.
+    """
+
+    async def main() -> int:
+        server_key = load_der_public_key(public_key)
+        sender, receiver = Client(), Client()
+
+        await sender.connect(HOST, PORT, server_key)
+        await receiver.connect(HOST, PORT, server_key)
+        await sender.register(b"sender")
+        await receiver.register(b"receiver")
+
+        content = urandom(MESSAGE_SIZE)
+        deadline = perf_counter() + DURATION
+        count = 0
+
+        while perf_counter() < deadline:
+            await sender.send_message(receiver.get_id(), content)
+
+            count += 1
+
+        await sender.disconnect()
+        await receiver.disconnect()
+
+        return count
+
+    return run(main())
+
+
+def sleep_before_start():
+    """
+    Даёт серверу время начать принимать соединения.
+    """
+
+    run(sleep(1.0))
+
+
+def measure(private_key: bytes, public_key: bytes, executor_name: str):
+    stop = Event()
+    result = Queue()
+    server = Process(target=serve, args=(private_key, executor_name, stop, result))
+
+    server.start()
+
+    try:
+        with Pool(HANDSHAKE_PROCESSES + 1) as pool:
+            pool.apply(sleep_before_start)
+
+            messages = pool.apply_async(send_messages, (public_key,))
+            handshakes = sum(pool.map(handshake, [public_key] * HANDSHAKE_PROCESSES))
+            messages = messages.get()
+    finally:
+        stop.set()
+
+    max_event_loop_lag = result.get()
+
+    server.join()
+
+    print(
+        f"{executor_name}: {handshakes / DURATION:.0f} рукопожатий/с, "
+        f"{messages / DURATION:.1f} сообщений по {MESSAGE_SIZE // 1024} КиБ/с, "
+        f"наибольшая задержка цикла событий {max_event_loop_lag * 1000:.1f} мс"
+    )
+
+
+def main():
+    key = generate_private_key(public_exponent=65537, key_size=KEY_SIZE)
+    private_key = key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption())
+    public_key = key.public_key().public_bytes(Encoding.DER, PublicFormat.PKCS1)
+
+    for executor_name in EXECUTORS:
+        measure(private_key, public_key, executor_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк ``SqliteDatabase`` в сравнении с ``MemoryDatabase``: количество
+``add_message`` в секунду при фиксации каждого изменения отдельно
+и при групповой фиксации, а также ``get_messages`` для диапазона сообщений.
+
+Файл базы данных создаётся во временном каталоге, поэтому результат
+зависит от диска, на котором он находится.
+
+Запуск: ``python -m benchmarks.database_write``
+"""
+
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from model import ChannelId
+from server.database import Database, MemoryDatabase, SqliteDatabase
+
+CLIENTS = 100
+MESSAGES = 20_000
+MESSAGES_PER_READ = 50
+READS = 5_000
+
+
+def measure(database: Database) -> tuple[float, float]:
+    """
+    Возвращает количество записанных сообщений в секунду
+    и количество прочитанных диапазонов сообщений в секунду.
+    """
+
+    clients = [database.register_client(b"password") for _ in range(CLIENTS)]
+    start = perf_counter()
+
+    for i in range(MESSAGES):
+        database.add_message(
+            clients[i % CLIENTS], clients[(i + 1) % CLIENTS], b"message" * 16
+        )
+
+    if isinstance(database, SqliteDatabase):
+        database.flush()
+
+    writes = MESSAGES / (perf_counter() - start)
+    channel_id = ChannelId.from_ids((clients[0], clients[1]))
+    messages_count = sum(database.get_messages_count(channel_id).values())
+    start = perf_counter()
+
+    for i in range(READS):
+        database.get_messages(
+            channel_id,
+            i % (messages_count - MESSAGES_PER_READ),
+            MESSAGES_PER_READ,
+        )
+
+    reads = READS / (perf_counter() - start)
+
+    return writes, reads
+
+
+def main():
+    with TemporaryDirectory() as directory:
+        databases = [
+            ("MemoryDatabase", lambda: MemoryDatabase()),
+            (
+                "SqliteDatabase, фиксация каждого сообщения",
+                lambda: SqliteDatabase(path.join(directory, "single.sqlite"), 0.01, 1),
+            ),
+            (
+                "SqliteDatabase, групповая фиксация",
+                lambda: SqliteDatabase(path.join(directory, "group.sqlite")),
+            ),
+        ]
+
+        for name, create_database in databases:
+            database = create_database()
+            writes, reads = measure(database)
+
+            print(
+                f"{name}: {writes:.0f} сообщений/с, "
+                f"{reads:.0f} чтений по {MESSAGES_PER_READ} сообщений/с"
+            )
+
+            if isinstance(database, SqliteDatabase):
+                database.close()
+
+
+if __name__ == "__main__":
+    main()
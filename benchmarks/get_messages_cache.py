@@ -0,0 +1,115 @@
+"""
+Микробенчмарк подготовки ответа на ``GetMessages``: прежний путь
+(``get_messages`` базы данных и ``GetMessagesSuccess.serialize``)
+и сборка ответа из ``MessageRangeCache``.
+
+Клиенты многократно запрашивают последние ``WINDOW`` сообщений своих каналов,
+между запросами в случайные каналы добавляются новые сообщения.
+
+Запуск: ``python -m benchmarks.get_messages_cache``
+"""
+
+from asyncio import run
+from os import urandom
+from random import Random
+from time import perf_counter
+
+from model import ChannelId
+from network import WireFormat
+from network.packets import GetMessagesSuccess
+from server.database import MemoryDatabase, as_async_database
+from server.message_range_cache import MessageRangeCache
+from server.metrics import ServerMetrics
+
+CHANNELS = 100
+INITIAL_MESSAGES = 1_000
+CONTENT_SIZE = 64
+WINDOW = 50
+REQUESTS = 20_000
+APPEND_PROBABILITY = 0.1
+
+
+def populate() -> tuple[MemoryDatabase, list[tuple[int, ChannelId]]]:
+    """
+    Создаёт базу данных с ``CHANNELS`` каналами и возвращает её
+    вместе с отправителем и ID каждого канала.
+    """
+
+    database = MemoryDatabase()
+    channels = []
+
+    for _ in range(CHANNELS):
+        first_client = database.register_client(b"password")
+        second_client = database.register_client(b"password")
+
+        for _ in range(INITIAL_MESSAGES):
+            database.add_message(first_client, second_client, urandom(CONTENT_SIZE))
+
+        channels.append(
+            (first_client, ChannelId.from_ids((first_client, second_client)))
+        )
+
+    return database, channels
+
+
+async def measure(cached: bool, wire_format: WireFormat) -> tuple[float, ServerMetrics]:
+    """
+    Возвращает среднее время подготовки ответа в микросекундах и счётчики кэша.
+    """
+
+    database, channels = populate()
+    async_database = as_async_database(database)
+    metrics = ServerMetrics()
+    cache = MessageRangeCache(async_database, 64 * 1024 * 1024, metrics)
+    random = Random(0)
+    elapsed = 0.0
+
+    for request_id in range(REQUESTS):
+        sender_id, channel_id = random.choice(channels)
+
+        if random.random() < APPEND_PROBABILITY:
+            peer_id = channel_id.clients[channel_id.clients[0] == sender_id]
+
+            database.add_message(sender_id, peer_id, urandom(CONTENT_SIZE))
+
+        messages_count = len(database._channels[channel_id])
+        first_message_index = messages_count - WINDOW
+        start = perf_counter()
+
+        if cached:
+            serialized_messages = await cache.get_messages(
+                channel_id, first_message_index, WINDOW, wire_format
+            )
+            GetMessagesSuccess.serialize_spliced(
+                request_id, WINDOW, serialized_messages, wire_format
+            )
+        else:
+            messages = await async_database.get_messages(
+                channel_id, first_message_index, WINDOW
+            )
+            GetMessagesSuccess(request_id, messages).serialize(wire_format)
+
+        elapsed += perf_counter() - start
+
+    return elapsed / REQUESTS * 1e6, metrics
+
+
+async def main():
+    print(
+        f"{CHANNELS} каналов, окно {WINDOW} сообщений по {CONTENT_SIZE} байт,"
+        f" добавление сообщения перед {APPEND_PROBABILITY:.0%} запросов"
+    )
+
+    for wire_format in WireFormat:
+        uncached, _ = await measure(False, wire_format)
+        cached, metrics = await measure(True, wire_format)
+
+        print(
+            f"{wire_format.name}: без кэша {uncached:.1f} мкс, с кэшем {cached:.1f} мкс,"
+            f" попаданий {metrics.message_range_cache_hit_rate:.1%},"
+            f" сэкономлено {metrics.message_range_cache_bytes_saved / 2**20:.1f} МиБ"
+        )
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,128 @@
+"""
+Бенчмарк отправки сообщения ``MEMBERS`` собеседникам: ``MEMBERS`` пакетов
+``SendMessage`` (по копии на каждый канал) и один ``SendGroupMessage``
+в группу из тех же клиентов.
+
+Сервер и клиенты работают в одном процессе. Для каждого способа
+выводятся байты, отправленные клиентом (сериализованные пакеты до шифрования),
+байты содержимого, сохранённые ``MemoryDatabase``, и среднее время
+от начала отправки до получения уведомления всеми получателями.
+
+Запуск: ``python -m benchmarks.group_fanout``
+"""
+
+from asyncio import Event, create_task, gather, run, sleep
+from os import urandom
+from time import perf_counter
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+
+from client import Client
+from network import WireFormat
+from network.packets import SendGroupMessage, SendMessage
+from server.database import MemoryDatabase
+from server.server import Server
+
+HOST = "127.0.0.1"
+PORT = 18_900
+MEMBERS = 50
+CONTENT_SIZE = 1024
+ROUNDS = 20
+
+
+async def main():
+    key = generate_private_key(public_exponent=65537, key_size=2048)
+    database = MemoryDatabase()
+    server = Server(database, key)
+    server_task = create_task(server.handle_connections(HOST, PORT))
+
+    await sleep(0.2)
+
+    clients = []
+
+    for _ in range(MEMBERS + 1):
+        client = Client()
+
+        await client.connect(HOST, PORT, key.public_key())
+        await client.register(b"password")
+
+        clients.append(client)
+
+    sender, *receivers = clients
+    receiver_ids = [receiver.get_id() for receiver in receivers]
+    received = 0
+    all_received = Event()
+
+    async def on_message(*_):
+        nonlocal received
+
+        received += 1
+
+        if received == MEMBERS:
+            all_received.set()
+
+    for receiver in receivers:
+        receiver.on_message = on_message
+        receiver.on_group_message = on_message
+
+    group_id = await sender.create_group(receiver_ids)
+    content = urandom(CONTENT_SIZE)
+
+    async def send_messages():
+        for receiver_id in receiver_ids:
+            await sender.send_message(receiver_id, content)
+
+    async def send_group_message():
+        await sender.send_group_message(group_id, content)
+
+    uploaded = {
+        "SendMessage": sum(
+            len(SendMessage(0, receiver_id, content).serialize(WireFormat.V2))
+            for receiver_id in receiver_ids
+        ),
+        "SendGroupMessage": len(
+            SendGroupMessage(0, group_id, content).serialize(WireFormat.V2)
+        ),
+    }
+
+    print(
+        f"участников: {MEMBERS}, размер сообщения: {CONTENT_SIZE} байт,"
+        f" отправок: {ROUNDS}"
+    )
+
+    for name, send in (
+        ("SendMessage", send_messages),
+        ("SendGroupMessage", send_group_message),
+    ):
+        elapsed = 0.0
+
+        for _ in range(ROUNDS):
+            received = 0
+            all_received.clear()
+            start = perf_counter()
+
+            await send()
+            await all_received.wait()
+
+            elapsed += perf_counter() - start
+
+        if name == "SendMessage":
+            stored = sum(
+                len(channel.contents) for channel in database._channels.values()
+            )
+        else:
+            stored = sum(len(group.contents) for group in database._groups.values())
+
+        print(
+            f"{name}: отправлено {uploaded[name]} байт, сохранено"
+            f" {stored // ROUNDS} байт, доставка всем за"
+            f" {elapsed / ROUNDS * 1000:.2f} мс"
+        )
+
+    await gather(*(client.disconnect() for client in clients))
+
+    server_task.cancel()
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,143 @@
+"""
+Бенчмарк скорости установки соединений с ``Server`` в режимах обмена ключами
+rsa и x25519.
+
+Сервер запускается в отдельном процессе, клиенты - в нескольких других,
+поэтому кроме количества рукопожатий в секунду выводится процессорное время
+сервера на одно рукопожатие: именно оно ограничивает пропускную способность
+одного серверного процесса.
+
+Запуск: ``python -m benchmarks.handshake_rate``
+"""
+
+from asyncio import create_task, gather, open_connection, run, sleep
+from multiprocessing import Event, Pool, Process, Queue
+from time import perf_counter, process_time
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+    load_der_private_key,
+    load_der_public_key,
+)
+
+from network.streams.encrypted_packet_splitter_stream import exchange_key
+from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
+from server.database import MemoryDatabase
+from server.server import Server
+
+HOST = "127.0.0.1"
+PORT = 18_500
+DURATION = 5.0
+CLIENT_PROCESSES = 3
+CONNECTIONS_PER_PROCESS = 16
+KEY_SIZES = [2048, 4096]
+
+
+def serve(private_key: bytes, stop, cpu_time: Queue):
+    async def main():
+        server = Server(MemoryDatabase(), load_der_private_key(private_key, None))
+        task = create_task(server.handle_connections(HOST, PORT))
+
+        while not stop.is_set():
+            await sleep(0.05)
+
+        cpu_time.put(process_time() - start)
+        task.cancel()
+
+    start = process_time()
+
+    run(main())
+
+
+def connect(public_key: bytes, mode: str) -> int:
+    """
+    Устанавливает соединения в течение ``DURATION`` секунд
+    и возвращает их количество.
+    """
+
+    server_key = load_der_public_key(public_key)
+
+    async def worker(deadline: float) -> int:
+        count = 0
+
+        while perf_counter() < deadline:
+            reader, writer = await open_connection(HOST, PORT)
+            stream = SimplePacketSplitterStream(reader, writer)
+
+            await exchange_key(stream, server_key, modes=(mode,))
+            await stream.close()
+
+            count += 1
+
+        return count
+
+    async def main() -> int:
+        deadline = perf_counter() + DURATION
+
+        return sum(
+            await gather(*(worker(deadline) for _ in range(CONNECTIONS_PER_PROCESS)))
+        )
+
+    return run(main())
+
+
+def measure(private_key: bytes, public_key: bytes, mode: str) -> tuple[float, float]:
+    """
+    Возвращает количество рукопожатий в секунду
+    и процессорное время сервера на одно рукопожатие в микросекундах.
+    """
+
+    stop = Event()
+    cpu_time = Queue()
+    server = Process(target=serve, args=(private_key, stop, cpu_time))
+
+    server.start()
+
+    try:
+        with Pool(CLIENT_PROCESSES) as pool:
+            pool.apply(sleep_before_start)
+
+            handshakes = sum(
+                pool.starmap(connect, [(public_key, mode)] * CLIENT_PROCESSES)
+            )
+    finally:
+        stop.set()
+
+    server_cpu_time = cpu_time.get()
+
+    server.join()
+
+    return handshakes / DURATION, server_cpu_time / handshakes * 1_000_000
+
+
+def sleep_before_start():
+    """
+    Даёт серверу время начать принимать соединения.
+    """
+
+    run(sleep(0.5))
+
+
+def main():
+    for key_size in KEY_SIZES:
+        key = generate_private_key(public_exponent=65537, key_size=key_size)
+        private_key = key.private_bytes(
+            Encoding.DER, PrivateFormat.PKCS8, NoEncryption()
+        )
+        public_key = key.public_key().public_bytes(Encoding.DER, PublicFormat.PKCS1)
+
+        for mode in ("rsa", "x25519"):
+            rate, server_cpu_time = measure(private_key, public_key, mode)
+
+            print(
+                f"RSA-{key_size}, {mode}: {rate:.0f} рукопожатий/с, "
+                f"{server_cpu_time:.0f} мкс процессорного времени сервера на рукопожатие"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Бенчмарк ``LogDatabase`` в сравнении с ``MemoryDatabase``:
+память Python-объектов после записи истории (по ``tracemalloc``; сегменты
+журнала находятся в страничном кэше и не учитываются) и время
+``get_messages`` для диапазона в начале, середине и конце длинного канала.
+
+Запуск: ``python -m benchmarks.log_database``
+"""
+
+import tracemalloc
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from model import ChannelId
+from server.database import Database, LogDatabase, MemoryDatabase
+
+CLIENTS = 100
+MESSAGES = 300_000
+CONTENT = b"message" * 16
+MESSAGES_PER_READ = 50
+READS = 2_000
+
+
+def populate(database: Database) -> ChannelId:
+    """
+    Записывает историю и возвращает ID самого длинного канала.
+    Содержимое сообщений различается, как в реальной истории.
+    """
+
+    clients = [database.register_client(b"password") for _ in range(CLIENTS)]
+
+    for i in range(MESSAGES):
+        if i % 2 == 0:
+            database.add_message(clients[0], clients[1], b"%d" % i + CONTENT)
+        else:
+            database.add_message(
+                clients[i % CLIENTS],
+                clients[(i * 7 + 1) % CLIENTS],
+                b"%d" % i + CONTENT,
+            )
+
+    return ChannelId.from_ids((clients[0], clients[1]))
+
+
+def measure_reads(database: Database, channel_id: ChannelId, first: int) -> float:
+    """
+    Возвращает среднее время ``get_messages`` в микросекундах.
+    """
+
+    start = perf_counter()
+
+    for _ in range(READS):
+        database.get_messages(channel_id, first, MESSAGES_PER_READ)
+
+    return (perf_counter() - start) / READS * 1e6
+
+
+def measure(name: str, create_database):
+    tracemalloc.start()
+
+    database = create_database()
+    start = perf_counter()
+    channel_id = populate(database)
+    writes = MESSAGES / (perf_counter() - start)
+    memory = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+
+    messages_count = sum(database.get_messages_count(channel_id).values())
+    reads = ", ".join(
+        f"{measure_reads(database, channel_id, first):.1f}"
+        for first in (
+            0,
+            messages_count // 2,
+            messages_count - MESSAGES_PER_READ,
+        )
+    )
+
+    print(
+        f"{name}: {memory / 1024 / 1024:.1f} МиБ, {writes:.0f} сообщений/с, "
+        f"чтение {MESSAGES_PER_READ} сообщений в начале, середине и конце: "
+        f"{reads} мкс"
+    )
+
+    if isinstance(database, LogDatabase):
+        database.close()
+
+
+def main():
+    measure("MemoryDatabase", MemoryDatabase)
+
+    with TemporaryDirectory() as directory:
+        measure("LogDatabase", lambda: LogDatabase(directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк восстановления ``PersistentMemoryDatabase`` после перезапуска:
+из снимка с коротким хвостом журнала и только из журнала.
+
+Цель - восстановление хранилища из 10 млн сообщений не дольше 60 с;
+по умолчанию измеряется ``MESSAGES`` сообщений, время для 10 млн
+оценивается линейно (восстановление линейно по количеству сообщений).
+
+Запуск: ``python -m benchmarks.memory_database_recovery``
+"""
+
+from os import listdir, path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+
+from server.database import PersistentMemoryDatabase
+
+CLIENTS = 1_000
+MESSAGES = 1_000_000
+TAIL_MESSAGES = 50_000
+CONTENT = b"message" * 16
+TARGET_MESSAGES = 10_000_000
+TARGET_SECONDS = 60.0
+
+
+def populate(directory: str, messages: int, snapshot: bool):
+    """
+    Записывает ``messages`` сообщений; если ``snapshot``, то после всех,
+    кроме последних ``TAIL_MESSAGES``, записывается снимок.
+    """
+
+    database = PersistentMemoryDatabase(directory, snapshot_interval=float("inf"))
+    clients = [database.register_client(b"password") for _ in range(CLIENTS)]
+
+    for i in range(messages):
+        if snapshot and i == messages - TAIL_MESSAGES:
+            database.snapshot()
+
+        database.add_message(
+            clients[i % CLIENTS], clients[(i * 7 + 1) % CLIENTS], b"%d" % i + CONTENT
+        )
+
+    while any(name.endswith(".tmp") for name in listdir(directory)) or (
+        snapshot
+        and not any(name.startswith("snapshot-") for name in listdir(directory))
+    ):
+        sleep(0.1)
+
+    database.close()
+
+
+def measure(messages: int, snapshot: bool) -> float:
+    """
+    Возвращает время восстановления в секундах.
+    """
+
+    with TemporaryDirectory() as directory:
+        populate(directory, messages, snapshot)
+
+        size = sum(
+            path.getsize(path.join(directory, name)) for name in listdir(directory)
+        )
+        start = perf_counter()
+
+        PersistentMemoryDatabase(directory)
+
+        elapsed = perf_counter() - start
+
+        print(
+            f"{'снимок и хвост журнала' if snapshot else 'только журнал'}: "
+            f"{size / 1024 / 1024:.0f} МиБ, {elapsed:.2f} с"
+        )
+
+        return elapsed
+
+
+def main():
+    print(f"сообщений: {MESSAGES}")
+
+    measure(MESSAGES, False)
+    elapsed = measure(MESSAGES, True)
+    estimate = elapsed * TARGET_MESSAGES / MESSAGES
+
+    print(
+        f"оценка для {TARGET_MESSAGES} сообщений: {estimate:.0f} с "
+        f"(цель - {TARGET_SECONDS:.0f} с)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Бенчмарк сериализации и десериализации всех пакетов из ``network.packets``.
+
+Сравнивает прежнюю схему (``dataclasses.asdict`` + ``dacite.from_dict``)
+со сгенерированными кодеками пакетов в форматах V1 и V2, а также размеры пакетов.
+
+Запуск: ``python -m benchmarks.packet_codec``
+"""
+
+from dataclasses import asdict, fields, is_dataclass
+from time import perf_counter
+from types import NoneType
+from typing import Any, Callable, Union, get_args, get_origin, get_type_hints
+
+from dacite import from_dict
+from msgpack import packb, unpackb
+
+from network import Packet, WireFormat, packets
+
+ITERATIONS = 20_000
+LIST_LENGTH = 16
+
+
+def sample_value(type: Any) -> Any:
+    """
+    Создаёт значение заданного типа для заполнения полей пакета.
+    """
+
+    origin = get_origin(type)
+
+    if type is int:
+        return 1_234_567_890_123
+    if type is bytes:
+        return b"\x00" * 64
+    if origin is Union:
+        return sample_value(next(arg for arg in get_args(type) if arg is not NoneType))
+    if origin is list:
+        return [sample_value(get_args(type)[0]) for _ in range(LIST_LENGTH)]
+    if origin is dict:
+        key_type, value_type = get_args(type)
+
+        return {
+            sample_value(key_type) + i: sample_value(value_type)
+            for i in range(LIST_LENGTH)
+        }
+    if is_dataclass(type):
+        hints = get_type_hints(type)
+
+        return type(*(sample_value(hints[field.name]) for field in fields(type)))
+
+    raise TypeError(type)
+
+
+def all_packets() -> list[Packet]:
+    return [
+        sample_value(value)
+        for value in vars(packets).values()
+        if isinstance(value, type)
+        and issubclass(value, Packet)
+        and "_codec" in vars(value)
+    ]
+
+
+def serialize_reference(packet: Packet) -> bytes:
+    data = asdict(packet)
+    data["type"] = packet.__class__.__name__
+
+    return packb(data)
+
+
+def deserialize_reference(data: dict, packet_type: type) -> Packet:
+    data = dict(data)
+
+    del data["type"]
+
+    return from_dict(packet_type, data)
+
+
+def measure(function: Callable[[], Any]) -> float:
+    """
+    Возвращает количество вызовов функции в секунду.
+    """
+
+    start = perf_counter()
+
+    for _ in range(ITERATIONS):
+        function()
+
+    return ITERATIONS / (perf_counter() - start)
+
+
+def main():
+    print(
+        f"{'пакет':<42}{'asdict':>10}{'V1':>10}{'V2':>10}"
+        f"{'dacite':>10}{'V1':>10}{'V2':>10}{'байт V1':>10}{'байт V2':>10}"
+    )
+    print(f"{'':<42}{'сериализация, оп/с':>30}{'десериализация, оп/с':>30}")
+
+    for packet in all_packets():
+        packet_type = type(packet)
+        raw_packet = unpackb(packet.serialize(), strict_map_key=False)
+        compact_raw_packet = unpackb(
+            packet.serialize(WireFormat.V2), strict_map_key=False
+        )
+
+        assert Packet.deserialize(raw_packet) == packet
+        assert Packet.deserialize(compact_raw_packet) == packet
+        assert deserialize_reference(raw_packet, packet_type) == packet
+
+        results = (
+            measure(lambda: serialize_reference(packet)),
+            measure(packet.serialize),
+            measure(lambda: packet.serialize(WireFormat.V2)),
+            measure(lambda: deserialize_reference(raw_packet, packet_type)),
+            measure(lambda: Packet.deserialize(raw_packet)),
+            measure(lambda: Packet.deserialize(compact_raw_packet)),
+            len(packet.serialize()),
+            len(packet.serialize(WireFormat.V2)),
+        )
+
+        print(
+            f"{packet_type.__name__:<42}"
+            + "".join(f"{result:>10.0f}" for result in results)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Микробенчмарк диспетчеризации входящих пакетов сервера.
+
+Сравнивает прежний линейный перебор типов пакетов (цепочка ``try_deserialize``)
+с поиском типа пакета и обработчика по таблице.
+
+Запуск: ``python -m benchmarks.packet_dispatch``
+"""
+
+from time import perf_counter
+from typing import Callable, Optional, Type
+
+from dacite import from_dict
+from msgpack import unpackb
+
+from network import Packet, packets
+
+PACKETS = [
+    packets.GetMessagesCount(1, 2),
+    packets.SendMessage(1, 2, b"content" * 8),
+    packets.GetMessages(1, 2, 0, 1),
+    packets.GetChannelPeers(1),
+    packets.SetEncryptionKeysMessage(1, 2, 3),
+    packets.GetEncryptionKeysMessage(1, 2, 3),
+]
+HANDLED_TYPES = [type(packet) for packet in PACKETS]
+ITERATIONS = 200_000
+
+
+def _linear_try_deserialize(data: dict, type: Type[Packet]) -> Optional[Packet]:
+    if "type" not in data or data["type"] != type.__name__:
+        return None
+
+    data = dict(data)
+
+    del data["type"]
+
+    return from_dict(type, data)
+
+
+def dispatch_linear(raw_packet: dict, handler: Callable[[Packet], None]):
+    for packet_type in HANDLED_TYPES:
+        if (packet := _linear_try_deserialize(raw_packet, packet_type)) is not None:
+            handler(packet)
+
+            break
+
+
+def dispatch_table(
+    raw_packet: dict, handlers: dict[Type[Packet], Callable[[Packet], None]]
+):
+    packet = Packet.deserialize(raw_packet)
+
+    handlers[type(packet)](packet)
+
+
+def measure(dispatch: Callable[[dict], None], raw_packets: list[dict]) -> float:
+    """
+    Возвращает количество обработанных пакетов в секунду.
+    """
+
+    start = perf_counter()
+
+    for i in range(ITERATIONS):
+        dispatch(raw_packets[i % len(raw_packets)])
+
+    return ITERATIONS / (perf_counter() - start)
+
+
+def main():
+    raw_packets = [
+        unpackb(packet.serialize(), strict_map_key=False) for packet in PACKETS
+    ]
+    handlers = {packet_type: lambda _: None for packet_type in HANDLED_TYPES}
+
+    for name, dispatch in (
+        ("линейный перебор", lambda raw: dispatch_linear(raw, lambda _: None)),
+        ("таблица", lambda raw: dispatch_table(raw, handlers)),
+    ):
+        print(f"{name}: {measure(dispatch, raw_packets):.0f} пакетов/с")
+
+    # худший случай прежней схемы - пакет, проверяемый последним
+    last_packet = [raw_packets[-1]]
+
+    for name, dispatch in (
+        ("линейный перебор", lambda raw: dispatch_linear(raw, lambda _: None)),
+        ("таблица", lambda raw: dispatch_table(raw, handlers)),
+    ):
+        print(
+            f"{name}, последний тип в цепочке: {measure(dispatch, last_packet):.0f} пакетов/с"
+        )
+
+
+if __name__ == "__main__":
+    main()
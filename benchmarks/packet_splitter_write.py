@@ -0,0 +1,84 @@
+"""
+Бенчмарк записи серии маленьких пакетов в ``SimplePacketSplitterStream``.
+
+Сравнивает буферизованную запись с прежней схемой,
+в которой каждый пакет записывался двумя ``write`` и сопровождался ``drain``.
+
+Запуск: ``python -m benchmarks.packet_splitter_write``
+"""
+
+from asyncio import gather, open_connection, run, sleep, start_server
+from time import perf_counter
+
+from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
+
+PACKETS_COUNT = 200_000
+PACKET = b"\x00" * 64
+HOST = "127.0.0.1"
+PORT = 18_400
+
+
+class UnbufferedPacketSplitterStream(SimplePacketSplitterStream):
+    """
+    Прежняя реализация записи: два ``write`` и ``drain`` на каждый пакет.
+    """
+
+    async def write(self, data: bytes):
+        self._writer.write(len(data).to_bytes(4, "little", signed=False))
+        self._writer.write(data)
+
+        await self._writer.drain()
+
+
+async def measure(stream_type: type[SimplePacketSplitterStream]) -> float:
+    """
+    Возвращает количество пакетов в секунду.
+    """
+
+    async def receive(reader, writer):
+        stream = SimplePacketSplitterStream(reader, writer)
+
+        for _ in range(PACKETS_COUNT):
+            await stream.read()
+
+        await stream.close()
+
+    received = []
+    server = await start_server(
+        lambda reader, writer: received.append(receive(reader, writer)), HOST, PORT
+    )
+    reader, writer = await open_connection(HOST, PORT)
+    stream = stream_type(reader, writer)
+
+    while len(received) == 0:
+        await sleep(0)
+
+    async def send():
+        for _ in range(PACKETS_COUNT):
+            await stream.write(PACKET)
+
+        await stream.flush()
+
+    start = perf_counter()
+
+    await gather(send(), received[0])
+
+    elapsed = perf_counter() - start
+
+    await stream.close()
+    server.close()
+    await server.wait_closed()
+
+    return PACKETS_COUNT / elapsed
+
+
+async def main():
+    for name, stream_type in (
+        ("write + drain на каждый пакет", UnbufferedPacketSplitterStream),
+        ("буферизованная запись", SimplePacketSplitterStream),
+    ):
+        print(f"{name}: {await measure(stream_type):.0f} пакетов/с")
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,100 @@
+"""
+Бенчмарк пропускной способности запросов одного клиента
+при разной глубине конвейера: количестве запросов, отправляемых
+одной серией через ``PacketStream.make_requests``.
+
+Сервер запускается в отдельном процессе.
+
+Запуск: ``python -m benchmarks.request_pipeline``
+"""
+
+from asyncio import create_task, run, sleep
+from multiprocessing import Event, Process
+from time import perf_counter
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    load_der_private_key,
+)
+
+from client import Client
+from network import packets
+from server.database import MemoryDatabase
+from server.server import Server
+
+HOST = "127.0.0.1"
+PORT = 18_700
+DURATION = 3.0
+PIPELINE_DEPTHS = [1, 4, 16, 64, 256]
+
+
+def serve(private_key: bytes, stop):
+    async def main():
+        server = Server(MemoryDatabase(), load_der_private_key(private_key, None))
+        task = create_task(server.handle_connections(HOST, PORT))
+
+        while not stop.is_set():
+            await sleep(0.05)
+
+        task.cancel()
+
+    run(main())
+
+
+async def measure(client: Client, depth: int) -> float:
+    """
+    Возвращает количество запросов в секунду.
+    """
+
+    requests_count = 0
+    start = perf_counter()
+
+    while perf_counter() - start < DURATION:
+        await client.stream.make_requests(
+            packets.GetChannelPeers(client.stream.next_request_id())
+            for _ in range(depth)
+        )
+
+        requests_count += depth
+
+    return requests_count / (perf_counter() - start)
+
+
+async def benchmark(key):
+    client = Client()
+
+    await client.connect(HOST, PORT, key.public_key())
+    await client.register(b"password")
+
+    for depth in PIPELINE_DEPTHS:
+        print(f"глубина {depth}: {await measure(client, depth):.0f} запросов/с")
+
+    await client.disconnect()
+
+
+def main():
+    key = generate_private_key(public_exponent=65537, key_size=2048)
+    stop = Event()
+    server = Process(
+        target=serve,
+        args=(
+            key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption()),
+            stop,
+        ),
+    )
+
+    server.start()
+
+    try:
+        run(sleep(0.5))
+        run(benchmark(key))
+    finally:
+        stop.set()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
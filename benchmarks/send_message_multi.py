@@ -0,0 +1,102 @@
+"""
+Бенчмарк отправки сообщений ``RECEIVERS`` получателям, например рассылки
+сообщений с ключами шифрования: ``RECEIVERS`` запросов ``SendMessage``
+подряд и один запрос ``SendMessageMulti`` (``Client.send_messages``).
+
+Сервер и клиенты работают в одном процессе, сервер - с ``MemoryDatabase``
+и с ``SqliteDatabase``. Для каждого способа выводится среднее время
+отправки всех сообщений до получения ответа сервера.
+
+Запуск: ``python -m benchmarks.send_message_multi``
+"""
+
+from asyncio import create_task, gather, run, sleep
+from os import urandom
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+
+from client import Client
+from server.database import Database, MemoryDatabase, SqliteDatabase
+from server.server import Server
+
+HOST = "127.0.0.1"
+PORT = 18_910
+RECEIVERS = 20
+CONTENT_SIZE = 256
+ROUNDS = 50
+
+
+async def measure(database: Database, key) -> dict[str, float]:
+    """
+    Возвращает среднее время отправки всех сообщений в миллисекундах
+    для каждого способа.
+    """
+
+    server_task = create_task(Server(database, key).handle_connections(HOST, PORT))
+
+    await sleep(0.2)
+
+    clients = []
+
+    for _ in range(RECEIVERS + 1):
+        client = Client()
+
+        await client.connect(HOST, PORT, key.public_key())
+        await client.register(b"password")
+
+        clients.append(client)
+
+    sender, *receivers = clients
+    messages = [(receiver.get_id(), urandom(CONTENT_SIZE)) for receiver in receivers]
+
+    async def send_messages_one_by_one():
+        for receiver_id, content in messages:
+            await sender.send_message(receiver_id, content)
+
+    async def send_messages_at_once():
+        await sender.send_messages(messages)
+
+    result = {}
+
+    for name, send in (
+        ("SendMessage", send_messages_one_by_one),
+        ("SendMessageMulti", send_messages_at_once),
+    ):
+        start = perf_counter()
+
+        for _ in range(ROUNDS):
+            await send()
+
+        result[name] = (perf_counter() - start) / ROUNDS * 1000
+
+    await gather(*(client.disconnect() for client in clients))
+
+    server_task.cancel()
+
+    return result
+
+
+async def main():
+    key = generate_private_key(public_exponent=65537, key_size=2048)
+
+    print(
+        f"получателей: {RECEIVERS}, размер сообщения: {CONTENT_SIZE} байт,"
+        f" отправок: {ROUNDS}"
+    )
+
+    with TemporaryDirectory() as directory:
+        for database_name, database in (
+            ("MemoryDatabase", MemoryDatabase()),
+            ("SqliteDatabase", SqliteDatabase(f"{directory}/database.sqlite")),
+        ):
+            for name, elapsed in (await measure(database, key)).items():
+                print(f"{database_name}, {name}: {elapsed:.2f} мс")
+
+            if isinstance(database, SqliteDatabase):
+                database.close()
+
+
+if __name__ == "__main__":
+    run(main())
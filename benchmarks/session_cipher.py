@@ -0,0 +1,75 @@
+"""
+Бенчмарк пропускной способности шифров сессии на пакетах разного размера.
+
+Запуск: ``python -m benchmarks.session_cipher``
+"""
+
+from os import urandom
+from time import perf_counter
+from typing import Callable
+
+from network.streams.encrypted_packet_splitter_stream import (
+    AeadSessionCipher,
+    LegacySessionCipher,
+    SessionCipher,
+)
+
+PAYLOAD_SIZES = [64, 1024, 16 * 1024, 256 * 1024, 1024 * 1024]
+BYTES_PER_MEASUREMENT = 64 * 1024 * 1024
+CLIENT_KEY = b"\x01" * 32
+SERVER_KEY = b"\x02" * 32
+
+
+def legacy_cipher(is_client: bool) -> SessionCipher:
+    return LegacySessionCipher(CLIENT_KEY, *((1, -1) if is_client else (-1, 1)))
+
+
+def aead_cipher(algorithm: str) -> Callable[[bool], SessionCipher]:
+    def create(is_client: bool) -> SessionCipher:
+        if is_client:
+            return AeadSessionCipher(algorithm, CLIENT_KEY, SERVER_KEY)
+
+        return AeadSessionCipher(algorithm, SERVER_KEY, CLIENT_KEY)
+
+    return create
+
+
+CIPHERS: dict[str, Callable[[bool], SessionCipher]] = {
+    "AES-CTR + HMAC": legacy_cipher,
+    "AES-256-GCM": aead_cipher("aes-256-gcm"),
+    "ChaCha20-Poly1305": aead_cipher("chacha20-poly1305"),
+}
+
+
+def measure(create_cipher: Callable[[bool], SessionCipher], payload_size: int) -> float:
+    """
+    Возвращает скорость шифрования и расшифровки в МиБ/с.
+    """
+
+    sender, receiver = create_cipher(True), create_cipher(False)
+    payload = urandom(payload_size)
+    iterations = max(1, BYTES_PER_MEASUREMENT // payload_size)
+    start = perf_counter()
+
+    for _ in range(iterations):
+        receiver.decrypt(sender.encrypt(payload))
+
+    return iterations * payload_size / (perf_counter() - start) / 1024 / 1024
+
+
+def main():
+    print(f"{'шифр':<20}" + "".join(f"{size:>12}" for size in PAYLOAD_SIZES))
+
+    for name, create_cipher in CIPHERS.items():
+        print(
+            f"{name:<20}"
+            + "".join(
+                f"{measure(create_cipher, size):>12.1f}" for size in PAYLOAD_SIZES
+            )
+        )
+
+    print("(МиБ/с, шифрование + расшифровка, столбцы - размер пакета в байтах)")
+
+
+if __name__ == "__main__":
+    main()
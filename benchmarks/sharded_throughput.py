@@ -0,0 +1,106 @@
+"""
+Бенчмарк суммарной пропускной способности ``ShardedDatabase`` при 1, 2, 4
+и 8 шардах в сравнении с одной базой данных в процессе ``DatabaseManager``.
+
+``CLIENT_PROCESSES`` процессов (созданных ``fork`` и поэтому использующих
+те же прокси) в течение ``DURATION`` секунд добавляют сообщения в свои каналы
+и после каждого запрашивают последние ``WINDOW`` сообщений канала.
+Результат - количество пар операций в секунду по всем процессам.
+
+Результаты имеют смысл лишь на машине с количеством ядер не меньше
+количества шардов и процессов клиентов.
+
+Запуск: ``python -m benchmarks.sharded_throughput``
+"""
+
+from multiprocessing import Process, Queue
+from os import cpu_count
+from time import perf_counter
+
+from model import ChannelId, Id
+from server.cluster import DatabaseManager
+from server.database import Database, ShardedDatabase
+
+DURATION = 3.0
+CLIENT_PROCESSES = 8
+CHANNELS_PER_PROCESS = 16
+CONTENT_SIZE = 100
+WINDOW = 20
+SHARDS = [1, 2, 4, 8]
+
+
+def load(database: Database, channels: list[tuple[Id, Id]], result: Queue):
+    operations = 0
+    content = bytes(CONTENT_SIZE)
+    start = perf_counter()
+
+    while perf_counter() - start < DURATION:
+        sender_id, receiver_id = channels[operations % len(channels)]
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+
+        database.add_message(sender_id, receiver_id, content)
+
+        messages_count = sum(database.get_messages_count(channel_id).values())
+        count = min(WINDOW, messages_count)
+
+        database.get_messages(channel_id, messages_count - count, count)
+
+        operations += 1
+
+    result.put(operations / (perf_counter() - start))
+
+
+def measure(database: Database) -> float:
+    """
+    Возвращает суммарное количество пар операций в секунду.
+    """
+
+    result = Queue()
+    processes = []
+
+    for _ in range(CLIENT_PROCESSES):
+        channels = [
+            (
+                database.register_client(b"password"),
+                database.register_client(b"password"),
+            )
+            for _ in range(CHANNELS_PER_PROCESS)
+        ]
+
+        processes.append(Process(target=load, args=(database, channels, result)))
+
+    for process in processes:
+        process.start()
+
+    throughput = sum(result.get() for _ in processes)
+
+    for process in processes:
+        process.join()
+
+    return throughput
+
+
+def main():
+    print(
+        f"ядер: {cpu_count()}, процессов клиентов: {CLIENT_PROCESSES},"
+        f" операция - add_message, get_messages_count и get_messages"
+    )
+
+    with DatabaseManager() as manager:
+        throughput = measure(manager.Database())
+
+    print(f"DatabaseManager: {throughput:.0f} операций/с")
+
+    for shards in SHARDS:
+        database = ShardedDatabase(shards)
+
+        try:
+            throughput = measure(database)
+        finally:
+            database.close()
+
+        print(f"ShardedDatabase, шардов {shards}: {throughput:.0f} операций/с")
+
+
+if __name__ == "__main__":
+    main()
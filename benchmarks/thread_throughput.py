@@ -0,0 +1,49 @@
+"""
+Бенчмарк пропускной способности ``run_threads`` при 1, 2, 4 и 8 потоках
+с отдельными циклами событий: количество сообщений в секунду,
+доставленных получателям. Нагрузка та же, что в ``cluster_throughput``.
+
+Масштабирование зависит от сборки Python: с GIL параллельно выполняется
+только шифрование, без GIL (``python3.13t``) - вся обработка соединений.
+Поэтому бенчмарк следует запускать в обеих сборках на машине
+с количеством ядер не меньше количества потоков.
+
+Запуск: ``python -m benchmarks.thread_throughput``
+"""
+
+import sys
+from os import cpu_count
+from platform import python_version
+from signal import SIGTERM, signal
+
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import load_der_private_key
+
+from server.cluster import run_threads
+
+from .cluster_throughput import HOST, PORT, measure
+
+THREADS = [1, 2, 4, 8]
+
+
+def serve(threads: int, private_key: bytes):
+    signal(SIGTERM, lambda *_: sys.exit())
+
+    run_threads(threads, load_der_private_key(private_key, None), HOST, PORT)
+
+
+def main():
+    key = generate_private_key(public_exponent=65537, key_size=2048)
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+
+    print(
+        f"Python {python_version()}, GIL {'включён' if gil_enabled else 'отключён'}, "
+        f"ядер: {cpu_count()}"
+    )
+
+    for threads in THREADS:
+        print(f"потоков {threads}: {measure(threads, key, serve):.0f} сообщений/с")
+
+
+if __name__ == "__main__":
+    main()
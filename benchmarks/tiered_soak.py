@@ -0,0 +1,126 @@
+"""
+Длительный бенчмарк памяти ``MemoryDatabase`` и ``TieredDatabase``:
+в ``CHANNELS`` каналов непрерывно добавляются сообщения, каждое ``READ_EVERY``
+сообщение запрашиваются последние ``WINDOW`` сообщений случайного канала,
+а каждое ``HISTORY_READ_EVERY`` - случайный диапазон из всей истории.
+У ``TieredDatabase`` в памяти остаются последние 1024 сообщения каждого канала
+и ``READ_CACHE_SIZE`` байт прочитанных с диска сообщений.
+
+Каждая база данных измеряется в отдельном процессе; по мере роста истории
+выводятся прирост RSS и скорость добавления сообщений.
+
+Запуск: ``python -m benchmarks.tiered_soak``
+"""
+
+from multiprocessing import Process, Queue
+from os import sysconf
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from model import ChannelId
+from server.database import Database, MemoryDatabase, TieredDatabase
+
+MESSAGES = 5_000_000
+REPORT_EVERY = 500_000
+CHANNELS = 1_000
+CONTENT_SIZE = 100
+READ_EVERY = 10
+WINDOW = 50
+HISTORY_READ_EVERY = 1_000
+READ_CACHE_SIZE = 16 * 1024 * 1024
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * sysconf("SC_PAGE_SIZE")
+
+
+def soak(database: Database, result: Queue):
+    random = Random(0)
+    clients = [database.register_client(b"password") for _ in range(CHANNELS + 1)]
+    channels = [
+        (clients[i], clients[i + 1], ChannelId.from_ids((clients[i], clients[i + 1])))
+        for i in range(CHANNELS)
+    ]
+    messages_counts = [1] * CHANNELS
+
+    for sender_id, receiver_id, _ in channels:
+        database.add_message(sender_id, receiver_id, random.randbytes(CONTENT_SIZE))
+
+    before = rss()
+    start = perf_counter()
+
+    for i in range(1, MESSAGES + 1):
+        channel = random.randrange(CHANNELS)
+        sender_id, receiver_id, _ = channels[channel]
+
+        database.add_message(sender_id, receiver_id, random.randbytes(CONTENT_SIZE))
+        messages_counts[channel] += 1
+
+        if i % READ_EVERY == 0:
+            channel = random.randrange(CHANNELS)
+            count = min(WINDOW, messages_counts[channel])
+
+            database.get_messages(
+                channels[channel][2], messages_counts[channel] - count, count
+            )
+
+        if i % HISTORY_READ_EVERY == 0:
+            channel = random.randrange(CHANNELS)
+            first_message_index = random.randrange(messages_counts[channel])
+            count = min(WINDOW, messages_counts[channel] - first_message_index)
+
+            database.get_messages(channels[channel][2], first_message_index, count)
+
+        if i % REPORT_EVERY == 0:
+            result.put((i, rss() - before, i / (perf_counter() - start)))
+
+    result.put(None)
+
+
+def run_memory_database(result: Queue):
+    soak(MemoryDatabase(), result)
+
+
+def run_tiered_database(result: Queue):
+    with TemporaryDirectory() as directory:
+        database = TieredDatabase(
+            f"{directory}/cold.sqlite", read_cache_size=READ_CACHE_SIZE
+        )
+
+        try:
+            soak(database, result)
+        finally:
+            database.close()
+
+
+def main():
+    print(
+        f"каналов: {CHANNELS}, сообщений: {MESSAGES}, содержимое: {CONTENT_SIZE} байт"
+    )
+
+    for name, target in (
+        ("MemoryDatabase", run_memory_database),
+        ("TieredDatabase", run_tiered_database),
+    ):
+        print(name)
+
+        result = Queue()
+        process = Process(target=target, args=(result,))
+
+        process.start()
+
+        while (report := result.get()) is not None:
+            messages, memory, rate = report
+
+            print(
+                f"  {messages} сообщений: прирост RSS {memory / 2**20:.0f} МиБ,"
+                f" {rate:.0f} сообщений/с"
+            )
+
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,18 @@
 from asyncio import open_connection
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Final, Iterable, Optional
 
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 
 from exceptions import ProtocolException
-from model import Id, Message, random_id
-from network import Packet, packets
+from model import Id, Message
+from network import WireFormat, packets
 from network.streams.encrypted_packet_splitter_stream import (
     EncryptedPacketSplitterStream,
+    SessionTicket,
     exchange_key,
 )
 from network.streams.packet_stream import PacketStream
+from network.streams.push_dispatcher import PushDispatcher
 from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
 
 from .exceptions import *
@@ -18,15 +20,61 @@ from .exceptions import *
 
 class Client:
     _id: Optional[Id]
+    _resumption_secret: Optional[bytes]
 
     stream: Optional[PacketStream]
     on_message: Optional[Callable[[Message], Awaitable]]
+    on_group_message: Optional[Callable[[Id, Message], Awaitable]]
+    """
+    Вызывается для нового сообщения группы с ID группы и сообщением.
+    """
+
+    on_messages_dropped: Optional[Callable[[], Awaitable]]
+    """
+    Вызывается, когда сервер пропустил отправку части новых сообщений
+    из-за переполнения очереди доставки; их следует загрузить через ``get_messages``
+    и ``get_group_messages``.
+    """
+
+    request_timeout: Optional[float]
+    """
+    Время ожидания ответа на запрос в секундах (None - без ограничения),
+    по его истечении методы выбрасывают ``asyncio.TimeoutError``.
+    Методы можно вызывать одновременно, например через ``asyncio.gather``:
+    запросы отправляются, не дожидаясь ответов на предыдущие.
+    """
+
+    push_dispatcher: Final[PushDispatcher]
+    """
+    Очередь вызова ``on_message`` и других обработчиков уведомлений сервера.
+    Медленный ``on_message`` не задерживает ответы на запросы.
+    Необработанные уведомления отбрасываются при ``disconnect``.
+    """
+
+    session_ticket: Optional[SessionTicket]
+    """
+    Последний полученный от сервера билет возобновления сессии,
+    его можно передать в ``connect``, чтобы подключиться без RSA и ``login``.
+    """
+
+    def __init__(self, push_dispatcher: Optional[PushDispatcher] = None):
+        """
+        :param push_dispatcher: очередь вызова обработчиков уведомлений сервера,
+            по умолчанию - последовательный вызов в порядке получения
+        """
 
-    def __init__(self):
         self._id = None
+        self._resumption_secret = None
 
         self.stream = None
         self.on_message = None
+        self.on_group_message = None
+        self.on_messages_dropped = None
+        self.request_timeout = None
+        self.push_dispatcher = (
+            PushDispatcher() if push_dispatcher is None else push_dispatcher
+        )
+        self.session_ticket = None
 
     def get_id(self) -> Optional[Id]:
         """
@@ -57,11 +105,9 @@ class Client:
 
         await self.stream.write(packets.Register(password))
 
-        raw_packet = await self.stream.read()
+        packet = await self.stream.read()
 
-        if (
-            packet := Packet.try_deserialize(raw_packet, packets.RegisterSuccess)
-        ) is not None:
+        if isinstance(packet, packets.RegisterSuccess):
             self._id = packet.id
         else:
             raise ProtocolException()
@@ -82,11 +128,11 @@ class Client:
 
         await self.stream.write(packets.Login(id, password))
 
-        raw_packet = await self.stream.read()
+        packet = await self.stream.read()
 
-        if Packet.try_deserialize(raw_packet, packets.LoginSuccess) is not None:
+        if isinstance(packet, packets.LoginSuccess):
             self._id = id
-        elif Packet.try_deserialize(raw_packet, packets.LoginFail) is not None:
+        elif isinstance(packet, packets.LoginFail):
             raise LoginFailException()
         else:
             raise ProtocolException()
@@ -106,16 +152,49 @@ class Client:
             raise ClientNotAuthorizedException()
 
         response = await self.stream.make_request(
-            packets.GetMessagesCount(random_id(), peer_id)
+            packets.GetMessagesCount(self.stream.next_request_id(), peer_id),
+            self.request_timeout,
         )
 
-        if (
-            packet := Packet.try_deserialize(response, packets.GetMessagesCountSuccess)
-        ) is not None:
-            return packet.messages_count
+        if isinstance(response, packets.GetMessagesCountSuccess):
+            return response.messages_count
         else:
             raise ProtocolException()
 
+    async def get_messages_counts(
+        self, peer_ids: Iterable[Id]
+    ) -> dict[Id, dict[Id, int]]:
+        """
+        Возвращает количество сообщений каждого участника в каналах
+        с указанными собеседниками. Запросы отправляются одной серией.
+
+        :param peer_ids: ID собеседников
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        peer_ids = list(peer_ids)
+        responses = await self.stream.make_requests(
+            (
+                packets.GetMessagesCount(self.stream.next_request_id(), peer_id)
+                for peer_id in peer_ids
+            ),
+            self.request_timeout,
+        )
+        result = {}
+
+        for peer_id, response in zip(peer_ids, responses):
+            if isinstance(response, packets.GetMessagesCountSuccess):
+                result[peer_id] = response.messages_count
+            else:
+                raise ProtocolException()
+
+        return result
+
     async def send_message(self, receiver_id: Id, content: bytes):
         """
         Отправляет сообщение указанному клиенту.
@@ -131,19 +210,49 @@ class Client:
             raise ClientNotAuthorizedException()
 
         response = await self.stream.make_request(
-            packets.SendMessage(random_id(), receiver_id, content)
+            packets.SendMessage(self.stream.next_request_id(), receiver_id, content),
+            self.request_timeout,
         )
 
-        if Packet.try_deserialize(response, packets.SendMessageSuccess) is not None:
+        if isinstance(response, packets.SendMessageSuccess):
             ...
-        elif (
-            Packet.try_deserialize(response, packets.SendMessageFailNoSuchClient)
-            is not None
-        ):
+        elif isinstance(response, packets.SendMessageFailNoSuchClient):
             raise NoSuchClientException()
         else:
             raise ProtocolException()
 
+    async def send_messages(self, messages: Iterable[tuple[Id, bytes]]) -> list[bool]:
+        """
+        Отправляет сообщения нескольким клиентам одним запросом.
+        Возвращает для каждого сообщения, отправлено ли оно
+        (False - получателя не существует).
+
+        :param messages: пары из ID получателя и содержимого сообщения
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        messages = list(messages)
+        response = await self.stream.make_request(
+            packets.SendMessageMulti(
+                self.stream.next_request_id(),
+                [receiver_id for receiver_id, _ in messages],
+                [content for _, content in messages],
+            ),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.SendMessageMultiSuccess) and len(
+            response.results
+        ) == len(messages):
+            return response.results
+        else:
+            raise ProtocolException()
+
     async def get_messages(
         self, peer_id: Id, first_message_index: int, count: int
     ) -> list[Message]:
@@ -163,17 +272,15 @@ class Client:
             raise ClientNotAuthorizedException()
 
         response = await self.stream.make_request(
-            packets.GetMessages(random_id(), peer_id, first_message_index, count)
+            packets.GetMessages(
+                self.stream.next_request_id(), peer_id, first_message_index, count
+            ),
+            self.request_timeout,
         )
 
-        if (
-            packet := Packet.try_deserialize(response, packets.GetMessagesSuccess)
-        ) is not None:
-            return packet.messages
-        elif (
-            Packet.try_deserialize(response, packets.GetMessagesFailInvalidRange)
-            is not None
-        ):
+        if isinstance(response, packets.GetMessagesSuccess):
+            return response.messages
+        elif isinstance(response, packets.GetMessagesFailInvalidRange):
             raise InvalidRangeException()
         else:
             raise ProtocolException()
@@ -189,12 +296,12 @@ class Client:
         if self._id is None:
             raise ClientNotAuthorizedException()
 
-        response = await self.stream.make_request(packets.GetChannelPeers(random_id()))
+        response = await self.stream.make_request(
+            packets.GetChannelPeers(self.stream.next_request_id()), self.request_timeout
+        )
 
-        if (
-            packet := Packet.try_deserialize(response, packets.GetChannelPeersSuccess)
-        ) is not None:
-            return packet.peers
+        if isinstance(response, packets.GetChannelPeersSuccess):
+            return response.peers
         else:
             raise ProtocolException()
 
@@ -214,27 +321,17 @@ class Client:
             raise ClientNotAuthorizedException()
 
         response = await self.stream.make_request(
-            packets.SetEncryptionKeysMessage(random_id(), peer_id, message_id)
+            packets.SetEncryptionKeysMessage(
+                self.stream.next_request_id(), peer_id, message_id
+            ),
+            self.request_timeout,
         )
 
-        if (
-            Packet.try_deserialize(response, packets.SetEncryptionKeysMessageSuccess)
-            is not None
-        ):
+        if isinstance(response, packets.SetEncryptionKeysMessageSuccess):
             return
-        elif (
-            Packet.try_deserialize(
-                response, packets.SetEncryptionKeysMessageFailNoSuchClient
-            )
-            is not None
-        ):
+        elif isinstance(response, packets.SetEncryptionKeysMessageFailNoSuchClient):
             raise NoSuchClientException()
-        elif (
-            Packet.try_deserialize(
-                response, packets.SetEncryptionKeysMessageFailInvalidId
-            )
-            is not None
-        ):
+        elif isinstance(response, packets.SetEncryptionKeysMessageFailInvalidId):
             raise InvalidIdException()
         else:
             raise ProtocolException()
@@ -258,21 +355,15 @@ class Client:
             raise ClientNotAuthorizedException()
 
         response = await self.stream.make_request(
-            packets.GetEncryptionKeysMessage(random_id(), keys_owner_id, peer_id)
+            packets.GetEncryptionKeysMessage(
+                self.stream.next_request_id(), keys_owner_id, peer_id
+            ),
+            self.request_timeout,
         )
 
-        if (
-            packet := Packet.try_deserialize(
-                response, packets.GetEncryptionKeysMessageSuccess
-            )
-        ) is not None:
-            return packet.message_id
-        elif (
-            Packet.try_deserialize(
-                response, packets.GetEncryptionKeysMessageFailNoSuchClient
-            )
-            is not None
-        ):
+        if isinstance(response, packets.GetEncryptionKeysMessageSuccess):
+            return response.message_id
+        elif isinstance(response, packets.GetEncryptionKeysMessageFailNoSuchClient):
             raise NoSuchClientException()
         else:
             raise ProtocolException()
@@ -296,13 +387,177 @@ class Client:
             if self.on_message is not None:
                 await self.on_message(message)
 
-    async def connect(self, host: str, port: int, server_key: RSAPublicKey):
+    async def create_group(self, members: Iterable[Id]) -> Id:
+        """
+        Создаёт группу из текущего клиента и указанных клиентов,
+        возвращает ID группы.
+
+        :param members: ID остальных участников группы
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.CreateGroup(self.stream.next_request_id(), list(members)),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.CreateGroupSuccess):
+            return response.group_id
+        elif isinstance(response, packets.CreateGroupFailNoSuchClient):
+            raise NoSuchClientException()
+        else:
+            raise ProtocolException()
+
+    async def get_groups(self) -> list[Id]:
+        """
+        Возвращает список ID групп, в которых состоит клиент.
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.GetGroups(self.stream.next_request_id()), self.request_timeout
+        )
+
+        if isinstance(response, packets.GetGroupsSuccess):
+            return response.groups
+        else:
+            raise ProtocolException()
+
+    async def get_group_members(self, group_id: Id) -> list[Id]:
+        """
+        Возвращает список ID участников группы.
+
+        :param group_id: ID группы
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.GetGroupMembers(self.stream.next_request_id(), group_id),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.GetGroupMembersSuccess):
+            return response.members
+        elif isinstance(response, packets.GetGroupMembersFailNoSuchGroup):
+            raise NoSuchGroupException()
+        else:
+            raise ProtocolException()
+
+    async def send_group_message(self, group_id: Id, content: bytes):
+        """
+        Отправляет сообщение в группу.
+
+        :param group_id: ID группы
+        :param content: содержимое сообщения
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.SendGroupMessage(self.stream.next_request_id(), group_id, content),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.SendGroupMessageSuccess):
+            ...
+        elif isinstance(response, packets.SendGroupMessageFailNoSuchGroup):
+            raise NoSuchGroupException()
+        else:
+            raise ProtocolException()
+
+    async def get_group_messages_count(self, group_id: Id) -> int:
+        """
+        Возвращает количество сообщений в группе.
+
+        :param group_id: ID группы
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.GetGroupMessagesCount(self.stream.next_request_id(), group_id),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.GetGroupMessagesCountSuccess):
+            return response.messages_count
+        elif isinstance(response, packets.GetGroupMessagesCountFailNoSuchGroup):
+            raise NoSuchGroupException()
+        else:
+            raise ProtocolException()
+
+    async def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        """
+        Возвращает список сообщений группы, находящихся в заданном диапазоне.
+
+        :param group_id: ID группы
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
+
+        if self.stream is None:
+            raise ClientNotConnectedException()
+
+        if self._id is None:
+            raise ClientNotAuthorizedException()
+
+        response = await self.stream.make_request(
+            packets.GetGroupMessages(
+                self.stream.next_request_id(), group_id, first_message_index, count
+            ),
+            self.request_timeout,
+        )
+
+        if isinstance(response, packets.GetGroupMessagesSuccess):
+            return response.messages
+        elif isinstance(response, packets.GetGroupMessagesFailInvalidRange):
+            raise InvalidRangeException()
+        elif isinstance(response, packets.GetGroupMessagesFailNoSuchGroup):
+            raise NoSuchGroupException()
+        else:
+            raise ProtocolException()
+
+    async def connect(
+        self,
+        host: str,
+        port: int,
+        server_key: RSAPublicKey,
+        session_ticket: Optional[SessionTicket] = None,
+    ):
         """
         Подлкючается к указанному серверу.
+        Если сервер принял билет возобновления, клиент сразу авторизован
+        под ID из билета, иначе требуется ``login``.
 
         :param host: имя хоста сервера
         :param port: порт сервера
         :param server_key: публичный ключ сервера
+        :param session_ticket: билет возобновления предыдущей сессии
         """
 
         if self.stream is not None:
@@ -311,17 +566,28 @@ class Client:
         reader, writer = await open_connection(host, port)
         stream = SimplePacketSplitterStream(reader, writer)
 
-        key_exchange_result = await exchange_key(stream, server_key)
+        key_exchange_result = await exchange_key(
+            stream, server_key, session_ticket=session_ticket
+        )
+
+        self._id = key_exchange_result.client_id
+        self._resumption_secret = key_exchange_result.resumption_secret
 
         self.stream = PacketStream(
-            EncryptedPacketSplitterStream(
-                stream,
-                key_exchange_result.key,
-                key_exchange_result.our_nonce,
-                key_exchange_result.peer_nonce,
-            )
+            EncryptedPacketSplitterStream(stream, key_exchange_result.cipher),
+            WireFormat.V2,
+            push_dispatcher=self.push_dispatcher,
         )
         self.stream.incoming_packet_callbacks[packets.NewMessage] = self._on_message
+        self.stream.incoming_packet_callbacks[
+            packets.NewGroupMessage
+        ] = self._on_group_message
+        self.stream.incoming_packet_callbacks[
+            packets.NewMessagesDropped
+        ] = self._on_messages_dropped
+        self.stream.incoming_packet_callbacks[
+            packets.NewSessionTicket
+        ] = self._on_new_session_ticket
 
     async def disconnect(self):
         """
@@ -332,9 +598,26 @@ class Client:
             try:
                 await self.stream.close()
             finally:
+                self.push_dispatcher.close()
+
                 self.stream = None
                 self._id = None
+                self._resumption_secret = None
 
     async def _on_message(self, packet: packets.NewMessage):
         if self.on_message is not None:
             await self.on_message(packet.message)
+
+    async def _on_group_message(self, packet: packets.NewGroupMessage):
+        if self.on_group_message is not None:
+            await self.on_group_message(packet.group_id, packet.message)
+
+    async def _on_messages_dropped(self, _: packets.NewMessagesDropped):
+        if self.on_messages_dropped is not None:
+            await self.on_messages_dropped()
+
+    async def _on_new_session_ticket(self, packet: packets.NewSessionTicket):
+        if self._resumption_secret is not None:
+            self.session_ticket = SessionTicket(
+                packet.client_id, packet.ticket, self._resumption_secret
+            )
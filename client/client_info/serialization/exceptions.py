@@ -1,4 +1,4 @@
 class DeserializationException(Exception):
     """
     Ошибка при десериализации данных.
-    """
\ No newline at end of file
+    """
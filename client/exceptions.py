@@ -44,3 +44,9 @@ class InvalidIdException(Exception):
     """
     Указанный ID не является верным.
     """
+
+
+class NoSuchGroupException(Exception):
+    """
+    Указанной группы не существует или клиент в ней не состоит.
+    """
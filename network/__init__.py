@@ -1 +1 @@
-from .packet import Packet, RequestPacket
+from .packet import Packet, RequestPacket, WireFormat
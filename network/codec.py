@@ -0,0 +1,334 @@
+from dataclasses import dataclass, fields, is_dataclass
+from types import NoneType
+from typing import Any, Callable, Union, get_args, get_origin, get_type_hints
+
+from exceptions import ProtocolException
+
+_PRIMITIVE_TYPES = (bool, int, float, str, bytes)
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    Сгенерированные для класса пакета функции кодирования и декодирования.
+    """
+
+    encode: Callable[[Any], dict]
+    """
+    Преобразует пакет в словарь, пригодный для передачи в ``msgpack.packb``.
+    """
+
+    decode: Callable[[dict], Any]
+    """
+    Проверяет распакованный словарь и создаёт из него пакет.
+    При несоответствии данных типам полей выбрасывает ``ProtocolException``.
+    """
+
+    encode_compact: Callable[[Any], list]
+    """
+    Преобразует пакет в список ``[код типа, поля...]`` (формат V2).
+    """
+
+    decode_compact: Callable[[list], Any]
+    """
+    Проверяет распакованный список формата V2 и создаёт из него пакет.
+    """
+
+
+class _CodeGenerator:
+    lines: list[str]
+    namespace: dict[str, Any]
+    _variables_count: int
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {"ProtocolException": ProtocolException}
+        self._variables_count = 0
+
+    def variable(self) -> str:
+        """
+        Возвращает новое уникальное имя локальной переменной.
+        """
+
+        self._variables_count += 1
+
+        return f"_v{self._variables_count}"
+
+    def reference(self, value: Any) -> str:
+        """
+        Добавляет объект в пространство имён генерируемого кода и возвращает его имя.
+        """
+
+        name = f"_r{len(self.namespace)}"
+        self.namespace[name] = value
+
+        return name
+
+    def add(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def compile(self, function_name: str) -> Callable:
+        exec("\n".join(self.lines), self.namespace)
+
+        return self.namespace[function_name]
+
+
+def _optional_argument(type: Any) -> Any:
+    """
+    Возвращает T для ``Optional[T]``.
+    """
+
+    arguments = [argument for argument in get_args(type) if argument is not NoneType]
+
+    if len(arguments) != 1 or len(get_args(type)) != 2:
+        raise TypeError(f"Неподдерживаемый тип поля пакета: {type}")
+
+    return arguments[0]
+
+
+def _is_plain(type: Any) -> bool:
+    """
+    Проверяет, что значение типа msgpack распаковывает без преобразований,
+    то есть тип не содержит вложенных dataclass'ов.
+    """
+
+    if type in _PRIMITIVE_TYPES or type is NoneType:
+        return True
+
+    origin = get_origin(type)
+
+    if origin is Union:
+        return _is_plain(_optional_argument(type))
+    if origin in (list, dict):
+        return all(map(_is_plain, get_args(type)))
+
+    return False
+
+
+def _encoder(generator: _CodeGenerator, type: Any, value: str, compact: bool) -> str:
+    """
+    Возвращает выражение, кодирующее значение выражения ``value`` типа ``type``.
+
+    :param compact: кодировать ли dataclass'ы списками полей вместо словарей
+    """
+
+    if _is_plain(type):
+        return value
+
+    origin = get_origin(type)
+
+    if origin is Union:
+        encoded = _encoder(generator, _optional_argument(type), value, compact)
+
+        return f"(None if {value} is None else {encoded})"
+    if origin is list:
+        (item_type,) = get_args(type)
+        item = generator.variable()
+
+        return (
+            f"[{_encoder(generator, item_type, item, compact)} for {item} in {value}]"
+        )
+    if origin is dict:
+        key_type, value_type = get_args(type)
+        key, item = generator.variable(), generator.variable()
+
+        return (
+            f"{{{_encoder(generator, key_type, key, compact)}: {_encoder(generator, value_type, item, compact)}"
+            f" for {key}, {item} in {value}.items()}}"
+        )
+    if is_dataclass(type):
+        hints = get_type_hints(type)
+
+        if compact:
+            items = ", ".join(
+                _encoder(generator, hints[field.name], f"{value}.{field.name}", True)
+                for field in fields(type)
+            )
+
+            return f"[{items}]"
+
+        items = ", ".join(
+            f"{field.name!r}: {_encoder(generator, hints[field.name], f'{value}.{field.name}', False)}"
+            for field in fields(type)
+        )
+
+        return f"{{{items}}}"
+
+    raise TypeError(f"Неподдерживаемый тип поля пакета: {type}")
+
+
+def _decoder(
+    generator: _CodeGenerator,
+    indent: int,
+    type: Any,
+    source: str,
+    target: str,
+    compact: bool,
+    header_length: int = 0,
+):
+    """
+    Генерирует код, проверяющий значение переменной ``source``
+    и записывающий декодированное значение типа ``type`` в переменную ``target``.
+
+    :param compact: закодированы ли dataclass'ы списками полей вместо словарей
+    :param header_length: количество пропускаемых элементов в начале списка полей
+    """
+
+    origin = get_origin(type)
+
+    if type in _PRIMITIVE_TYPES:
+        generator.add(indent, f"if type({source}) is not {type.__name__}:")
+        generator.add(indent + 1, "raise ProtocolException()")
+    elif origin is Union:
+        generator.add(indent, f"if {source} is not None:")
+        _decoder(
+            generator, indent + 1, _optional_argument(type), source, target, compact
+        )
+
+        if source != target:
+            generator.add(indent, "else:")
+            generator.add(indent + 1, f"{target} = None")
+
+        return
+    elif origin is list:
+        (item_type,) = get_args(type)
+        item = generator.variable()
+
+        generator.add(indent, f"if type({source}) is not list:")
+        generator.add(indent + 1, "raise ProtocolException()")
+
+        if _is_plain(item_type):
+            generator.add(indent, f"for {item} in {source}:")
+            _decoder(generator, indent + 1, item_type, item, item, compact)
+        else:
+            decoded_item = generator.variable()
+
+            generator.add(indent, f"{target} = []")
+            generator.add(indent, f"for {item} in {source}:")
+            _decoder(generator, indent + 1, item_type, item, decoded_item, compact)
+            generator.add(indent + 1, f"{target}.append({decoded_item})")
+
+            return
+    elif origin is dict:
+        key_type, value_type = get_args(type)
+        key, item = generator.variable(), generator.variable()
+
+        generator.add(indent, f"if type({source}) is not dict:")
+        generator.add(indent + 1, "raise ProtocolException()")
+
+        if _is_plain(key_type) and _is_plain(value_type):
+            generator.add(indent, f"for {key}, {item} in {source}.items():")
+            _decoder(generator, indent + 1, key_type, key, key, compact)
+            _decoder(generator, indent + 1, value_type, item, item, compact)
+        else:
+            decoded_key, decoded_item = generator.variable(), generator.variable()
+
+            generator.add(indent, f"{target} = {{}}")
+            generator.add(indent, f"for {key}, {item} in {source}.items():")
+            _decoder(generator, indent + 1, key_type, key, decoded_key, compact)
+            _decoder(generator, indent + 1, value_type, item, decoded_item, compact)
+            generator.add(indent + 1, f"{target}[{decoded_key}] = {decoded_item}")
+
+            return
+    elif is_dataclass(type):
+        hints = get_type_hints(type)
+        type_fields = fields(type)
+        values = [generator.variable() for _ in type_fields]
+
+        if compact:
+            names = ["_"] * header_length + values
+            length = len(names)
+
+            generator.add(
+                indent, f"if type({source}) is not list or len({source}) != {length}:"
+            )
+            generator.add(indent + 1, "raise ProtocolException()")
+
+            if length != 0:
+                generator.add(indent, f"{', '.join(names)}, = {source}")
+        else:
+            generator.add(indent, f"if type({source}) is not dict:")
+            generator.add(indent + 1, "raise ProtocolException()")
+
+            if len(values) != 0:
+                generator.add(indent, "try:")
+
+                for field, value in zip(type_fields, values):
+                    generator.add(indent + 1, f"{value} = {source}[{field.name!r}]")
+
+                generator.add(indent, "except KeyError:")
+                generator.add(indent + 1, "raise ProtocolException() from None")
+
+        decoded_values = []
+
+        for field, value in zip(type_fields, values):
+            field_type = hints[field.name]
+            decoded_value = value if _is_plain(field_type) else generator.variable()
+
+            _decoder(generator, indent, field_type, value, decoded_value, compact)
+            decoded_values.append(decoded_value)
+
+        generator.add(
+            indent,
+            f"{target} = {generator.reference(type)}({', '.join(decoded_values)})",
+        )
+
+        return
+    else:
+        raise TypeError(f"Неподдерживаемый тип поля пакета: {type}")
+
+    if source != target:
+        generator.add(indent, f"{target} = {source}")
+
+
+def make_codec(cls: type, type_tag: str, type_code: int) -> Codec:
+    """
+    Генерирует функции кодирования и декодирования для dataclass'а пакета.
+    Вся работа с аннотациями типов выполняется один раз, здесь;
+    сгенерированные функции обращаются к полям напрямую.
+
+    :param cls: класс пакета
+    :param type_tag: значение поля ``type`` сериализованного пакета (формат V1)
+    :param type_code: код типа пакета (формат V2)
+    """
+
+    hints = get_type_hints(cls)
+    cls_fields = fields(cls)
+
+    encoder_generator = _CodeGenerator()
+    items = "".join(
+        f", {field.name!r}: {_encoder(encoder_generator, hints[field.name], f'packet.{field.name}', False)}"
+        for field in cls_fields
+    )
+
+    encoder_generator.add(0, "def encode(packet):")
+    encoder_generator.add(1, f"return {{'type': {type_tag!r}{items}}}")
+
+    compact_encoder_generator = _CodeGenerator()
+    compact_items = "".join(
+        f", {_encoder(compact_encoder_generator, hints[field.name], f'packet.{field.name}', True)}"
+        for field in cls_fields
+    )
+
+    compact_encoder_generator.add(0, "def encode(packet):")
+    compact_encoder_generator.add(1, f"return [{type_code}{compact_items}]")
+
+    decoder_generator = _CodeGenerator()
+
+    decoder_generator.add(0, "def decode(data):")
+    _decoder(decoder_generator, 1, cls, "data", "packet", False)
+    decoder_generator.add(1, "return packet")
+
+    # код типа уже проверен при выборе кодека, поэтому он просто пропускается
+    compact_decoder_generator = _CodeGenerator()
+
+    compact_decoder_generator.add(0, "def decode(data):")
+    _decoder(compact_decoder_generator, 1, cls, "data", "packet", True, 1)
+    compact_decoder_generator.add(1, "return packet")
+
+    return Codec(
+        encoder_generator.compile("encode"),
+        decoder_generator.compile("decode"),
+        compact_encoder_generator.compile("encode"),
+        compact_decoder_generator.compile("decode"),
+    )
@@ -1,44 +1,98 @@
-from dataclasses import asdict, dataclass
-from typing import Optional, Type, TypeVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, ClassVar, Final, Type, TypeVar
 
-from dacite import DaciteError, from_dict
 from msgpack import packb
 
 from exceptions import ProtocolException
 from model import Id
 
+from .codec import Codec, make_codec
+
 PacketType = TypeVar("PacketType", bound="Packet")
 
 
+class WireFormat(Enum):
+    V1 = 1
+    """
+    Пакет - словарь с именем класса в поле ``type`` и именами полей в качестве ключей.
+    """
+
+    V2 = 2
+    """
+    Пакет - список ``[код типа, поля...]``, поля идут в порядке объявления.
+    """
+
+
+_packet_types: Final[dict[str, Type["Packet"]]] = {}
+"""
+Таблица всех типов пакетов, ключ - значение поля ``type`` сериализованного пакета.
+"""
+
+_packet_types_by_code: Final[dict[int, Type["Packet"]]] = {}
+"""
+Таблица всех типов пакетов, ключ - код типа пакета.
+"""
+
+
 @dataclass(frozen=True)
 class Packet:
-    def serialize(self) -> bytes:
+    _codec: ClassVar[Codec]
+
+    def serialize(self, wire_format: WireFormat = WireFormat.V1) -> bytes:
         """
         Сериализует пакет.
+
+        :param wire_format: формат сериализации
         """
 
-        data = asdict(self)
-        data["type"] = self.__class__.__name__
+        if wire_format == WireFormat.V2:
+            return packb(self._codec.encode_compact(self))
 
-        return packb(data)
+        return packb(self._codec.encode(self))
 
     @staticmethod
-    def try_deserialize(data: dict, type: Type[PacketType]) -> Optional[PacketType]:
-        if "type" not in data or data["type"] != type.__name__:
-            return None
-
-        data = dict(data)
+    def deserialize(data: dict | list) -> "Packet":
+        """
+        Десериализует пакет любого формата, определяя его тип
+        по полю ``type`` или по коду типа с помощью таблиц типов пакетов.
 
-        del data["type"]
+        :param data: распакованный пакет
+        """
 
         try:
-            packet = from_dict(type, data)
+            if type(data) is list:
+                return _packet_types_by_code[data[0]]._codec.decode_compact(data)
 
-            return packet
-        except DaciteError:
+            type_ = _packet_types[data["type"]]
+        except (KeyError, IndexError, TypeError):
             raise ProtocolException()
 
+        return type_._codec.decode(data)
+
 
 @dataclass(frozen=True)
 class RequestPacket(Packet):
     request_id: Id
+
+
+def packet_class(code: int) -> Callable[[Type[PacketType]], Type[PacketType]]:
+    """
+    Декоратор класса пакета. Делает класс неизменяемым dataclass'ом,
+    генерирует для него кодек и регистрирует его в таблицах типов пакетов.
+
+    :param code: код типа пакета в формате V2; не должен меняться
+    """
+
+    def wrapper(cls: Type[PacketType]) -> Type[PacketType]:
+        if code in _packet_types_by_code:
+            raise ValueError(f"Код типа пакета {code} уже занят")
+
+        cls = dataclass(frozen=True)(cls)
+        cls._codec = make_codec(cls, cls.__name__, code)
+        _packet_types[cls.__name__] = cls
+        _packet_types_by_code[code] = cls
+
+        return cls
+
+    return wrapper
@@ -1,77 +1,85 @@
-from dataclasses import dataclass
 from typing import Optional
 
+from msgpack import Packer
+
 from model import Id, Message
 
-from .packet import Packet, RequestPacket
+from .packet import Packet, RequestPacket, WireFormat, packet_class
+
+# коды типов пакетов передаются в формате V2 и не должны меняться
 
 
-@dataclass(frozen=True)
+@packet_class(1)
 class Register(Packet):
     password: bytes
 
 
-@dataclass(frozen=True)
+@packet_class(2)
 class RegisterSuccess(Packet):
     id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(3)
 class Login(Packet):
     id: Id
     password: bytes
 
 
-@dataclass(frozen=True)
+@packet_class(4)
 class LoginFail(Packet):
     ...
 
 
-@dataclass(frozen=True)
+@packet_class(5)
 class LoginSuccess(Packet):
     ...
 
 
-@dataclass(frozen=True)
-class LoginFail(Packet):
-    ...
+@packet_class(26)
+class NewSessionTicket(Packet):
+    """
+    Билет возобновления сессии, отправляется сервером после авторизации.
+    """
+
+    client_id: Id
+    ticket: bytes
 
 
-@dataclass(frozen=True)
+@packet_class(6)
 class GetMessagesCount(RequestPacket):
     request_id: Id
     peer_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(7)
 class GetMessagesCountSuccess(RequestPacket):
     request_id: Id
     messages_count: dict[Id, int]
 
 
-@dataclass(frozen=True)
+@packet_class(8)
 class GetMessagesCountFailNoSuchClient(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(9)
 class SendMessage(RequestPacket):
     request_id: Id
     receiver_id: Id
     content: bytes
 
 
-@dataclass(frozen=True)
+@packet_class(10)
 class SendMessageSuccess(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(11)
 class SendMessageFailNoSuchClient(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(12)
 class GetMessages(RequestPacket):
     request_id: Id
     peer_id: int
@@ -79,68 +87,260 @@ class GetMessages(RequestPacket):
     count: int
 
 
-@dataclass(frozen=True)
+@packet_class(13)
 class GetMessagesSuccess(RequestPacket):
     request_id: Id
     messages: list[Message]
 
-
-@dataclass(frozen=True)
+    @staticmethod
+    def serialize_messages(
+        messages: list[Message], wire_format: WireFormat
+    ) -> list[bytes]:
+        """
+        Сериализует каждое сообщение по отдельности так же,
+        как они сериализуются в составе пакета.
+
+        :param messages: сообщения
+        :param wire_format: формат сериализации
+        """
+
+        packer = Packer()
+
+        if wire_format == WireFormat.V2:
+            return [
+                packer.pack([message.sender, message.content]) for message in messages
+            ]
+
+        return [
+            packer.pack({"sender": message.sender, "content": message.content})
+            for message in messages
+        ]
+
+    @staticmethod
+    def serialize_spliced(
+        request_id: Id,
+        messages_count: int,
+        serialized_messages: bytes,
+        wire_format: WireFormat,
+    ) -> bytes:
+        """
+        Сериализует пакет, вставляя уже сериализованные сообщения
+        (см. ``serialize_messages``) без повторного кодирования.
+        Результат совпадает с результатом ``serialize``.
+
+        :param request_id: ID запроса
+        :param messages_count: количество сообщений
+        :param serialized_messages: сериализованные сообщения подряд
+        :param wire_format: формат сериализации
+        """
+
+        # поле messages последнее, пустой список кодируется одним байтом
+        prefix = GetMessagesSuccess(request_id, []).serialize(wire_format)[:-1]
+
+        return prefix + Packer().pack_array_header(messages_count) + serialized_messages
+
+
+@packet_class(14)
 class GetMessagesFailInvalidRange(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(15)
 class NewMessage(Packet):
     message: Message
 
 
-@dataclass(frozen=True)
+@packet_class(25)
+class NewMessagesDropped(Packet):
+    """
+    Часть новых сообщений не была отправлена клиенту из-за переполнения
+    его очереди доставки; их следует загрузить с помощью ``GetMessages``
+    и ``GetGroupMessages``.
+    """
+
+
+@packet_class(16)
 class GetChannelPeers(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(17)
 class GetChannelPeersSuccess(RequestPacket):
     request_id: Id
     peers: list[Id]
 
 
-@dataclass(frozen=True)
+@packet_class(18)
 class SetEncryptionKeysMessage(RequestPacket):
     request_id: Id
     peer_id: Id
     message_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(19)
 class SetEncryptionKeysMessageSuccess(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(20)
 class SetEncryptionKeysMessageFailInvalidId(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(21)
 class SetEncryptionKeysMessageFailNoSuchClient(RequestPacket):
     request_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(22)
 class GetEncryptionKeysMessage(RequestPacket):
     request_id: Id
     keys_owner_id: Id
     peer_id: Id
 
 
-@dataclass(frozen=True)
+@packet_class(23)
 class GetEncryptionKeysMessageSuccess(RequestPacket):
     request_id: Id
     message_id: Optional[Id]
 
 
-@dataclass(frozen=True)
+@packet_class(24)
 class GetEncryptionKeysMessageFailNoSuchClient(RequestPacket):
     request_id: Id
+
+
+@packet_class(27)
+class CreateGroup(RequestPacket):
+    request_id: Id
+    members: list[Id]
+
+
+@packet_class(28)
+class CreateGroupSuccess(RequestPacket):
+    request_id: Id
+    group_id: Id
+
+
+@packet_class(29)
+class CreateGroupFailNoSuchClient(RequestPacket):
+    request_id: Id
+
+
+@packet_class(30)
+class GetGroups(RequestPacket):
+    request_id: Id
+
+
+@packet_class(31)
+class GetGroupsSuccess(RequestPacket):
+    request_id: Id
+    groups: list[Id]
+
+
+@packet_class(32)
+class GetGroupMembers(RequestPacket):
+    request_id: Id
+    group_id: Id
+
+
+@packet_class(33)
+class GetGroupMembersSuccess(RequestPacket):
+    request_id: Id
+    members: list[Id]
+
+
+@packet_class(34)
+class GetGroupMembersFailNoSuchGroup(RequestPacket):
+    request_id: Id
+
+
+@packet_class(35)
+class SendGroupMessage(RequestPacket):
+    request_id: Id
+    group_id: Id
+    content: bytes
+
+
+@packet_class(36)
+class SendGroupMessageSuccess(RequestPacket):
+    request_id: Id
+
+
+@packet_class(37)
+class SendGroupMessageFailNoSuchGroup(RequestPacket):
+    request_id: Id
+
+
+@packet_class(38)
+class GetGroupMessagesCount(RequestPacket):
+    request_id: Id
+    group_id: Id
+
+
+@packet_class(39)
+class GetGroupMessagesCountSuccess(RequestPacket):
+    request_id: Id
+    messages_count: int
+
+
+@packet_class(40)
+class GetGroupMessagesCountFailNoSuchGroup(RequestPacket):
+    request_id: Id
+
+
+@packet_class(41)
+class GetGroupMessages(RequestPacket):
+    request_id: Id
+    group_id: Id
+    first_message_index: int
+    count: int
+
+
+@packet_class(42)
+class GetGroupMessagesSuccess(RequestPacket):
+    request_id: Id
+    messages: list[Message]
+
+
+@packet_class(43)
+class GetGroupMessagesFailInvalidRange(RequestPacket):
+    request_id: Id
+
+
+@packet_class(44)
+class GetGroupMessagesFailNoSuchGroup(RequestPacket):
+    request_id: Id
+
+
+@packet_class(45)
+class NewGroupMessage(Packet):
+    """
+    Новое сообщение группы, отправляется всем её участникам в сети, кроме отправителя.
+    """
+
+    group_id: Id
+    message: Message
+
+
+@packet_class(46)
+class SendMessageMulti(RequestPacket):
+    """
+    Отправка сообщений нескольким клиентам одним запросом:
+    ``contents[i]`` отправляется ``receiver_ids[i]``.
+    """
+
+    request_id: Id
+    receiver_ids: list[Id]
+    contents: list[bytes]
+
+
+@packet_class(47)
+class SendMessageMultiSuccess(RequestPacket):
+    """
+    Ответ на ``SendMessageMulti``: ``results[i]`` - отправлено ли сообщение
+    ``receiver_ids[i]`` (False - такого клиента не существует).
+    """
+
+    request_id: Id
+    results: list[bool]
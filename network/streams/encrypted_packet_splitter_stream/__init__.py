@@ -1,2 +1,16 @@
+from .crypto_executor import PRIVATE_KEY_OPERATION_COST, CryptoExecutor
 from .encrypted_packet_splitter_stream import EncryptedPacketSplitterStream
-from .key_exchange import KeyExcangeResult, accept_key_exchange, exchange_key
+from .key_exchange import (
+    KEY_EXCHANGE_MODES,
+    KeyExcangeResult,
+    accept_key_exchange,
+    exchange_key,
+)
+from .session_cipher import (
+    AeadSessionCipher,
+    CryptoTask,
+    LegacySessionCipher,
+    SessionCipher,
+)
+from .session_ticket import SessionTicket, SessionTicketIssuer
+from .signed_static_key import SignedStaticKey
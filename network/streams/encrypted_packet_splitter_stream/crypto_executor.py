@@ -0,0 +1,56 @@
+from asyncio import get_running_loop
+from concurrent.futures import Executor
+from typing import Callable, Final, Optional, TypeVar
+
+T = TypeVar("T")
+
+PRIVATE_KEY_OPERATION_COST: Final[int] = 1024 * 1024
+"""
+Примерная стоимость операции с приватным ключом RSA,
+выраженная в байтах данных симметричного шифрования с той же длительностью.
+"""
+
+
+class CryptoExecutor:
+    """
+    Выполняет дорогие криптографические операции вне потока цикла событий.
+    ``cryptography`` освобождает GIL, поэтому подходит пул потоков;
+    пул процессов тоже поддерживается - для него задачи состоят из функций
+    уровня модуля и сериализуемых pickle аргументов.
+    Операции дешевле порога выполняются на месте: передача в пул
+    стоит десятки микросекунд.
+    """
+
+    _executor: Final[Optional[Executor]]
+    _threshold: Final[Optional[int]]
+
+    def __init__(
+        self, executor: Optional[Executor] = None, threshold: Optional[int] = 64 * 1024
+    ):
+        """
+        :param executor: пул, None - пул потоков цикла событий по умолчанию
+        :param threshold: стоимость операции в байтах обрабатываемых данных,
+            начиная с которой она передаётся в пул, None - не передавать никогда
+        """
+
+        self._executor = executor
+        self._threshold = threshold
+
+    def should_offload(self, cost: int) -> bool:
+        """
+        Проверяет, следует ли выполнить операцию в пуле.
+
+        :param cost: стоимость операции в байтах обрабатываемых данных
+        """
+
+        return self._threshold is not None and cost >= self._threshold
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """
+        Выполняет функцию в пуле.
+
+        :param function: функция уровня модуля
+        :param args: аргументы функции
+        """
+
+        return await get_running_loop().run_in_executor(self._executor, function, *args)
@@ -1,94 +1,78 @@
-from typing import Final
-
-from cryptography.hazmat.primitives.ciphers import Cipher, CipherContext
-from cryptography.hazmat.primitives.ciphers.algorithms import AES
-from cryptography.hazmat.primitives.ciphers.modes import CTR
-from cryptography.hazmat.primitives.hashes import SHA256
-from cryptography.hazmat.primitives.hmac import HMAC
+from asyncio import Lock
+from typing import Final, Optional
 
 from network.streams.packet_splitter_stream import PacketSplitterStream
 
+from .crypto_executor import CryptoExecutor
+from .session_cipher import SessionCipher
+
 
 class EncryptedPacketSplitterStream(PacketSplitterStream[bytes]):
+    """
+    Поток зашифрованных пакетов.
+
+    Большие пакеты шифруются и расшифровываются в пуле ``CryptoExecutor``.
+    Nonce пакета назначается до передачи в пул, поэтому резервирование nonce,
+    шифрование и запись выполняются под блокировкой: пакеты уходят в порядке nonce.
+    """
+
     _stream: Final[PacketSplitterStream[bytes]]
-    _key: Final[bytes]
-    _our_nonce: int  # с каждым сообщением nonce этой стороны будет по модулю увеличиваться на единицу
-    _peer_nonce: int  # предпочтительные начальные значения - (1, -1)
+    _cipher: Final[SessionCipher]
+    _crypto_executor: Final[Optional[CryptoExecutor]]
+    _reader_lock: Final[Lock]
+    _writer_lock: Final[Lock]
 
     def __init__(
         self,
         stream: PacketSplitterStream[bytes],
-        key: bytes,
-        our_nonce: int,
-        peer_nonce: int,
+        cipher: SessionCipher,
+        crypto_executor: Optional[CryptoExecutor] = None,
     ):
-        self._stream = stream
-        self._key = key
-        self._our_nonce = our_nonce
-        self._peer_nonce = peer_nonce
-
-    def _create_encryptor(self) -> CipherContext:
         """
-        Возвращает шифратор исходящих сообщений
-        и увеличивает ``_our_nonce`` на единицу по модулю
+        :param stream: нижележащий поток
+        :param cipher: шифр сессии, полученный при обмене ключами
+        :param crypto_executor: пул для шифрования больших пакетов,
+            None - шифровать в потоке цикла событий
         """
 
-        cipher = Cipher(
-            AES(self._key),
-            CTR(self._our_nonce.to_bytes(16, "little", signed=True)),
-        )
-
-        if self._our_nonce > 0:
-            self._our_nonce += 1
-        else:
-            self._our_nonce -= 1
-
-        return cipher.encryptor()
-
-    def _create_decryptor(self) -> CipherContext:
-        """
-        Возвращает дешифратор входящих сообщений
-        и увеличивает ``_peer_nonce`` на единицу по модулю
-        """
-
-        cipher = Cipher(
-            AES(self._key),
-            CTR(self._peer_nonce.to_bytes(16, "little", signed=True)),
+        self._stream = stream
+        self._cipher = cipher
+        self._crypto_executor = crypto_executor
+        self._reader_lock = Lock()
+        self._writer_lock = Lock()
+
+    def _should_offload(self, data: bytes) -> bool:
+        return (
+            self._crypto_executor is not None
+            and self._crypto_executor.should_offload(len(data))
         )
 
-        if self._peer_nonce > 0:
-            self._peer_nonce += 1
-        else:
-            self._peer_nonce -= 1
-
-        return cipher.decryptor()
-
     async def write(self, data: bytes):
-        encryptor = self._create_encryptor()
-        ciphertext = encryptor.update(data) + encryptor.finalize()
-        hmac = HMAC(self._key, SHA256())
-
-        hmac.update(ciphertext)
+        async with self._writer_lock:
+            if self._should_offload(data):
+                function, args = self._cipher.encrypt_task(data)
+                data = await self._crypto_executor.run(function, *args)
+            else:
+                data = self._cipher.encrypt(data)
 
-        tag = hmac.finalize()
-
-        await self._stream.write(ciphertext + tag)
+            await self._stream.write(data)
 
     async def read(self) -> bytes:
-        packet = await self._stream.read()
-        ciphertext = packet[:-32]
-        tag = packet[-32:]
-        hmac = HMAC(self._key, SHA256())
+        async with self._reader_lock:
+            data = await self._stream.read()
 
-        hmac.update(ciphertext)
-        hmac.verify(tag)
+            if self._should_offload(data):
+                function, args = self._cipher.decrypt_task(data)
 
-        decryptor = self._create_decryptor()
+                return await self._crypto_executor.run(function, *args)
 
-        return decryptor.update(ciphertext) + decryptor.finalize()
+            return self._cipher.decrypt(data)
 
     async def close(self):
         await self._stream.close()
 
+    def abort(self):
+        self._stream.abort()
+
     def is_closed(self) -> bool:
         return self._stream.is_closed()
@@ -1,52 +1,338 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from os import urandom
+from typing import Callable, Final, Iterable, Optional
 
 from cryptography.hazmat.primitives.asymmetric.padding import MGF1, OAEP
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
 from cryptography.hazmat.primitives.hashes import SHA256
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+    load_der_private_key,
+)
+from msgpack import packb, unpackb
+
+from exceptions import ProtocolException
+from model import Id
 
 from ..packet_splitter_stream import PacketSplitterStream
+from .crypto_executor import PRIVATE_KEY_OPERATION_COST, CryptoExecutor
+from .session_cipher import (
+    AEAD_ALGORITHMS,
+    AeadSessionCipher,
+    LegacySessionCipher,
+    SessionCipher,
+)
+from .session_ticket import SessionTicket, SessionTicketIssuer
+from .signed_static_key import SignedStaticKey, verify_static_key
+
+KEY_EXCHANGE_MODES: Final[tuple[str, ...]] = ("x25519", "rsa")
+"""
+Поддерживаемые режимы обмена ключами в порядке предпочтения клиента по умолчанию:
+- ``x25519`` - эфемерный ECDH, сервер аутентифицируется статическим ключом X25519,
+  подписанным RSA один раз при запуске; на соединение сервер не выполняет операций RSA;
+- ``rsa`` - секрет клиента, зашифрованный RSA-OAEP; сервер расшифровывает его
+  приватным ключом на каждое соединение.
+"""
+
+# Клиент начинает обмен ключами одним из двух сообщений:
+# - зашифрованный RSA-OAEP сессионный ключ (старые клиенты, шифр LegacySessionCipher);
+# - приветствие ``{"ciphers": [...], "random": <32 байта>, "modes": [...], ...}``,
+#   содержащее данные предложенных режимов (``"x25519"`` - эфемерный публичный ключ,
+#   ``"key"`` - зашифрованный RSA-OAEP секрет) и, возможно, ``"ticket"`` - билет
+#   возобновления. Сервер отвечает ``{"cipher": <шифр>, "random": <32 байта>,
+#   "resumed": <bool>, "mode": <режим>}``, в режиме x25519 добавляя эфемерный ключ
+#   ``"x25519"``, статический ключ ``"static"`` и его подпись ``"signature"``.
+# Приветствие - словарь msgpack; сообщение, не являющееся им, сервер считает
+# шифротекстом RSA старого клиента, если его длина равна размеру ключа.
+# Если сервер выбрал режим rsa, а секрет не был отправлен (клиент предъявил билет,
+# но сервер его не принял), клиент вторым сообщением отправляет ``{"key": ...}``.
+# При возобновлении ни одна из сторон не выполняет операций RSA, а клиент
+# считается авторизованным под ID из билета без пакета Login.
+# Общий секрет режима x25519 - DH(e_c, e_s) || DH(e_c, s_s): первая часть даёт
+# прямую секретность, вторая доказывает владение подписанным статическим ключом.
 
 
 @dataclass(frozen=True)
 class KeyExcangeResult:
-    key: bytes
-    our_nonce: int
-    peer_nonce: int
+    cipher: SessionCipher
+    resumption_secret: Optional[bytes] = None
+    """
+    Секрет для билета возобновления этой сессии, None для старых клиентов.
+    """
+
+    client_id: Optional[Id] = None
+    """
+    ID клиента, если сессия возобновлена по билету.
+    """
+
+
+def _derive_keys(
+    secret: bytes, client_random: bytes, server_random: bytes
+) -> tuple[bytes, bytes, bytes]:
+    """
+    Получает из общего секрета ключи направлений клиент → сервер и сервер → клиент
+    и секрет возобновления сессии.
+
+    :param secret: общий секрет или секрет возобновления из билета
+    :param client_random: случайные байты клиента
+    :param server_random: случайные байты сервера
+    """
+
+    keys = HKDF(
+        SHA256(), 96, client_random + server_random, b"messenger session keys"
+    ).derive(secret)
+
+    return keys[:32], keys[32:64], keys[64:]
+
+
+def _encrypt_secret(server_key: RSAPublicKey, secret: bytes) -> bytes:
+    return server_key.encrypt(secret, OAEP(MGF1(SHA256()), SHA256(), None))
+
+
+@lru_cache(maxsize=16)
+def _private_key_bytes(server_key: RSAPrivateKey) -> bytes:
+    return server_key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption())
+
+
+@lru_cache(maxsize=16)
+def _load_private_key(data: bytes) -> RSAPrivateKey:
+    return load_der_private_key(data, None)
+
+
+def _rsa_decrypt(server_key: bytes, data: bytes) -> bytes:
+    """
+    Расшифровывает секрет в пуле ``CryptoExecutor``. Ключ передаётся
+    в сериализованном виде и загружается один раз на поток или процесс пула.
+
+    :param server_key: приватный ключ сервера в формате DER
+    :param data: зашифрованный секрет
+    """
+
+    return _load_private_key(server_key).decrypt(
+        data, OAEP(MGF1(SHA256()), SHA256(), None)
+    )
+
+
+async def _decrypt_secret(
+    server_key: RSAPrivateKey, data: bytes, crypto_executor: Optional[CryptoExecutor]
+) -> bytes:
+    if crypto_executor is not None and crypto_executor.should_offload(
+        PRIVATE_KEY_OPERATION_COST
+    ):
+        return await crypto_executor.run(
+            _rsa_decrypt, _private_key_bytes(server_key), data
+        )
+
+    return server_key.decrypt(data, OAEP(MGF1(SHA256()), SHA256(), None))
+
+
+def _public_bytes(key: X25519PrivateKey) -> bytes:
+    return key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
 
 
 async def exchange_key(
-    stream: PacketSplitterStream[bytes], server_key: RSAPublicKey
+    stream: PacketSplitterStream[bytes],
+    server_key: RSAPublicKey,
+    ciphers: Iterable[str] = AEAD_ALGORITHMS.keys(),
+    session_ticket: Optional[SessionTicket] = None,
+    modes: Iterable[str] = KEY_EXCHANGE_MODES,
 ) -> KeyExcangeResult:
     """
     Метод, вызываемый клиентом при подключении к серверу.
-    Создаёт, шифрует и отправляет серверу сессионный ключ.
+    Отправляет серверу данные предложенных режимов обмена ключами
+    (или предъявляет билет возобновления), получает выбранные сервером
+    режим и шифр сессии.
 
     :param stream: поток
     :param server_key: публичный ключ сервера
+    :param ciphers: предлагаемые шифры сессии в порядке предпочтения
+    :param session_ticket: билет возобновления предыдущей сессии
+    :param modes: предлагаемые режимы обмена ключами в порядке предпочтения
     :return: результат обмена ключами
     """
 
-    key = urandom(32)
+    ciphers = list(ciphers)
+    modes = list(modes)
+    client_random = urandom(32)
+    hello = {"ciphers": ciphers, "random": client_random, "modes": modes}
+    secret = None
+    ephemeral_key = None
+
+    if "x25519" in modes:
+        ephemeral_key = X25519PrivateKey.generate()
+        hello["x25519"] = _public_bytes(ephemeral_key)
+
+    if session_ticket is not None:
+        hello["ticket"] = session_ticket.ticket
+    elif "rsa" in modes:
+        secret = urandom(32)
+        hello["key"] = _encrypt_secret(server_key, secret)
+
+    await stream.write(packb(hello))
 
-    await stream.write(server_key.encrypt(key, OAEP(MGF1(SHA256()), SHA256(), None)))
+    try:
+        response = unpackb(await stream.read())
+        cipher = response["cipher"]
+        server_random = response["random"]
+        resumed = response["resumed"]
+        mode = response["mode"]
+    except (ValueError, KeyError, TypeError):
+        raise ProtocolException()
 
-    return KeyExcangeResult(key, 1, -1)
+    if (
+        cipher not in ciphers
+        or mode not in modes
+        or type(server_random) is not bytes
+        or (resumed and session_ticket is None)
+    ):
+        raise ProtocolException()
+
+    client_id = None
+
+    if resumed:
+        secret = session_ticket.secret
+        client_id = session_ticket.client_id
+    elif mode == "x25519":
+        try:
+            static_key = verify_static_key(
+                server_key, response["static"], response["signature"]
+            )
+            server_ephemeral_key = X25519PublicKey.from_public_bytes(response["x25519"])
+            secret = ephemeral_key.exchange(
+                server_ephemeral_key
+            ) + ephemeral_key.exchange(static_key)
+        except (ValueError, KeyError, TypeError):
+            raise ProtocolException()
+    elif secret is None:
+        secret = urandom(32)
+
+        await stream.write(packb({"key": _encrypt_secret(server_key, secret)}))
+
+    client_to_server_key, server_to_client_key, resumption_secret = _derive_keys(
+        secret, client_random, server_random
+    )
+
+    return KeyExcangeResult(
+        AeadSessionCipher(cipher, client_to_server_key, server_to_client_key),
+        resumption_secret,
+        client_id,
+    )
 
 
 async def accept_key_exchange(
-    stream: PacketSplitterStream[bytes], server_key: RSAPrivateKey
+    stream: PacketSplitterStream[bytes],
+    server_key: RSAPrivateKey,
+    ticket_issuer: Optional[SessionTicketIssuer] = None,
+    can_resume: Callable[[Id], bool] = lambda client_id: True,
+    static_key: Optional[SignedStaticKey] = None,
+    crypto_executor: Optional[CryptoExecutor] = None,
 ) -> KeyExcangeResult:
     """
     Метод, вызываемый сервером в начале обработки соединения клиента.
-    Получает и расшифровывает сгенерированный клиентом сессионный ключ.
+    Выбирает первые поддерживаемые из предложенных клиентом режим обмена ключами
+    и шифр, проверяет билет возобновления или вычисляет общий секрет.
 
     :param stream: поток
     :param server_key: приватный ключ сервера
+    :param ticket_issuer: проверяющий билеты объект, None - возобновление отключено
+    :param can_resume: может ли клиент с данным ID возобновить сессию
+    :param static_key: подписанный статический ключ X25519, None - режим x25519 отключён
+    :param crypto_executor: пул для операций с приватным ключом RSA,
+        None - выполнять их в потоке цикла событий
     :return: результат обмена ключами
     """
 
     packet = await stream.read()
-    key = server_key.decrypt(packet, OAEP(MGF1(SHA256()), SHA256(), None))
 
-    return KeyExcangeResult(key, -1, 1)
+    try:
+        hello = unpackb(packet)
+    except ValueError:
+        hello = None
+
+    if type(hello) is not dict:
+        if len(packet) != server_key.key_size // 8:
+            raise ProtocolException()
+
+        try:
+            key = await _decrypt_secret(server_key, packet, crypto_executor)
+        except ValueError:
+            raise ProtocolException()
+
+        return KeyExcangeResult(LegacySessionCipher(key, -1, 1))
+
+    server_random = urandom(32)
+    response = {"random": server_random}
+
+    try:
+        response["cipher"] = next(
+            cipher for cipher in hello["ciphers"] if cipher in AEAD_ALGORITHMS
+        )
+        response["mode"] = next(
+            mode
+            for mode in hello.get("modes", ["rsa"])
+            if mode == "rsa" or (mode == "x25519" and static_key is not None)
+        )
+        client_random = hello["random"]
+        ticket = hello.get("ticket")
+
+        if type(client_random) is not bytes or (
+            ticket is not None and type(ticket) is not bytes
+        ):
+            raise ProtocolException()
+
+        secret = None
+        client_id = None
+
+        if ticket is not None and ticket_issuer is not None:
+            opened = ticket_issuer.open(ticket)
+
+            if opened is not None and can_resume(opened[0]):
+                client_id, secret = opened
+
+        if client_id is None and response["mode"] == "x25519":
+            client_ephemeral_key = X25519PublicKey.from_public_bytes(hello["x25519"])
+            ephemeral_key = X25519PrivateKey.generate()
+            secret = ephemeral_key.exchange(
+                client_ephemeral_key
+            ) + static_key.private_key.exchange(client_ephemeral_key)
+
+            response["x25519"] = _public_bytes(ephemeral_key)
+            response["static"] = static_key.public_key
+            response["signature"] = static_key.signature
+        elif client_id is None and "key" in hello:
+            secret = await _decrypt_secret(server_key, hello["key"], crypto_executor)
+    except (ValueError, KeyError, TypeError, AttributeError, StopIteration):
+        raise ProtocolException()
+
+    response["resumed"] = client_id is not None
+
+    await stream.write(packb(response))
+
+    if secret is None:
+        try:
+            secret = await _decrypt_secret(
+                server_key, unpackb(await stream.read())["key"], crypto_executor
+            )
+        except (ValueError, KeyError, TypeError):
+            raise ProtocolException()
+
+    client_to_server_key, server_to_client_key, resumption_secret = _derive_keys(
+        secret, client_random, server_random
+    )
+
+    return KeyExcangeResult(
+        AeadSessionCipher(
+            response["cipher"], server_to_client_key, client_to_server_key
+        ),
+        resumption_secret,
+        client_id,
+    )
@@ -0,0 +1,225 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Final
+
+from cryptography.exceptions import InvalidSignature, InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.ciphers.algorithms import AES
+from cryptography.hazmat.primitives.ciphers.modes import CTR
+from cryptography.hazmat.primitives.hashes import SHA256
+from cryptography.hazmat.primitives.hmac import HMAC
+
+from exceptions import ProtocolException
+
+AEAD_ALGORITHMS: Final[dict[str, type[AESGCM] | type[ChaCha20Poly1305]]] = {
+    "aes-256-gcm": AESGCM,
+    "chacha20-poly1305": ChaCha20Poly1305,
+}
+"""
+Поддерживаемые AEAD-шифры сессии, ключ - название шифра при согласовании.
+Порядок - порядок предпочтения клиента по умолчанию: на процессорах
+с аппаратным AES шифр AES-GCM быстрее ChaCha20-Poly1305.
+"""
+
+
+def _legacy_cipher(key: bytes, nonce: int) -> Cipher:
+    return Cipher(AES(key), CTR(nonce.to_bytes(16, "little", signed=True)))
+
+
+def _legacy_encrypt(key: bytes, nonce: int, data: bytes) -> bytes:
+    encryptor = _legacy_cipher(key, nonce).encryptor()
+    ciphertext = encryptor.update(data) + encryptor.finalize()
+    hmac = HMAC(key, SHA256())
+
+    hmac.update(ciphertext)
+
+    return ciphertext + hmac.finalize()
+
+
+def _legacy_decrypt(key: bytes, nonce: int, data: bytes) -> bytes:
+    ciphertext = data[:-32]
+    tag = data[-32:]
+    hmac = HMAC(key, SHA256())
+
+    hmac.update(ciphertext)
+
+    try:
+        hmac.verify(tag)
+    except InvalidSignature:
+        raise ProtocolException()
+
+    decryptor = _legacy_cipher(key, nonce).decryptor()
+
+    return decryptor.update(ciphertext) + decryptor.finalize()
+
+
+def _aead_encrypt(algorithm: str, key: bytes, nonce: bytes, data: bytes) -> bytes:
+    return AEAD_ALGORITHMS[algorithm](key).encrypt(nonce, data, None)
+
+
+def _aead_decrypt(algorithm: str, key: bytes, nonce: bytes, data: bytes) -> bytes:
+    try:
+        return AEAD_ALGORITHMS[algorithm](key).decrypt(nonce, data, None)
+    except InvalidTag:
+        raise ProtocolException()
+
+
+CryptoTask = tuple[Callable[..., bytes], tuple[Any, ...]]
+"""
+Функция уровня модуля и её аргументы. Аргументы сериализуются pickle,
+поэтому задачу можно выполнить как в пуле потоков, так и в пуле процессов.
+"""
+
+
+class SessionCipher(ABC):
+    """
+    Шифр сессии: шифрует и аутентифицирует пакеты одного соединения.
+    """
+
+    @abstractmethod
+    def encrypt_task(self, data: bytes) -> CryptoTask:
+        """
+        Резервирует nonce исходящего пакета и возвращает задачу его шифрования.
+        Задачи должны выполняться, а их результаты отправляться
+        в порядке их создания.
+
+        :param data: пакет
+        """
+
+    @abstractmethod
+    def decrypt_task(self, data: bytes) -> CryptoTask:
+        """
+        Резервирует nonce входящего пакета и возвращает задачу его расшифровки.
+        При неверной подписи задача выбрасывает ``ProtocolException``.
+
+        :param data: зашифрованный пакет
+        """
+
+    def encrypt(self, data: bytes) -> bytes:
+        """
+        Шифрует исходящий пакет.
+
+        :param data: пакет
+        """
+
+        function, args = self.encrypt_task(data)
+
+        return function(*args)
+
+    def decrypt(self, data: bytes) -> bytes:
+        """
+        Проверяет и расшифровывает входящий пакет.
+        При неверной подписи выбрасывает ``ProtocolException``.
+
+        :param data: зашифрованный пакет
+        """
+
+        function, args = self.decrypt_task(data)
+
+        return function(*args)
+
+
+class LegacySessionCipher(SessionCipher):
+    """
+    AES-CTR + HMAC-SHA256 с общим для обоих направлений ключом.
+    Используется для клиентов, не поддерживающих согласование шифра.
+    """
+
+    _key: Final[bytes]
+    _our_nonce: int  # с каждым сообщением nonce этой стороны будет по модулю увеличиваться на единицу
+    _peer_nonce: int  # предпочтительные начальные значения - (1, -1)
+
+    def __init__(self, key: bytes, our_nonce: int, peer_nonce: int):
+        self._key = key
+        self._our_nonce = our_nonce
+        self._peer_nonce = peer_nonce
+
+    def encrypt_task(self, data: bytes) -> CryptoTask:
+        nonce = self._our_nonce
+
+        if self._our_nonce > 0:
+            self._our_nonce += 1
+        else:
+            self._our_nonce -= 1
+
+        return _legacy_encrypt, (self._key, nonce, data)
+
+    def decrypt_task(self, data: bytes) -> CryptoTask:
+        nonce = self._peer_nonce
+
+        if self._peer_nonce > 0:
+            self._peer_nonce += 1
+        else:
+            self._peer_nonce -= 1
+
+        return _legacy_decrypt, (self._key, nonce, data)
+
+
+class AeadSessionCipher(SessionCipher):
+    """
+    AEAD-шифр с отдельными ключами для каждого направления.
+    Контексты шифра создаются один раз на сессию, nonce - счётчик пакетов.
+    Шифрование и аутентификация выполняются за один проход,
+    шифротекст и тег возвращаются одним объектом ``bytes``.
+    Задачи для пула создают контекст заново: объекты шифра не сериализуются pickle.
+    """
+
+    _algorithm: Final[str]
+    _our_key: Final[bytes]
+    _peer_key: Final[bytes]
+    _encryptor: Final[AESGCM | ChaCha20Poly1305]
+    _decryptor: Final[AESGCM | ChaCha20Poly1305]
+    _our_nonce: int
+    _peer_nonce: int
+
+    def __init__(self, algorithm: str, our_key: bytes, peer_key: bytes):
+        """
+        :param algorithm: название шифра из ``AEAD_ALGORITHMS``
+        :param our_key: ключ исходящих пакетов
+        :param peer_key: ключ входящих пакетов
+        """
+
+        self._algorithm = algorithm
+        self._our_key = our_key
+        self._peer_key = peer_key
+        self._encryptor = AEAD_ALGORITHMS[algorithm](our_key)
+        self._decryptor = AEAD_ALGORITHMS[algorithm](peer_key)
+        self._our_nonce = 0
+        self._peer_nonce = 0
+
+    def _next_our_nonce(self) -> bytes:
+        nonce = self._our_nonce.to_bytes(12, "little")
+        self._our_nonce += 1
+
+        return nonce
+
+    def _next_peer_nonce(self) -> bytes:
+        nonce = self._peer_nonce.to_bytes(12, "little")
+        self._peer_nonce += 1
+
+        return nonce
+
+    def encrypt_task(self, data: bytes) -> CryptoTask:
+        return _aead_encrypt, (
+            self._algorithm,
+            self._our_key,
+            self._next_our_nonce(),
+            data,
+        )
+
+    def decrypt_task(self, data: bytes) -> CryptoTask:
+        return _aead_decrypt, (
+            self._algorithm,
+            self._peer_key,
+            self._next_peer_nonce(),
+            data,
+        )
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self._encryptor.encrypt(self._next_our_nonce(), data, None)
+
+    def decrypt(self, data: bytes) -> bytes:
+        try:
+            return self._decryptor.decrypt(self._next_peer_nonce(), data, None)
+        except InvalidTag:
+            raise ProtocolException()
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from os import urandom
+from time import time
+from typing import Final, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from msgpack import packb, unpackb
+
+from model import Id
+
+
+@dataclass(frozen=True)
+class SessionTicket:
+    """
+    Сохраняемые клиентом данные для возобновления сессии без RSA.
+    """
+
+    client_id: Id
+    ticket: bytes
+    """
+    Непрозрачный для клиента билет, зашифрованный ключом сервера.
+    """
+
+    secret: bytes
+    """
+    Секрет возобновления, известный только клиенту и серверу.
+    """
+
+
+class SessionTicketIssuer:
+    """
+    Выдаёт и проверяет билеты возобновления сессии. Билет - зашифрованные
+    AES-GCM ключом сервера ID клиента, секрет возобновления и время истечения,
+    поэтому сервер не хранит состояние выданных билетов.
+    Если ключ не передан, он создаётся при запуске, и после перезапуска
+    сервера билеты недействительны. Процессы одного сервера должны
+    использовать общий ключ, чтобы принимать билеты друг друга.
+    """
+
+    _cipher: Final[AESGCM]
+    _lifetime: Final[float]
+
+    def __init__(self, lifetime: float, key: Optional[bytes] = None):
+        """
+        :param lifetime: время действия билета в секундах
+        :param key: ключ AES-256 (``generate_key``), None - новый случайный
+        """
+
+        self._cipher = AESGCM(self.generate_key() if key is None else key)
+        self._lifetime = lifetime
+
+    @staticmethod
+    def generate_key() -> bytes:
+        """
+        Создаёт ключ для шифрования билетов.
+        """
+
+        return AESGCM.generate_key(256)
+
+    def issue(self, client_id: Id, secret: bytes) -> bytes:
+        """
+        Создаёт билет.
+
+        :param client_id: ID авторизованного клиента
+        :param secret: секрет возобновления сессии
+        """
+
+        nonce = urandom(12)
+
+        return nonce + self._cipher.encrypt(
+            nonce, packb([client_id, secret, time() + self._lifetime]), None
+        )
+
+    def open(self, ticket: bytes) -> Optional[tuple[Id, bytes]]:
+        """
+        Проверяет билет и возвращает ID клиента и секрет возобновления
+        или None, если билет подделан или истёк.
+
+        :param ticket: билет
+        """
+
+        try:
+            client_id, secret, expires_at = unpackb(
+                self._cipher.decrypt(ticket[:12], ticket[12:], None)
+            )
+        except (InvalidTag, ValueError, TypeError):
+            return None
+
+        if expires_at < time():
+            return None
+
+        return client_id, secret
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.padding import MGF1, PSS
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from cryptography.hazmat.primitives.hashes import SHA256
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+)
+
+from exceptions import ProtocolException
+
+_SIGNATURE_CONTEXT = b"messenger x25519 static key"
+_PRIVATE_KEY_SIZE = 32
+
+
+@dataclass(frozen=True)
+class SignedStaticKey:
+    """
+    Статический ключ X25519 сервера, подписанный его долгосрочным ключом RSA.
+    Подпись вычисляется один раз при создании, поэтому в режиме обмена
+    ключами X25519 сервер не выполняет операций RSA на каждое соединение.
+    """
+
+    private_key: X25519PrivateKey
+    public_key: bytes
+    signature: bytes
+
+    @staticmethod
+    def generate(server_key: RSAPrivateKey) -> "SignedStaticKey":
+        """
+        Создаёт новый статический ключ и подписывает его.
+
+        :param server_key: приватный ключ сервера
+        """
+
+        private_key = X25519PrivateKey.generate()
+        public_key = private_key.public_key().public_bytes(
+            Encoding.Raw, PublicFormat.Raw
+        )
+
+        return SignedStaticKey(
+            private_key,
+            public_key,
+            server_key.sign(
+                _SIGNATURE_CONTEXT + public_key,
+                PSS(MGF1(SHA256()), PSS.MAX_LENGTH),
+                SHA256(),
+            ),
+        )
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "SignedStaticKey":
+        """
+        Восстанавливает ключ, сериализованный ``to_bytes``.
+
+        :param data: приватный ключ X25519 и подпись
+        """
+
+        private_key = X25519PrivateKey.from_private_bytes(data[:_PRIVATE_KEY_SIZE])
+
+        return SignedStaticKey(
+            private_key,
+            private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw),
+            data[_PRIVATE_KEY_SIZE:],
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Сериализует приватный ключ и подпись, например для передачи
+        в другой процесс того же сервера.
+        """
+
+        return (
+            self.private_key.private_bytes(
+                Encoding.Raw, PrivateFormat.Raw, NoEncryption()
+            )
+            + self.signature
+        )
+
+
+def verify_static_key(
+    server_key: RSAPublicKey, public_key: bytes, signature: bytes
+) -> X25519PublicKey:
+    """
+    Проверяет подпись статического ключа сервера и возвращает его.
+    При неверной подписи выбрасывает ``ProtocolException``.
+
+    :param server_key: публичный ключ сервера
+    :param public_key: статический ключ X25519 сервера
+    :param signature: подпись статического ключа
+    """
+
+    try:
+        server_key.verify(
+            signature,
+            _SIGNATURE_CONTEXT + public_key,
+            PSS(MGF1(SHA256()), PSS.MAX_LENGTH),
+            SHA256(),
+        )
+
+        return X25519PublicKey.from_public_bytes(public_key)
+    except (InvalidSignature, ValueError, TypeError):
+        raise ProtocolException()
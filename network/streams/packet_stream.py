@@ -1,105 +1,251 @@
-from asyncio import Event, create_task
+from asyncio import Future, create_task, gather, get_running_loop, wait_for
 from asyncio.queues import Queue
-from typing import Awaitable, Callable, Final, Optional
+from collections import OrderedDict
+from contextlib import suppress
+from itertools import count
+from typing import Awaitable, Callable, Final, Iterable, Iterator, Optional, Type
 
 from msgpack import unpackb
 
+from exceptions import ProtocolException
 from model import Id
-from network import Packet
+from network import Packet, WireFormat
 
 from ..packet import PacketType, RequestPacket
 from .packet_splitter_stream import PacketSplitterStream
+from .push_dispatcher import PushDispatcher
 from .stream import Stream, StreamClosedException
 
+_MAX_ABANDONED_REQUESTS: Final[int] = 1024
+"""
+Сколько последних прерванных запросов помнит ``PacketStream``. Ответ
+на более старый запрос, если всё же придёт, попадёт в очередь ``read``.
+"""
+
 
 class PacketStream(Stream):
     _stream: Final[PacketSplitterStream[bytes]]
-    _packets: Final[Queue[dict | None]]
-    _request_callbacks: Final[dict[Id, Callable[[dict], Awaitable]]]
+    _packets: Final[Queue[Packet | None]]
+    _pending_requests: Final[dict[Id, Future[RequestPacket]]]
+    """
+    Ожидающие ответа запросы, ключ - ID запроса.
+    """
+
+    _abandoned_requests: Final[OrderedDict[Id, None]]
+    """
+    ID запросов, ожидание ответа на которые прервано, в порядке прерывания;
+    запоздавшие ответы на них отбрасываются. Хранится не больше
+    ``_MAX_ABANDONED_REQUESTS`` последних ID, иначе запросы, на которые
+    ответ так и не пришёл, накапливались бы до закрытия соединения.
+    """
+
+    _request_ids: Final[Iterator[Id]]
+    _push_dispatcher: Final[Optional[PushDispatcher]]
+    _wire_format: Optional[WireFormat]
 
     incoming_packet_callbacks: Final[
-        dict[PacketType, Callable[[PacketType], Awaitable]]
+        dict[Type[PacketType], Callable[[PacketType], Awaitable]]
     ]
+    """
+    Обработчики входящих пакетов, не являющихся ответами на запросы.
+    Ключ - тип пакета, по нему обработчик находится за O(1).
+    """
+
+    def __init__(
+        self,
+        stream: PacketSplitterStream[bytes],
+        wire_format: Optional[WireFormat] = WireFormat.V1,
+        max_queued_packets: int = 0,
+        push_dispatcher: Optional[PushDispatcher] = None,
+    ):
+        """
+        :param stream: нижележащий поток
+        :param wire_format: формат исходящих пакетов; если None, то будет
+            использоваться формат первого полученного пакета
+        :param max_queued_packets: максимальное количество полученных, но ещё
+            не прочитанных пакетов (0 - без ограничения); при достижении предела
+            чтение из нижележащего потока приостанавливается
+        :param push_dispatcher: очередь вызова ``incoming_packet_callbacks``;
+            если None, то обработчики вызываются в цикле чтения
+        """
 
-    def __init__(self, stream: PacketSplitterStream[bytes]):
         self._stream = stream
-        self._packets = Queue()
-        self._request_callbacks = {}
+        self._packets = Queue(max_queued_packets)
+        self._pending_requests = {}
+        self._abandoned_requests = OrderedDict()
+        self._request_ids = count(1)
+        self._push_dispatcher = push_dispatcher
+        self._wire_format = wire_format
 
         self.incoming_packet_callbacks = {}
 
         create_task(self._read_packets())
 
-    def register_request_callback(
-        self, request_id: Id, callback: Callable[[dict], Awaitable]
-    ):
+    def next_request_id(self) -> Id:
         """
-        Регистрирует одноразовый callback для запроса с заданным ID.
-
-        :param request_id: ID запроса
-        :param callback: функция, вызываемая при получении ответа на запрос
-        :return:
+        Возвращает ID для нового запроса. ID уникальны в пределах соединения.
         """
 
-        self._request_callbacks[request_id] = callback
+        return next(self._request_ids)
+
+    def _expect_response(self, request_id: Id) -> Future[RequestPacket]:
+        if self._stream.is_closed():
+            raise StreamClosedException()
+
+        future = get_running_loop().create_future()
+        self._pending_requests[request_id] = future
+
+        return future
+
+    async def _wait_response(
+        self, request_id: Id, future: Future[RequestPacket], timeout: Optional[float]
+    ) -> RequestPacket:
+        try:
+            return await wait_for(future, timeout)
+        finally:
+            if self._pending_requests.pop(request_id, None) is not None:
+                self._abandoned_requests[request_id] = None
 
-    async def make_request(self, packet: RequestPacket) -> dict:
+                if len(self._abandoned_requests) > _MAX_ABANDONED_REQUESTS:
+                    self._abandoned_requests.popitem(last=False)
+
+    async def make_request(
+        self, packet: RequestPacket, timeout: Optional[float] = None
+    ) -> RequestPacket:
         """
         Отправляет запрос и ожидает получения его результата.
+        По истечении времени ожидания выбрасывает ``asyncio.TimeoutError``,
+        при закрытии потока - ``StreamClosedException``.
 
         :param packet: пакет
+        :param timeout: время ожидания ответа в секундах, None - без ограничения
         """
 
-        response: Optional[dict] = None
-        response_received_event = Event()
+        future = self._expect_response(packet.request_id)
+
+        try:
+            await self.write(packet)
+        except BaseException:
+            self._pending_requests.pop(packet.request_id, None)
+            raise
+
+        return await self._wait_response(packet.request_id, future, timeout)
 
-        async def callback(raw_response: dict):
-            nonlocal response
+    async def make_requests(
+        self, packets: Iterable[RequestPacket], timeout: Optional[float] = None
+    ) -> list[RequestPacket]:
+        """
+        Отправляет несколько запросов, не дожидаясь ответов на предыдущие,
+        и возвращает ответы в порядке запросов. Запросы уходят одной серией
+        пакетов, поэтому задержка сети учитывается один раз, а не для каждого запроса.
+
+        :param packets: пакеты
+        :param timeout: время ожидания каждого ответа в секундах, None - без ограничения
+        """
 
-            response = raw_response
-            response_received_event.set()
+        futures = []
 
-        self.register_request_callback(packet.request_id, callback)
+        try:
+            for packet in packets:
+                futures.append(
+                    (packet.request_id, self._expect_response(packet.request_id))
+                )
 
-        await self.write(packet)
+                await self.write(packet)
+        except BaseException:
+            for request_id, _ in futures:
+                self._pending_requests.pop(request_id, None)
 
-        await response_received_event.wait()
-        return response
+            raise
+
+        return await gather(
+            *(
+                self._wait_response(request_id, future, timeout)
+                for request_id, future in futures
+            )
+        )
+
+    def _fail_pending_requests(self):
+        for future in self._pending_requests.values():
+            if not future.done():
+                future.set_exception(StreamClosedException())
+
+        self._pending_requests.clear()
 
     async def _read_packets(self):
         while True:
             try:
                 packet_bytes = await self._stream.read()
-                raw_packet = unpackb(packet_bytes)
 
-                if (
-                    "request_id" in raw_packet
-                    and raw_packet["request_id"] in self._request_callbacks
-                ):
-                    await self._request_callbacks[raw_packet["request_id"]](raw_packet)
-                    del self._request_callbacks[raw_packet["request_id"]]
+                try:
+                    raw_packet = unpackb(packet_bytes, strict_map_key=False)
+                except ValueError:
+                    raise ProtocolException()
+
+                if self._wire_format is None:
+                    self._wire_format = (
+                        WireFormat.V2 if type(raw_packet) is list else WireFormat.V1
+                    )
 
-                    continue
+                packet = Packet.deserialize(raw_packet)
 
-                for packet_type, callback in self.incoming_packet_callbacks.items():
+                if isinstance(packet, RequestPacket):
                     if (
-                        packet := Packet.try_deserialize(raw_packet, packet_type)
+                        future := self._pending_requests.pop(packet.request_id, None)
                     ) is not None:
-                        await callback(packet)
+                        if not future.done():
+                            future.set_result(packet)
 
-                        break
+                        continue
+
+                    if packet.request_id in self._abandoned_requests:
+                        del self._abandoned_requests[packet.request_id]
+
+                        continue
+
+                if (
+                    callback := self.incoming_packet_callbacks.get(type(packet))
+                ) is None:
+                    await self._packets.put(packet)
+                elif self._push_dispatcher is None:
+                    await callback(packet)
                 else:
-                    await self._packets.put(raw_packet)
+                    await self._push_dispatcher.dispatch(callback, packet)
+            except ProtocolException:
+                with suppress(StreamClosedException):
+                    await self._stream.close()
+
+                self._fail_pending_requests()
+                await self._packets.put(None)
+                break
             except StreamClosedException:
+                self._fail_pending_requests()
                 await self._packets.put(None)
                 break
 
+    @property
+    def wire_format(self) -> WireFormat:
+        """
+        Формат исходящих пакетов.
+        """
+
+        return self._wire_format or WireFormat.V1
+
     async def write(self, packet: Packet):
-        packet_bytes = packet.serialize()
+        packet_bytes = packet.serialize(self.wire_format)
 
         await self._stream.write(packet_bytes)
 
-    async def read(self) -> dict:
+    async def write_serialized(self, packet_bytes: bytes):
+        """
+        Отправляет пакет, уже сериализованный в формате ``wire_format``.
+
+        :param packet_bytes: сериализованный пакет
+        """
+
+        await self._stream.write(packet_bytes)
+
+    async def read(self) -> Packet:
         if self._packets.empty() and self._stream.is_closed():
             raise StreamClosedException()
 
@@ -110,8 +256,18 @@ class PacketStream(Stream):
 
         return packet
 
+    def queued_packets(self) -> int:
+        """
+        Возвращает количество полученных, но ещё не прочитанных пакетов.
+        """
+
+        return self._packets.qsize()
+
     async def close(self):
         await self._stream.close()
 
+    def abort(self):
+        self._stream.abort()
+
     def is_closed(self) -> bool:
         return self._stream.is_closed()
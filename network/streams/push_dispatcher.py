@@ -0,0 +1,146 @@
+from asyncio import Queue, QueueEmpty, Task, create_task, get_running_loop
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Awaitable, Callable, Final
+
+from ..packet import Packet
+
+
+@dataclass
+class PushDispatcherMetrics:
+    """
+    Счётчики обработчиков входящих пакетов.
+    """
+
+    handled: int = 0
+    """
+    Количество завершившихся обработчиков.
+    """
+
+    failed: int = 0
+    """
+    Количество обработчиков, завершившихся исключением.
+    """
+
+    total_handler_time: float = 0.0
+    """
+    Суммарное время выполнения обработчиков в секундах.
+    """
+
+    max_handler_time: float = 0.0
+    """
+    Наибольшее время выполнения одного обработчика в секундах.
+    """
+
+    max_backlog: int = 0
+    """
+    Наибольшее наблюдавшееся количество ожидающих обработки пакетов.
+    """
+
+
+class PushDispatcher:
+    """
+    Ограниченная очередь входящих пакетов, не являющихся ответами на запросы,
+    и задачи, вызывающие для них обработчики. Цикл чтения ``PacketStream``
+    только ставит пакет в очередь, поэтому медленный обработчик не задерживает
+    ответы на запросы, пока очередь не заполнена.
+
+    При ``concurrency == 1`` обработчики вызываются по одному в порядке
+    получения пакетов, иначе - до ``concurrency`` одновременно.
+    """
+
+    _queue: Final[Queue[tuple[Callable[[Packet], Awaitable], Packet]]]
+    _concurrency: Final[int]
+    _workers: Final[list[Task]]
+
+    metrics: Final[PushDispatcherMetrics]
+
+    def __init__(self, max_backlog: int = 1024, concurrency: int = 1):
+        """
+        :param max_backlog: максимальное количество ожидающих обработки пакетов
+            (0 - без ограничения); при заполнении очереди чтение из соединения
+            приостанавливается
+        :param concurrency: количество одновременно выполняемых обработчиков
+        """
+
+        self._queue = Queue(max_backlog)
+        self._concurrency = concurrency
+        self._workers = []
+
+        self.metrics = PushDispatcherMetrics()
+
+    async def dispatch(self, handler: Callable[[Packet], Awaitable], packet: Packet):
+        """
+        Ставит пакет в очередь обработки.
+
+        :param handler: обработчик пакета
+        :param packet: пакет
+        """
+
+        if len(self._workers) == 0:
+            self._workers.extend(
+                create_task(self._work()) for _ in range(self._concurrency)
+            )
+
+        await self._queue.put((handler, packet))
+
+        self.metrics.max_backlog = max(self.metrics.max_backlog, self._queue.qsize())
+
+    def backlog(self) -> int:
+        """
+        Возвращает количество ожидающих обработки пакетов.
+        """
+
+        return self._queue.qsize()
+
+    async def join(self):
+        """
+        Ожидает обработки всех поставленных в очередь пакетов.
+        """
+
+        await self._queue.join()
+
+    def close(self):
+        """
+        Останавливает обработку; необработанные пакеты отбрасываются.
+        """
+
+        for worker in self._workers:
+            worker.cancel()
+
+        self._workers.clear()
+
+        while True:
+            try:
+                self._queue.get_nowait()
+            except QueueEmpty:
+                break
+
+            self._queue.task_done()
+
+    async def _work(self):
+        while True:
+            handler, packet = await self._queue.get()
+            start = perf_counter()
+
+            try:
+                await handler(packet)
+            except Exception as exception:
+                self.metrics.failed += 1
+
+                get_running_loop().call_exception_handler(
+                    {
+                        "message": "Ошибка в обработчике входящего пакета",
+                        "exception": exception,
+                    }
+                )
+            finally:
+                handler_time = perf_counter() - start
+
+                self.metrics.handled += 1
+                self.metrics.total_handler_time += handler_time
+                self.metrics.max_handler_time = max(
+                    self.metrics.max_handler_time, handler_time
+                )
+
+                self._queue.task_done()
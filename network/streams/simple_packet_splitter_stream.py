@@ -1,33 +1,94 @@
-from asyncio import Lock, StreamReader, StreamWriter
-from typing import Final
+from asyncio import Handle, Lock, StreamReader, StreamWriter, get_running_loop
+from typing import Final, Optional
 
 from .packet_splitter_stream import PacketSplitterStream
 from .stream import StreamClosedException
 
 
 class SimplePacketSplitterStream(PacketSplitterStream[bytes]):
+    """
+    Поток пакетов, разделяемых префиксом длины.
+
+    Записываемые пакеты не отправляются сразу, а накапливаются до конца
+    текущей итерации цикла событий и передаются транспорту одним ``writelines``,
+    поэтому серия пакетов, записанных подряд, уходит одним системным вызовом.
+    ``drain`` вызывается только при превышении буфером транспорта ``high_water_mark``.
+    """
+
     _reader_lock: Final[Lock]
-    _writer_lock: Final[Lock]
     _reader: Final[StreamReader]
     _writer: Final[StreamWriter]
+    _high_water_mark: Final[int]
+    _pending: list[bytes]
+    _pending_size: int
+    _flush_handle: Optional[Handle]
     _closed: bool
 
-    def __init__(self, reader: StreamReader, writer: StreamWriter):
+    def __init__(
+        self,
+        reader: StreamReader,
+        writer: StreamWriter,
+        high_water_mark: int = 64 * 1024,
+    ):
+        """
+        :param reader: читающий поток
+        :param writer: записывающий поток
+        :param high_water_mark: размер буфера записи в байтах,
+            при превышении которого запись ожидает его опустошения
+        """
+
         self._reader_lock = Lock()
-        self._writer_lock = Lock()
         self._reader = reader
         self._writer = writer
+        self._high_water_mark = high_water_mark
+        self._pending = []
+        self._pending_size = 0
+        self._flush_handle = None
         self._closed = False
 
+    def _write_pending(self):
+        """
+        Передаёт транспорту все накопленные пакеты.
+        """
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if len(self._pending) != 0 and not self._closed:
+            self._writer.writelines(self._pending)
+
+        self._pending = []
+        self._pending_size = 0
+
     async def write(self, data: bytes):
         if self._closed:
             raise StreamClosedException()
 
-        async with self._writer_lock:
-            self._writer.write(len(data).to_bytes(4, "little", signed=False))
-            self._writer.write(data)
+        self._pending.append(len(data).to_bytes(4, "little", signed=False))
+        self._pending.append(data)
+        self._pending_size += 4 + len(data)
+
+        if self._flush_handle is None:
+            self._flush_handle = get_running_loop().call_soon(self._write_pending)
 
-            await self._writer.drain()
+        if (
+            self._pending_size + self._writer.transport.get_write_buffer_size()
+            > self._high_water_mark
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """
+        Отправляет накопленные пакеты и ожидает опустошения буфера записи.
+        """
+
+        if self._closed:
+            raise StreamClosedException()
+
+        self._write_pending()
+
+        await self._writer.drain()
 
     async def read(self) -> bytes:
         if self._closed:
@@ -49,9 +110,20 @@ class SimplePacketSplitterStream(PacketSplitterStream[bytes]):
         if self._closed:
             raise StreamClosedException()
 
+        self._write_pending()
+
         self._closed = True
         self._writer.close()
         await self._writer.wait_closed()
 
+    def abort(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self._pending = []
+        self._pending_size = 0
+        self._writer.transport.abort()
+
     def is_closed(self) -> bool:
         return self._closed
@@ -14,6 +14,12 @@ class Stream(ABC):
         Закрывает нижележащий поток.
         """
 
+    @abstractmethod
+    def abort(self):
+        """
+        Немедленно закрывает нижележащий поток, не дожидаясь отправки буферизованных данных.
+        """
+
     @abstractmethod
     def is_closed(self) -> bool:
         """
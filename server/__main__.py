@@ -1,3 +1,4 @@
+from argparse import ArgumentParser
 from asyncio import run
 from base64 import b64encode
 from contextlib import suppress
@@ -6,22 +7,117 @@ from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
 
 from load_key import load_key
 
-from .database import MemoryDatabase
+from .cluster import run_cluster, run_threads
+from .database import (
+    Database,
+    LogDatabase,
+    MemoryDatabase,
+    PersistentMemoryDatabase,
+    ShardedDatabase,
+    SqliteDatabase,
+    TieredDatabase,
+)
 from .server import Server
 
+HOST = "127.0.0.1"
+PORT = 8315
 
-async def main():
-    key = load_key("/home/trickybestia/server.pem")
 
-    print(
-        f"Публичный ключ сервера: {b64encode(key.public_key().public_bytes(Encoding.DER, PublicFormat.PKCS1)).decode('ascii')}"
-    )
-
-    database = MemoryDatabase()
+async def main(key, database: Database):
     server = Server(database, key)
 
-    await server.handle_connections("127.0.0.1", 8315)
+    await server.handle_connections(HOST, PORT)
+
+
+parser = ArgumentParser()
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="количество рабочих процессов, принимающих подключения на одном порту",
+)
+parser.add_argument(
+    "--threads",
+    type=int,
+    default=1,
+    help="количество потоков с отдельными циклами событий при одном рабочем процессе",
+)
+database_arguments = parser.add_mutually_exclusive_group()
+database_arguments.add_argument(
+    "--database",
+    help="путь к файлу базы данных SQLite, по умолчанию данные хранятся в памяти",
+)
+database_arguments.add_argument(
+    "--log-database",
+    help="путь к каталогу журнала базы данных LogDatabase",
+)
+database_arguments.add_argument(
+    "--memory-database",
+    help="путь к каталогу снимков и журнала PersistentMemoryDatabase",
+)
+database_arguments.add_argument(
+    "--tiered-database",
+    help="путь к файлу старых сообщений TieredDatabase, остальные данные"
+    " хранятся в памяти",
+)
+database_arguments.add_argument(
+    "--shards",
+    type=int,
+    help="количество процессов-шардов каналов ShardedDatabase,"
+    " данные хранятся в памяти",
+)
+arguments = parser.parse_args()
 
+if arguments.workers > 1 and (
+    arguments.log_database is not None
+    or arguments.memory_database is not None
+    or arguments.tiered_database is not None
+    or arguments.shards is not None
+):
+    parser.error(
+        "--log-database, --memory-database, --tiered-database и --shards"
+        " несовместимы с --workers"
+    )
+
+key = load_key("/home/trickybestia/server.pem")
+
+print(
+    f"Публичный ключ сервера: {b64encode(key.public_key().public_bytes(Encoding.DER, PublicFormat.PKCS1)).decode('ascii')}"
+)
 
 with suppress(KeyboardInterrupt):
-    run(main())
+    if arguments.workers > 1:
+        run_cluster(
+            arguments.workers, key, HOST, PORT, database_path=arguments.database
+        )
+    else:
+        if arguments.log_database is not None:
+            database = LogDatabase(arguments.log_database)
+        elif arguments.memory_database is not None:
+            database = PersistentMemoryDatabase(arguments.memory_database)
+        elif arguments.tiered_database is not None:
+            database = TieredDatabase(arguments.tiered_database)
+        elif arguments.shards is not None:
+            database = ShardedDatabase(arguments.shards)
+        elif arguments.database is not None:
+            database = SqliteDatabase(arguments.database)
+        else:
+            database = MemoryDatabase()
+
+        try:
+            if arguments.threads > 1:
+                run_threads(arguments.threads, key, HOST, PORT, database=database)
+            else:
+                run(main(key, database))
+        finally:
+            if isinstance(
+                database,
+                (
+                    SqliteDatabase,
+                    LogDatabase,
+                    PersistentMemoryDatabase,
+                    TieredDatabase,
+                    ShardedDatabase,
+                ),
+            ):
+                database.close()
@@ -0,0 +1,5 @@
+from .cluster import run_cluster
+from .router import MessageRouter
+from .router_client import RouterClient
+from .shared_database import DatabaseManager
+from .threads import run_threads
@@ -0,0 +1,125 @@
+from asyncio import gather, run
+from multiprocessing import Process
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Final, Optional
+
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    load_der_private_key,
+)
+
+from network.streams.encrypted_packet_splitter_stream import (
+    SessionTicketIssuer,
+    SignedStaticKey,
+)
+
+from ..database import Database
+from ..server import Server
+from ..server_config import ServerConfig
+from .router import MessageRouter
+from .router_client import RouterClient
+from .shared_database import DatabaseManager
+
+ROUTER_SOCKET_NAME: Final[str] = "router.sock"
+
+
+def _run_router(socket_path: str):
+    run(MessageRouter().serve(socket_path))
+
+
+def _run_worker(
+    worker_id: int,
+    database: Database,
+    key: bytes,
+    ticket_key: bytes,
+    static_key: bytes,
+    config: ServerConfig,
+    socket_path: str,
+    host: str,
+    port: int,
+):
+    async def main():
+        router = await RouterClient.connect(socket_path, worker_id)
+        server = Server(
+            database,
+            load_der_private_key(key, None),
+            config,
+            router=router,
+            ticket_key=ticket_key,
+            static_key=SignedStaticKey.from_bytes(static_key),
+        )
+
+        await gather(router.run(), server.handle_connections(host, port, True))
+
+    run(main())
+
+
+def run_cluster(
+    workers: int,
+    key: RSAPrivateKey,
+    host: str,
+    port: int,
+    config: ServerConfig = ServerConfig(),
+    database_path: Optional[str] = None,
+):
+    """
+    Запускает сервер в нескольких процессах, принимающих подключения
+    на одном порту (SO_REUSEPORT). Процессы используют общую базу данных
+    в процессе ``DatabaseManager`` и пересылают сообщения клиентам других
+    процессов через ``MessageRouter``. Возвращает управление после завершения
+    всех процессов.
+
+    Ключ билетов возобновления сессии и статический ключ X25519 создаются
+    один раз и общие для всех процессов, поэтому клиент может возобновить
+    сессию, подключившись к любому из них.
+
+    :param workers: количество рабочих процессов
+    :param key: приватный ключ сервера
+    :param host: имя хоста
+    :param port: порт
+    :param config: настройки сервера
+    :param database_path: путь к файлу ``SqliteDatabase``,
+        None - ``MemoryDatabase``
+    """
+
+    key_bytes = key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption())
+    ticket_key = SessionTicketIssuer.generate_key()
+    static_key = SignedStaticKey.generate(key).to_bytes()
+
+    with TemporaryDirectory() as directory, DatabaseManager() as manager:
+        socket_path = path.join(directory, ROUTER_SOCKET_NAME)
+        database = manager.Database(database_path)
+        processes = [Process(target=_run_router, args=(socket_path,), daemon=True)]
+
+        for worker_id in range(workers):
+            processes.append(
+                Process(
+                    target=_run_worker,
+                    args=(
+                        worker_id,
+                        database,
+                        key_bytes,
+                        ticket_key,
+                        static_key,
+                        config,
+                        socket_path,
+                        host,
+                        port,
+                    ),
+                    daemon=True,
+                )
+            )
+
+        for process in processes:
+            process.start()
+
+        try:
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                process.terminate()
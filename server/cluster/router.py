@@ -0,0 +1,132 @@
+from asyncio import StreamReader, StreamWriter, start_unix_server
+from contextlib import suppress
+from typing import Final
+
+from msgpack import packb, unpackb
+
+from exceptions import ProtocolException
+from model import Id
+from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
+from network.streams.stream import StreamClosedException
+
+# Сообщения между рабочими процессами и маршрутизатором - массивы msgpack:
+# рабочий процесс → маршрутизатор:
+# - ``["hello", worker_id]`` - первое сообщение соединения;
+# - ``["claim", request_id, client_id]`` - занять ID подключившегося клиента,
+#   если он не подключён к другому рабочему процессу;
+# - ``["offline", client_id]`` - клиент отключился, освободить его ID;
+# - ``["deliver", receiver_id, packet]`` - доставить клиенту, подключённому
+#   к другому рабочему процессу, уведомление ``packet`` (``NewMessage``
+#   или ``NewGroupMessage``, сериализованный в формате V2).
+# маршрутизатор → рабочий процесс:
+# - ``["directory", {client_id: worker_id}]`` - ответ на hello, текущий справочник;
+# - ``["claimed", request_id, success]`` - ответ на claim;
+# - ``["online", client_id, worker_id]`` / ``["offline", client_id, worker_id]``;
+# - ``["deliver", receiver_id, packet]``.
+
+
+class MessageRouter:
+    """
+    Маршрутизатор сообщений между рабочими процессами сервера.
+    Хранит справочник подключённых клиентов (ID клиента → ID рабочего процесса),
+    рассылает его изменения всем рабочим процессам и пересылает сообщения
+    процессу, к которому подключён получатель. Справочник изменяется только
+    здесь, поэтому из одновременных входов с одним ID на разных рабочих
+    процессах ``claim`` удаётся только одному.
+    """
+
+    _workers: Final[dict[int, SimplePacketSplitterStream]]
+    _directory: Final[dict[Id, int]]
+
+    def __init__(self):
+        self._workers = {}
+        self._directory = {}
+
+    async def serve(self, path: str):
+        """
+        Принимает подключения рабочих процессов на Unix-сокете.
+
+        :param path: путь к сокету
+        """
+
+        server = await start_unix_server(self._handle_worker, path)
+
+        await server.serve_forever()
+
+    async def _broadcast(self, data: bytes, except_worker_id: int):
+        for worker_id, stream in list(self._workers.items()):
+            if worker_id != except_worker_id:
+                with suppress(StreamClosedException):
+                    await stream.write(data)
+
+    async def _handle_worker(self, reader: StreamReader, writer: StreamWriter):
+        stream = SimplePacketSplitterStream(reader, writer)
+        worker_id = None
+
+        with suppress(StreamClosedException, ProtocolException):
+            try:
+                kind, worker_id = unpackb(await stream.read())
+            except (ValueError, TypeError):
+                raise ProtocolException()
+
+            if kind != "hello":
+                raise ProtocolException()
+
+            self._workers[worker_id] = stream
+
+            await stream.write(packb(["directory", self._directory]))
+
+            while True:
+                data = await stream.read()
+
+                try:
+                    message = unpackb(data)
+                    kind = message[0]
+                except (ValueError, TypeError, IndexError):
+                    raise ProtocolException()
+
+                if kind == "claim":
+                    _, request_id, client_id = message
+                    claimed = client_id not in self._directory
+
+                    if claimed:
+                        self._directory[client_id] = worker_id
+
+                    await stream.write(packb(["claimed", request_id, claimed]))
+
+                    if claimed:
+                        await self._broadcast(
+                            packb(["online", client_id, worker_id]), worker_id
+                        )
+                elif kind == "offline":
+                    if self._directory.get(message[1]) == worker_id:
+                        del self._directory[message[1]]
+
+                    await self._broadcast(packb([*message, worker_id]), worker_id)
+                elif kind == "deliver":
+                    receiver_worker_id = self._directory.get(message[1])
+
+                    if (
+                        receiver_stream := self._workers.get(receiver_worker_id)
+                    ) is not None:
+                        with suppress(StreamClosedException):
+                            await receiver_stream.write(data)
+                else:
+                    raise ProtocolException()
+
+        if worker_id is not None and self._workers.get(worker_id) is stream:
+            del self._workers[worker_id]
+
+            for client_id in [
+                client_id
+                for client_id, client_worker_id in self._directory.items()
+                if client_worker_id == worker_id
+            ]:
+                del self._directory[client_id]
+
+                await self._broadcast(
+                    packb(["offline", client_id, worker_id]), worker_id
+                )
+
+        if not stream.is_closed():
+            await stream.close()
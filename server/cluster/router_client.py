@@ -0,0 +1,175 @@
+from asyncio import Future, get_running_loop, open_unix_connection, sleep
+from itertools import count
+from typing import Awaitable, Callable, Final, Iterator, Optional
+
+from msgpack import packb, unpackb
+
+from exceptions import ProtocolException
+from model import Id
+from network import Packet, WireFormat
+from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
+from network.streams.stream import StreamClosedException
+
+
+class RouterClient:
+    """
+    Подключение рабочего процесса к ``MessageRouter``.
+    Хранит копию справочника клиентов, подключённых к другим рабочим процессам.
+    """
+
+    _stream: Final[SimplePacketSplitterStream]
+    _worker_id: Final[int]
+    _directory: Final[dict[Id, int]]
+    _claims: Final[dict[int, Future[bool]]]
+    """
+    Ожидающие ответа маршрутизатора запросы ``claim``, ключ - ID запроса.
+    """
+
+    _claim_ids: Final[Iterator[int]]
+
+    on_message: Optional[Callable[[Id, Packet], Awaitable]]
+    """
+    Вызывается для уведомления, пересланного клиенту этого рабочего процесса.
+    """
+
+    def __init__(
+        self,
+        stream: SimplePacketSplitterStream,
+        worker_id: int,
+        directory: dict[Id, int],
+    ):
+        self._stream = stream
+        self._worker_id = worker_id
+        self._directory = directory
+        self._claims = {}
+        self._claim_ids = count()
+
+        self.on_message = None
+
+    @staticmethod
+    async def connect(
+        path: str, worker_id: int, retry_interval: float = 0.1
+    ) -> "RouterClient":
+        """
+        Подключается к маршрутизатору, дожидаясь его запуска.
+
+        :param path: путь к Unix-сокету маршрутизатора
+        :param worker_id: ID рабочего процесса
+        :param retry_interval: период повторных попыток подключения в секундах
+        """
+
+        while True:
+            try:
+                reader, writer = await open_unix_connection(path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await sleep(retry_interval)
+            else:
+                break
+
+        stream = SimplePacketSplitterStream(reader, writer)
+
+        await stream.write(packb(["hello", worker_id]))
+
+        try:
+            kind, directory = unpackb(await stream.read(), strict_map_key=False)
+        except (ValueError, TypeError):
+            raise ProtocolException()
+
+        if kind != "directory":
+            raise ProtocolException()
+
+        return RouterClient(stream, worker_id, directory)
+
+    def is_online(self, client_id: Id) -> bool:
+        """
+        Проверяет, подключён ли клиент к другому рабочему процессу.
+
+        :param client_id: ID клиента
+        """
+
+        return client_id in self._directory
+
+    async def claim(self, client_id: Id) -> bool:
+        """
+        Занимает ID подключившегося клиента и сообщает о подключении
+        остальным рабочим процессам. Возвращает False, если клиент уже
+        подключён к другому рабочему процессу. Проверка и занятие выполняются
+        маршрутизатором атомарно, поэтому одновременный вход с одним ID
+        на разных рабочих процессах удаётся только одному.
+
+        :param client_id: ID клиента
+        """
+
+        request_id = next(self._claim_ids)
+        future = get_running_loop().create_future()
+        self._claims[request_id] = future
+
+        try:
+            await self._stream.write(packb(["claim", request_id, client_id]))
+
+            return await future
+        finally:
+            self._claims.pop(request_id, None)
+
+    async def release(self, client_id: Id):
+        """
+        Освобождает ID клиента, занятый ``claim``, и сообщает остальным
+        рабочим процессам об отключении клиента.
+
+        :param client_id: ID клиента
+        """
+
+        await self._stream.write(packb(["offline", client_id]))
+
+    async def route(self, receiver_id: Id, packet: Packet) -> bool:
+        """
+        Пересылает уведомление рабочему процессу, к которому подключён получатель.
+        Возвращает False, если получатель не подключён к другим рабочим процессам.
+
+        :param receiver_id: ID получателя
+        :param packet: уведомление о новом сообщении
+        """
+
+        if receiver_id not in self._directory:
+            return False
+
+        await self._stream.write(
+            packb(["deliver", receiver_id, packet.serialize(WireFormat.V2)])
+        )
+
+        return True
+
+    async def run(self):
+        """
+        Обрабатывает сообщения маршрутизатора до закрытия соединения.
+        """
+
+        try:
+            while True:
+                try:
+                    message = unpackb(await self._stream.read())
+                    kind = message[0]
+                except (ValueError, TypeError, IndexError):
+                    raise ProtocolException()
+
+                if kind == "claimed":
+                    if (future := self._claims.get(message[1])) is not None:
+                        future.set_result(message[2])
+                elif kind == "online":
+                    self._directory[message[1]] = message[2]
+                elif kind == "offline":
+                    if self._directory.get(message[1]) == message[2]:
+                        del self._directory[message[1]]
+                elif kind == "deliver":
+                    if self.on_message is not None:
+                        await self.on_message(
+                            message[1], Packet.deserialize(unpackb(message[2]))
+                        )
+                else:
+                    raise ProtocolException()
+        finally:
+            for future in self._claims.values():
+                future.set_exception(StreamClosedException())
+
+    async def close(self):
+        await self._stream.close()
@@ -0,0 +1,46 @@
+from multiprocessing.managers import BaseManager
+from typing import Optional
+
+from ..database import Database, MemoryDatabase, SqliteDatabase, SynchronizedDatabase
+
+
+def _create_database(path: Optional[str] = None) -> Database:
+    if path is None:
+        return SynchronizedDatabase(MemoryDatabase())
+
+    return SqliteDatabase(path)
+
+
+class DatabaseManager(BaseManager):
+    """
+    Процесс, хранящий общую для рабочих процессов базу данных.
+    ``DatabaseManager.Database(path)`` возвращает прокси ``SqliteDatabase``
+    с указанным файлом или, без аргумента, ``MemoryDatabase``; каждый вызов прокси
+    выполняется в процессе менеджера, исключения базы данных передаются вызывающему.
+    Менеджер обрабатывает соединения в отдельных потоках,
+    поэтому ``MemoryDatabase`` обёрнута в ``SynchronizedDatabase``.
+    """
+
+
+DatabaseManager.register(
+    "Database",
+    _create_database,
+    exposed=[
+        "register_client",
+        "delete_client",
+        "check_password",
+        "add_message",
+        "add_messages",
+        "get_messages_count",
+        "get_messages",
+        "get_channel_peers",
+        "set_encryption_keys_message",
+        "get_encryption_keys_message",
+        "create_group",
+        "get_group_members",
+        "get_client_groups",
+        "add_group_message",
+        "get_group_messages_count",
+        "get_group_messages",
+    ],
+)
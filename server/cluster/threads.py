@@ -0,0 +1,58 @@
+from asyncio import run
+from threading import Thread
+from typing import Optional
+
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+
+from ..database import Database, MemoryDatabase, SynchronizedDatabase
+from ..server import Server
+from ..server_config import ServerConfig
+
+
+def run_threads(
+    threads: int,
+    key: RSAPrivateKey,
+    host: str,
+    port: int,
+    config: ServerConfig = ServerConfig(),
+    database: Optional[Database] = None,
+):
+    """
+    Запускает один ``Server`` в нескольких потоках, каждый со своим циклом
+    событий, принимающих подключения на одном порту (SO_REUSEPORT).
+    Потоки используют общую базу данных и общую таблицу очередей доставки,
+    сообщения клиентам других потоков передаются в их циклы событий.
+    Возвращает управление после завершения всех потоков.
+
+    В сборках Python с GIL параллельно выполняются только операции,
+    освобождающие его (шифрование ``cryptography``); в сборках без GIL -
+    весь код обработки соединений.
+
+    :param threads: количество потоков
+    :param key: приватный ключ сервера
+    :param host: имя хоста
+    :param port: порт
+    :param config: настройки сервера
+    :param database: база данных, без ``threadsafe`` оборачивается
+        в ``SynchronizedDatabase``; по умолчанию - ``MemoryDatabase``
+    """
+
+    if database is None:
+        database = MemoryDatabase()
+
+    if not database.threadsafe:
+        database = SynchronizedDatabase(database)
+
+    server = Server(database, key, config)
+    workers = [
+        Thread(
+            target=run, args=(server.handle_connections(host, port, True),), daemon=True
+        )
+        for _ in range(threads)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
@@ -1,2 +1,9 @@
+from .async_adapters import InlineDatabase, ThreadPoolDatabase, as_async_database
+from .async_database import AsyncDatabase
 from .database import Database
-from .memory_database import MemoryDatabase
+from .log_database import LogDatabase
+from .memory_database import MemoryDatabase, PersistentMemoryDatabase
+from .sharded_database import ShardedDatabase
+from .sqlite_database import SqliteDatabase
+from .synchronized_database import SynchronizedDatabase
+from .tiered_database import TieredDatabase
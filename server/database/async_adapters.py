@@ -0,0 +1,203 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from typing import Final, Optional, Union
+
+from model import ChannelId, Id, Message
+
+from .async_database import AsyncDatabase
+from .database import Database
+
+
+class InlineDatabase(AsyncDatabase):
+    """
+    Вызывает методы синхронной базы данных прямо в цикле событий.
+    Подходит только для баз данных с ``nonblocking``, например ``MemoryDatabase``:
+    вызов не стоит ничего, кроме создания корутины.
+    """
+
+    _database: Final[Database]
+
+    def __init__(self, database: Database):
+        """
+        :param database: синхронная база данных
+        """
+
+        self._database = database
+
+    async def register_client(self, password: bytes) -> Id:
+        return self._database.register_client(password)
+
+    async def delete_client(self, id: Id):
+        self._database.delete_client(id)
+
+    async def check_password(self, client_id: Id, password: bytes) -> bool:
+        return self._database.check_password(client_id, password)
+
+    async def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        self._database.add_message(sender_id, receiver_id, content)
+
+    async def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        return self._database.add_messages(sender_id, messages)
+
+    async def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        return self._database.get_messages_count(channel_id)
+
+    async def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        return self._database.get_messages(channel_id, first_message_index, count)
+
+    async def get_channel_peers(self, client_id: Id) -> list[Id]:
+        return self._database.get_channel_peers(client_id)
+
+    async def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        self._database.set_encryption_keys_message(
+            channel_id, keys_owner_id, message_id
+        )
+
+    async def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        return self._database.get_encryption_keys_message(channel_id, keys_owner_id)
+
+    async def create_group(self, members: list[Id]) -> Id:
+        return self._database.create_group(members)
+
+    async def get_group_members(self, group_id: Id) -> list[Id]:
+        return self._database.get_group_members(group_id)
+
+    async def get_client_groups(self, client_id: Id) -> list[Id]:
+        return self._database.get_client_groups(client_id)
+
+    async def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        self._database.add_group_message(group_id, sender_id, content)
+
+    async def get_group_messages_count(self, group_id: Id) -> int:
+        return self._database.get_group_messages_count(group_id)
+
+    async def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        return self._database.get_group_messages(group_id, first_message_index, count)
+
+
+class ThreadPoolDatabase(AsyncDatabase):
+    """
+    Выполняет методы синхронной базы данных в ограниченном пуле потоков,
+    чтобы обращения к диску или сети не блокировали цикл событий.
+    При ``max_workers > 1`` база данных должна быть потокобезопасной
+    (``threadsafe``, например ``SqliteDatabase`` или ``SynchronizedDatabase``).
+    """
+
+    _database: Final[Database]
+    _executor: Final[ThreadPoolExecutor]
+
+    def __init__(self, database: Database, max_workers: int = 4):
+        """
+        :param database: синхронная база данных
+        :param max_workers: количество потоков пула
+        """
+
+        self._database = database
+        self._executor = ThreadPoolExecutor(max_workers, "database")
+
+    async def register_client(self, password: bytes) -> Id:
+        return await self._run(self._database.register_client, password)
+
+    async def delete_client(self, id: Id):
+        await self._run(self._database.delete_client, id)
+
+    async def check_password(self, client_id: Id, password: bytes) -> bool:
+        return await self._run(self._database.check_password, client_id, password)
+
+    async def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        await self._run(self._database.add_message, sender_id, receiver_id, content)
+
+    async def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        return await self._run(self._database.add_messages, sender_id, messages)
+
+    async def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        return await self._run(self._database.get_messages_count, channel_id)
+
+    async def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        return await self._run(
+            self._database.get_messages, channel_id, first_message_index, count
+        )
+
+    async def get_channel_peers(self, client_id: Id) -> list[Id]:
+        return await self._run(self._database.get_channel_peers, client_id)
+
+    async def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        await self._run(
+            self._database.set_encryption_keys_message,
+            channel_id,
+            keys_owner_id,
+            message_id,
+        )
+
+    async def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        return await self._run(
+            self._database.get_encryption_keys_message, channel_id, keys_owner_id
+        )
+
+    async def create_group(self, members: list[Id]) -> Id:
+        return await self._run(self._database.create_group, members)
+
+    async def get_group_members(self, group_id: Id) -> list[Id]:
+        return await self._run(self._database.get_group_members, group_id)
+
+    async def get_client_groups(self, client_id: Id) -> list[Id]:
+        return await self._run(self._database.get_client_groups, client_id)
+
+    async def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        await self._run(self._database.add_group_message, group_id, sender_id, content)
+
+    async def get_group_messages_count(self, group_id: Id) -> int:
+        return await self._run(self._database.get_group_messages_count, group_id)
+
+    async def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        return await self._run(
+            self._database.get_group_messages, group_id, first_message_index, count
+        )
+
+    def close(self):
+        """
+        Дожидается выполняющихся вызовов и останавливает пул.
+        """
+
+        self._executor.shutdown()
+
+    async def _run(self, function, *args):
+        return await get_running_loop().run_in_executor(self._executor, function, *args)
+
+
+def as_async_database(database: Union[Database, AsyncDatabase]) -> AsyncDatabase:
+    """
+    Возвращает асинхронный интерфейс базы данных: её саму, если она
+    уже асинхронная, ``InlineDatabase`` для баз данных с ``nonblocking``,
+    иначе ``ThreadPoolDatabase``.
+
+    :param database: база данных
+    """
+
+    if isinstance(database, AsyncDatabase):
+        return database
+
+    if getattr(database, "nonblocking", False):
+        return InlineDatabase(database)
+
+    return ThreadPoolDatabase(database)
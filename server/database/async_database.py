@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from model import ChannelId, Id, Message
+
+
+class AsyncDatabase(ABC):
+    """
+    Асинхронный вариант ``Database``: методы с теми же аргументами,
+    результатами и исключениями, которые не блокируют цикл событий.
+    Реализации для синхронных баз данных - в ``async_adapters``.
+    """
+
+    @abstractmethod
+    async def register_client(self, password: bytes) -> Id:
+        """
+        Регистрирует нового клиента и возвращает его ID.
+
+        :param password: пароль клиента
+        """
+
+    @abstractmethod
+    async def delete_client(self, id: Id):
+        """
+        Удаляет клиента.
+
+        :param id: ID клиента
+        """
+
+    @abstractmethod
+    async def check_password(self, client_id: Id, password: bytes) -> bool:
+        """
+        Проверяет, совпадает ли реальный пароль клиента с аргументом.
+
+        :param client_id: ID клиента
+        :param password: пароль
+        """
+
+    @abstractmethod
+    async def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        """
+        Добавляет новое сообщение в канал.
+
+        :param receiver_id: ID получателя
+        :param sender_id: ID отправителя
+        :param content: содержимое сообщения
+        """
+
+    @abstractmethod
+    async def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        """
+        Добавляет сообщения отправителя нескольким получателям и возвращает
+        для каждого сообщения, добавлено ли оно (False - клиент не существует).
+
+        :param sender_id: ID отправителя
+        :param messages: пары из ID получателя и содержимого сообщения
+        """
+
+    @abstractmethod
+    async def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        """
+        Возвращает количество сообщений каждого участника в указанном канале.
+
+        :param channel_id: ID канала
+        """
+
+    @abstractmethod
+    async def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        """
+        Возвращает список сообщений канала, находящихся в заданном диапазоне.
+
+        :param channel_id: ID канала
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
+
+    @abstractmethod
+    async def get_channel_peers(self, client_id: Id) -> list[Id]:
+        """
+        Возвращает список ID клиентов, с которыми указанный клиент состоит в канале.
+
+        :param client_id: ID клиента
+        """
+
+    @abstractmethod
+    async def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        """
+        Изменяет ID сообщения, содержащего ключи шифрования сообщений
+        за авторством указанного клиента в заданном канале.
+
+        :param channel_id: ID канала
+        :param keys_owner_id: ID клиента, которому принадлежат ключи шифрования
+        :param message_id: ID сообщения
+        """
+
+    @abstractmethod
+    async def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        """
+        Возвращает ID сообщения (или None, при отсутствии такового),
+        содержащего ключи шифрования сообщений за авторством
+        указанного клиента в заданном канале.
+
+        :param channel_id: ID канала
+        :param keys_owner_id: ID клиента, которому принадлежат ключи шифрования
+        """
+
+    @abstractmethod
+    async def create_group(self, members: list[Id]) -> Id:
+        """
+        Создаёт групповой канал и возвращает его ID.
+
+        :param members: ID участников, повторы игнорируются
+        """
+
+    @abstractmethod
+    async def get_group_members(self, group_id: Id) -> list[Id]:
+        """
+        Возвращает ID участников группы.
+
+        :param group_id: ID группы
+        """
+
+    @abstractmethod
+    async def get_client_groups(self, client_id: Id) -> list[Id]:
+        """
+        Возвращает ID групп, в которых состоит клиент, в порядке их создания.
+
+        :param client_id: ID клиента
+        """
+
+    @abstractmethod
+    async def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        """
+        Добавляет сообщение в группу.
+
+        :param group_id: ID группы
+        :param sender_id: ID отправителя, участника группы
+        :param content: содержимое сообщения
+        """
+
+    @abstractmethod
+    async def get_group_messages_count(self, group_id: Id) -> int:
+        """
+        Возвращает количество сообщений в группе.
+
+        :param group_id: ID группы
+        """
+
+    @abstractmethod
+    async def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        """
+        Возвращает список сообщений группы, находящихся в заданном диапазоне.
+
+        :param group_id: ID группы
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
@@ -3,8 +3,22 @@ from typing import Optional
 
 from model import ChannelId, Id, Message
 
+from .exceptions import ClientNotExistsException
+
 
 class Database(ABC):
+    nonblocking: bool = False
+    """
+    Методы выполняются быстро и не обращаются к диску или сети,
+    поэтому их можно вызывать прямо из цикла событий (см. ``as_async_database``).
+    """
+
+    threadsafe: bool = False
+    """
+    Методы можно вызывать одновременно из нескольких потоков
+    без ``SynchronizedDatabase``.
+    """
+
     @abstractmethod
     def register_client(self, password: bytes) -> Id:
         """
@@ -40,6 +54,31 @@ class Database(ABC):
         :param content: содержимое сообщения
         """
 
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        """
+        Добавляет сообщения отправителя нескольким получателям и возвращает
+        для каждого сообщения, добавлено ли оно (False - клиент не существует).
+        По умолчанию вызывает ``add_message`` для каждого сообщения,
+        реализации могут добавлять их одной операцией.
+
+        :param sender_id: ID отправителя
+        :param messages: пары из ID получателя и содержимого сообщения
+        """
+
+        results = []
+
+        for receiver_id, content in messages:
+            try:
+                self.add_message(sender_id, receiver_id, content)
+            except ClientNotExistsException:
+                results.append(False)
+            else:
+                results.append(True)
+
+        return results
+
     @abstractmethod
     def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
         """
@@ -93,3 +132,58 @@ class Database(ABC):
         :param channel_id: ID канала
         :param keys_owner_id: ID клиента, которому принадлежат ключи шифрования
         """
+
+    @abstractmethod
+    def create_group(self, members: list[Id]) -> Id:
+        """
+        Создаёт групповой канал и возвращает его ID.
+
+        :param members: ID участников, повторы игнорируются
+        """
+
+    @abstractmethod
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        """
+        Возвращает ID участников группы.
+
+        :param group_id: ID группы
+        """
+
+    @abstractmethod
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        """
+        Возвращает ID групп, в которых состоит клиент, в порядке их создания.
+
+        :param client_id: ID клиента
+        """
+
+    @abstractmethod
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        """
+        Добавляет сообщение в группу. Сообщение хранится один раз
+        для всех участников.
+
+        :param group_id: ID группы
+        :param sender_id: ID отправителя, участника группы
+        :param content: содержимое сообщения
+        """
+
+    @abstractmethod
+    def get_group_messages_count(self, group_id: Id) -> int:
+        """
+        Возвращает количество сообщений в группе.
+
+        :param group_id: ID группы
+        """
+
+    @abstractmethod
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        """
+        Возвращает список сообщений группы, находящихся в заданном диапазоне.
+
+        :param group_id: ID группы
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
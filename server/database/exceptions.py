@@ -20,3 +20,9 @@ class InvalidIdException(Exception):
     """
     Указанный ID не является верным.
     """
+
+
+class GroupNotExistsException(Exception):
+    """
+    Указанная группа не существует.
+    """
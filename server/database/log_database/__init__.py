@@ -0,0 +1 @@
+from .log_database import LogDatabase
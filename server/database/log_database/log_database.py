@@ -0,0 +1,468 @@
+from array import array
+from os import makedirs
+from struct import Struct
+from threading import Lock
+from typing import Final, Iterator, Optional
+
+from model import ChannelId, Id, Message, random_id
+
+from ..database import Database
+from ..exceptions import (
+    ChannelNotExistsException,
+    ClientNotExistsException,
+    GroupNotExistsException,
+    InvalidIdException,
+    InvalidRangeException,
+)
+from .segment_log import SegmentLog
+
+_REGISTER_CLIENT: Final[int] = 1
+_DELETE_CLIENT: Final[int] = 2
+_ADD_MESSAGE: Final[int] = 3
+_SET_ENCRYPTION_KEYS_MESSAGE: Final[int] = 4
+_CREATE_GROUP: Final[int] = 5
+_ADD_GROUP_MESSAGE: Final[int] = 6
+
+_ID: Final[Struct] = Struct("<q")
+_MESSAGE_HEADER: Final[Struct] = Struct("<qqq")
+"""
+Первый и второй участники канала, отправитель; за ними - содержимое сообщения.
+"""
+_ENCRYPTION_KEYS_MESSAGE: Final[Struct] = Struct("<qqqq")
+"""
+Первый и второй участники канала, владелец ключей, ID сообщения.
+"""
+_GROUP_MESSAGE_HEADER: Final[Struct] = Struct("<qq")
+"""
+ID группы, отправитель; за ними - содержимое сообщения.
+"""
+
+
+class _ChannelIndex:
+    positions: Final[array]
+    """
+    Позиции записей сообщений канала в журнале, по одному числу на сообщение.
+    """
+
+    messages_count: Final[dict[Id, int]]
+    encryption_keys_messages: Final[dict[Id, Id]]
+
+    def __init__(self, id: ChannelId):
+        self.positions = array("Q")
+        self.messages_count = {id.clients[0]: 0, id.clients[1]: 0}
+        self.encryption_keys_messages = {}
+
+
+class _GroupIndex:
+    members: Final[list[Id]]
+    member_set: Final[frozenset[Id]]
+    positions: Final[array]
+    """
+    Позиции записей сообщений группы в журнале, по одному числу на сообщение.
+    """
+
+    def __init__(self, members: list[Id]):
+        self.members = members
+        self.member_set = frozenset(members)
+        self.positions = array("Q")
+
+
+class LogDatabase(Database):
+    """
+    Реализация ``Database``, хранящая все изменения в журнале
+    из файлов-сегментов (см. ``SegmentLog``). В памяти находятся только
+    клиенты и индекс: позиция каждого сообщения в журнале занимает 8 байт,
+    поэтому история может быть намного больше оперативной памяти.
+    При открытии индекс восстанавливается чтением заголовков записей журнала.
+
+    ``get_messages`` возвращает сообщения, содержимое которых - ``memoryview``
+    отображённого в память сегмента, без копирования (кроме самых новых
+    сообщений, см. ``SegmentLog``).
+
+    Запись попадает в файл при вызове метода, но на диск - только после
+    ``flush``. ``compact`` удаляет из журнала удалённых клиентов и каналы,
+    и группы, в которых не осталось ни одного участника.
+
+    Методы можно вызывать из нескольких потоков.
+    """
+
+    threadsafe = True
+
+    _log: Final[SegmentLog]
+    _lock: Final[Lock]
+    _passwords: Final[dict[Id, bytes]]
+    _channels: Final[dict[ChannelId, _ChannelIndex]]
+    _peers: Final[dict[Id, list[Id]]]
+    _groups: Final[dict[Id, _GroupIndex]]
+    _client_groups: Final[dict[Id, list[Id]]]
+
+    def __init__(self, path: str, segment_size: int = 64 * 1024 * 1024):
+        """
+        :param path: каталог журнала, создаётся при отсутствии
+        :param segment_size: размер сегмента журнала в байтах
+        """
+
+        makedirs(path, exist_ok=True)
+
+        self._log = SegmentLog(path, segment_size)
+        self._lock = Lock()
+        self._passwords = {}
+        self._channels = {}
+        self._peers = {}
+        self._groups = {}
+        self._client_groups = {}
+
+        self._load()
+
+    def flush(self):
+        """
+        Дожидается записи журнала на диск.
+        """
+
+        with self._lock:
+            self._log.sync()
+
+    def close(self):
+        """
+        Записывает журнал на диск и закрывает его.
+        """
+
+        with self._lock:
+            self._log.sync()
+            self._log.close()
+
+    def compact(self):
+        """
+        Переписывает журнал, оставляя только записи, ещё влияющие на состояние:
+        без удалённых клиентов, каналов и групп, все участники которых удалены,
+        и заменённых ID сообщений с ключами шифрования.
+        Блокирует остальные методы на время сжатия.
+        """
+
+        with self._lock:
+            self._log.rewrite(self._live_records())
+
+            self._passwords.clear()
+            self._channels.clear()
+            self._peers.clear()
+            self._groups.clear()
+            self._client_groups.clear()
+
+            self._load()
+
+    def register_client(self, password: bytes) -> Id:
+        id = random_id()
+
+        with self._lock:
+            self._log.append(_REGISTER_CLIENT, _ID.pack(id) + password)
+            self._passwords[id] = password
+
+        return id
+
+    def delete_client(self, id: Id):
+        with self._lock:
+            if id not in self._passwords:
+                raise ClientNotExistsException()
+
+            self._log.append(_DELETE_CLIENT, _ID.pack(id))
+            self._delete_client(id)
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return self._passwords[client_id] == password
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        with self._lock:
+            if receiver_id not in self._passwords or sender_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            self._append_message(sender_id, receiver_id, content)
+
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        results = []
+
+        with self._lock:
+            for receiver_id, content in messages:
+                added = sender_id in self._passwords and receiver_id in self._passwords
+
+                if added:
+                    self._append_message(sender_id, receiver_id, content)
+
+                results.append(added)
+
+        return results
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            return dict(self._channels[channel_id].messages_count)
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            positions = self._channels[channel_id].positions
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count > len(positions)
+            ):
+                raise InvalidRangeException()
+
+            return [
+                self._read_message(position)
+                for position in positions[
+                    first_message_index : first_message_index + count
+                ]
+            ]
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return list(self._peers.get(client_id, ()))
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            channel = self._channels[channel_id]
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            if (
+                message_id < 0
+                or message_id >= len(channel.positions)
+                or self._read_message(channel.positions[message_id]).sender
+                != keys_owner_id
+            ):
+                raise InvalidIdException()
+
+            self._log.append(
+                _SET_ENCRYPTION_KEYS_MESSAGE,
+                _ENCRYPTION_KEYS_MESSAGE.pack(
+                    *channel_id.clients, keys_owner_id, message_id
+                ),
+            )
+            channel.encryption_keys_messages[keys_owner_id] = message_id
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            return self._channels[channel_id].encryption_keys_messages.get(
+                keys_owner_id
+            )
+
+    def create_group(self, members: list[Id]) -> Id:
+        members = list(dict.fromkeys(members))
+        id = random_id()
+
+        with self._lock:
+            if any(client_id not in self._passwords for client_id in members):
+                raise ClientNotExistsException()
+
+            self._log.append(_CREATE_GROUP, array("q", (id, *members)).tobytes())
+            self._add_group(id, members)
+
+        return id
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        with self._lock:
+            return list(self._get_group(group_id).members)
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return list(self._client_groups.get(client_id, ()))
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._lock:
+            group = self._get_group(group_id)
+
+            if sender_id not in group.member_set:
+                raise ClientNotExistsException()
+
+            group.positions.append(
+                self._log.append(
+                    _ADD_GROUP_MESSAGE,
+                    _GROUP_MESSAGE_HEADER.pack(group_id, sender_id) + content,
+                )
+            )
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        with self._lock:
+            return len(self._get_group(group_id).positions)
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            positions = self._get_group(group_id).positions
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count > len(positions)
+            ):
+                raise InvalidRangeException()
+
+            return [
+                self._read_group_message(position)
+                for position in positions[
+                    first_message_index : first_message_index + count
+                ]
+            ]
+
+    def _get_group(self, group_id: Id) -> _GroupIndex:
+        if (group := self._groups.get(group_id)) is None:
+            raise GroupNotExistsException()
+
+        return group
+
+    def _read_group_message(self, position: int) -> Message:
+        _, payload = self._log.read(position)
+        _, sender_id = _GROUP_MESSAGE_HEADER.unpack_from(payload)
+
+        return Message(sender_id, payload[_GROUP_MESSAGE_HEADER.size :])
+
+    def _read_message(self, position: int) -> Message:
+        _, payload = self._log.read(position)
+        _, _, sender_id = _MESSAGE_HEADER.unpack_from(payload)
+
+        return Message(sender_id, payload[_MESSAGE_HEADER.size :])
+
+    def _delete_client(self, id: Id):
+        del self._passwords[id]
+        self._peers.pop(id, None)
+        self._client_groups.pop(id, None)
+
+    def _add_group(self, id: Id, members: list[Id]):
+        self._groups[id] = _GroupIndex(members)
+
+        for client_id in members:
+            self._client_groups.setdefault(client_id, []).append(id)
+
+    def _append_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+        position = self._log.append(
+            _ADD_MESSAGE,
+            _MESSAGE_HEADER.pack(*channel_id.clients, sender_id) + content,
+        )
+
+        self._add_message(channel_id, sender_id, position)
+
+    def _add_message(self, channel_id: ChannelId, sender_id: Id, position: int):
+        if (channel := self._channels.get(channel_id)) is None:
+            channel = self._channels[channel_id] = _ChannelIndex(channel_id)
+            first_client, second_client = channel_id.clients
+
+            self._peers.setdefault(first_client, []).append(second_client)
+
+            if first_client != second_client:
+                self._peers.setdefault(second_client, []).append(first_client)
+
+        channel.positions.append(position)
+        channel.messages_count[sender_id] += 1
+
+    def _load(self):
+        """
+        Восстанавливает состояние по записям журнала.
+        """
+
+        for position, record_type, payload in self._log.records():
+            if record_type == _REGISTER_CLIENT:
+                (id,) = _ID.unpack_from(payload)
+                self._passwords[id] = bytes(payload[_ID.size :])
+            elif record_type == _DELETE_CLIENT:
+                self._delete_client(_ID.unpack_from(payload)[0])
+            elif record_type == _ADD_MESSAGE:
+                first_client, second_client, sender_id = _MESSAGE_HEADER.unpack_from(
+                    payload
+                )
+
+                self._add_message(
+                    ChannelId((first_client, second_client)), sender_id, position
+                )
+            elif record_type == _SET_ENCRYPTION_KEYS_MESSAGE:
+                (
+                    first_client,
+                    second_client,
+                    keys_owner_id,
+                    message_id,
+                ) = _ENCRYPTION_KEYS_MESSAGE.unpack_from(payload)
+
+                self._channels[
+                    ChannelId((first_client, second_client))
+                ].encryption_keys_messages[keys_owner_id] = message_id
+            elif record_type == _CREATE_GROUP:
+                id, *members = array("q", bytes(payload))
+
+                self._add_group(id, members)
+            elif record_type == _ADD_GROUP_MESSAGE:
+                (id,) = _ID.unpack_from(payload)
+
+                self._groups[id].positions.append(position)
+
+        for id in [id for id in self._peers if id not in self._passwords]:
+            del self._peers[id]
+
+        for id in [id for id in self._client_groups if id not in self._passwords]:
+            del self._client_groups[id]
+
+    def _live_records(self) -> Iterator[tuple[int, bytes]]:
+        """
+        Перебирает записи, воспроизводящие текущее состояние:
+        клиентов, сообщения каналов и групп с хотя бы одним существующим
+        участником и последние ID сообщений с ключами шифрования.
+        """
+
+        for id, password in self._passwords.items():
+            yield _REGISTER_CLIENT, _ID.pack(id) + password
+
+        for channel_id, channel in self._channels.items():
+            if all(
+                client_id not in self._passwords for client_id in channel_id.clients
+            ):
+                continue
+
+            for position in channel.positions:
+                yield self._log.read(position)
+
+            for keys_owner_id, message_id in channel.encryption_keys_messages.items():
+                yield _SET_ENCRYPTION_KEYS_MESSAGE, _ENCRYPTION_KEYS_MESSAGE.pack(
+                    *channel_id.clients, keys_owner_id, message_id
+                )
+
+        for id, group in self._groups.items():
+            if all(client_id not in self._passwords for client_id in group.members):
+                continue
+
+            yield _CREATE_GROUP, array("q", (id, *group.members)).tobytes()
+
+            for position in group.positions:
+                yield self._log.read(position)
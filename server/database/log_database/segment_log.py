@@ -0,0 +1,298 @@
+from mmap import ACCESS_READ, mmap
+from os import fsync, listdir, path, pread, remove, rename
+from struct import Struct
+from typing import BinaryIO, Final, Iterable, Iterator, Optional
+
+RECORD_HEADER: Final[Struct] = Struct("<BI")
+"""
+Заголовок записи: тип и длина содержимого.
+"""
+
+COMPACTED_RECORD_TYPE: Final[int] = 0
+"""
+Тип записи, с которой начинается сегмент, созданный сжатием:
+сегменты с меньшими номерами им заменены.
+"""
+
+_SEGMENT_SUFFIX: Final[str] = ".log"
+_TEMPORARY_SUFFIX: Final[str] = ".tmp"
+_OFFSET_BITS: Final[int] = 40
+_REMAP_STEP: Final[int] = 4 * 1024 * 1024
+"""
+Сколько байт должно быть дописано в текущий сегмент после его отображения,
+чтобы он был отображён заново; до этого новые записи читаются ``pread``.
+"""
+
+
+class SegmentLog:
+    """
+    Журнал записей, дописываемых в конец файлов-сегментов каталога.
+    Когда текущий сегмент превышает ``segment_size``, начинается следующий.
+    Позиция записи - номер сегмента и смещение в нём, упакованные в одно число.
+    Записи читаются из отображённых в память сегментов без копирования,
+    кроме дописанных в текущий сегмент после его отображения: они читаются
+    ``pread``, пока их не наберётся ``_REMAP_STEP`` байт, после чего сегмент
+    отображается заново. Так чтение последних записей не требует
+    отображать сегмент заново после каждой записи.
+    """
+
+    _directory: Final[str]
+    _segment_size: Final[int]
+    _segments: Final[list[int]]
+    _maps: Final[dict[int, mmap]]
+    _active_file: Optional[BinaryIO]
+    _active_reader: Optional[BinaryIO]
+    """
+    Текущий сегмент, открытый для чтения ``pread``.
+    """
+
+    _active_size: int
+
+    def __init__(self, directory: str, segment_size: int):
+        """
+        Открывает журнал, удаляя сегменты, заменённые сжатием,
+        и недописанную последнюю запись.
+
+        :param directory: каталог сегментов
+        :param segment_size: размер сегмента в байтах, после которого
+            начинается следующий
+        """
+
+        self._directory = directory
+        self._segment_size = segment_size
+        self._segments = []
+        self._maps = {}
+        self._active_file = None
+        self._active_reader = None
+        self._active_size = 0
+
+        segments = []
+
+        for name in listdir(directory):
+            if name.endswith(_TEMPORARY_SUFFIX):
+                remove(path.join(directory, name))
+            elif name.endswith(_SEGMENT_SUFFIX):
+                segments.append(int(name.removesuffix(_SEGMENT_SUFFIX)))
+
+        segments.sort()
+
+        for segment in reversed(segments):
+            if self._starts_with_compacted_record(segment):
+                for superseded_segment in segments[: segments.index(segment)]:
+                    remove(self._segment_path(superseded_segment))
+
+                segments = segments[segments.index(segment) :]
+
+                break
+
+        self._segments.extend(segments)
+
+        if len(segments) == 0:
+            self._open_segment(1)
+        else:
+            self._truncate_incomplete_record(segments[-1])
+            self._active_file = open(self._segment_path(segments[-1]), "ab", 0)
+            self._active_reader = open(self._segment_path(segments[-1]), "rb", 0)
+            self._active_size = path.getsize(self._segment_path(segments[-1]))
+
+    def append(self, record_type: int, payload: bytes) -> int:
+        """
+        Дописывает запись и возвращает её позицию.
+
+        :param record_type: тип записи
+        :param payload: содержимое записи
+        """
+
+        if self._active_size >= self._segment_size:
+            self._open_segment(self._segments[-1] + 1)
+
+        offset = self._active_size
+
+        self._active_file.write(RECORD_HEADER.pack(record_type, len(payload)) + payload)
+        self._active_size += RECORD_HEADER.size + len(payload)
+
+        return self._segments[-1] << _OFFSET_BITS | offset
+
+    def read(self, position: int) -> tuple[int, memoryview]:
+        """
+        Возвращает тип и содержимое записи в указанной позиции.
+        Содержимое ссылается на отображённый в память сегмент.
+
+        :param position: позиция записи
+        """
+
+        segment = position >> _OFFSET_BITS
+        offset = position & ((1 << _OFFSET_BITS) - 1)
+
+        if segment == self._segments[-1]:
+            segment_map = self._maps.get(segment)
+            mapped_size = 0 if segment_map is None else len(segment_map)
+
+            if offset >= mapped_size and self._active_size - mapped_size < _REMAP_STEP:
+                return self._read_unmapped(offset)
+
+        segment_map = self._map(segment, offset + RECORD_HEADER.size)
+        record_type, length = RECORD_HEADER.unpack_from(segment_map, offset)
+        start = offset + RECORD_HEADER.size
+
+        if start + length > len(segment_map):
+            segment_map = self._map(segment, start + length)
+
+        return record_type, memoryview(segment_map)[start : start + length]
+
+    def records(self) -> Iterator[tuple[int, int, memoryview]]:
+        """
+        Перебирает позиции, типы и содержимое всех записей журнала по порядку.
+        """
+
+        for segment in list(self._segments):
+            size = path.getsize(self._segment_path(segment))
+
+            if size == 0:
+                continue
+
+            segment_map = self._map(segment, size)
+            offset = 0
+
+            while offset < size:
+                record_type, length = RECORD_HEADER.unpack_from(segment_map, offset)
+                start = offset + RECORD_HEADER.size
+
+                yield (
+                    segment << _OFFSET_BITS | offset,
+                    record_type,
+                    memoryview(segment_map)[start : start + length],
+                )
+
+                offset = start + length
+
+    def rewrite(self, records: Iterable[tuple[int, bytes]]):
+        """
+        Заменяет весь журнал указанными записями. Они записываются
+        во временный файл, который переименовывается в новый сегмент,
+        начинающийся с записи ``COMPACTED_RECORD_TYPE``; после этого
+        прежние сегменты удаляются. При сбое до переименования
+        остаётся прежний журнал, после - новый.
+
+        :param records: типы и содержимое записей нового журнала
+        """
+
+        segment = self._segments[-1] + 1
+        temporary_path = self._segment_path(segment) + _TEMPORARY_SUFFIX
+
+        with open(temporary_path, "wb") as file:
+            file.write(RECORD_HEADER.pack(COMPACTED_RECORD_TYPE, 0))
+
+            for record_type, payload in records:
+                file.write(RECORD_HEADER.pack(record_type, len(payload)))
+                file.write(payload)
+
+            file.flush()
+            fsync(file.fileno())
+
+        self._active_file.close()
+        self._active_reader.close()
+        rename(temporary_path, self._segment_path(segment))
+
+        for superseded_segment in self._segments:
+            remove(self._segment_path(superseded_segment))
+
+        self._segments.clear()
+        self._maps.clear()
+        self._segments.append(segment)
+        self._active_file = None
+        self._active_reader = None
+
+        self._open_segment(segment + 1)
+
+    def sync(self):
+        """
+        Дожидается записи текущего сегмента на диск.
+        """
+
+        fsync(self._active_file.fileno())
+
+    def close(self):
+        """
+        Закрывает текущий сегмент. Отображения сегментов освобождаются,
+        когда на них не остаётся ссылок.
+        """
+
+        self._active_file.close()
+        self._active_reader.close()
+        self._maps.clear()
+
+    def _segment_path(self, segment: int) -> str:
+        return path.join(self._directory, f"{segment:016}{_SEGMENT_SUFFIX}")
+
+    def _open_segment(self, segment: int):
+        if self._active_file is not None:
+            self._active_file.close()
+            self._active_reader.close()
+
+        self._segments.append(segment)
+        self._active_file = open(self._segment_path(segment), "ab", 0)
+        self._active_reader = open(self._segment_path(segment), "rb", 0)
+        self._active_size = 0
+
+    def _read_unmapped(self, offset: int) -> tuple[int, memoryview]:
+        """
+        Читает ``pread`` запись текущего сегмента, дописанную после его отображения.
+
+        :param offset: смещение записи в сегменте
+        """
+
+        record_type, length = RECORD_HEADER.unpack(
+            pread(self._active_reader.fileno(), RECORD_HEADER.size, offset)
+        )
+
+        return record_type, memoryview(
+            pread(self._active_reader.fileno(), length, offset + RECORD_HEADER.size)
+        )
+
+    def _map(self, segment: int, size: int) -> mmap:
+        """
+        Возвращает отображение сегмента длиной не меньше ``size``.
+        Текущий сегмент растёт, поэтому при необходимости отображается заново
+        (не чаще, чем через ``_REMAP_STEP`` байт, см. ``read``);
+        прежнее отображение остаётся действительным для выданных ссылок.
+        """
+
+        segment_map = self._maps.get(segment)
+
+        if segment_map is None or len(segment_map) < size:
+            with open(self._segment_path(segment), "rb") as file:
+                segment_map = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+            self._maps[segment] = segment_map
+
+        return segment_map
+
+    def _starts_with_compacted_record(self, segment: int) -> bool:
+        with open(self._segment_path(segment), "rb") as file:
+            header = file.read(RECORD_HEADER.size)
+
+        return (
+            len(header) == RECORD_HEADER.size
+            and RECORD_HEADER.unpack(header)[0] == COMPACTED_RECORD_TYPE
+        )
+
+    def _truncate_incomplete_record(self, segment: int):
+        """
+        Отбрасывает запись, не дописанную до конца из-за сбоя.
+        """
+
+        with open(self._segment_path(segment), "r+b") as file:
+            data = file.read()
+            offset = 0
+
+            while offset + RECORD_HEADER.size <= len(data):
+                _, length = RECORD_HEADER.unpack_from(data, offset)
+
+                if offset + RECORD_HEADER.size + length > len(data):
+                    break
+
+                offset += RECORD_HEADER.size + length
+
+            if offset != len(data):
+                file.truncate(offset)
@@ -1 +1,2 @@
 from .memory_database import MemoryDatabase
+from .persistent_memory_database import PersistentMemoryDatabase
@@ -3,23 +3,34 @@ from typing import Final
 from model import ChannelId, Id, Message
 
 from ..exceptions import ClientNotExistsException
+from .message_list import MessageList
 
 
-class Channel:
+class Channel(MessageList):
+    """
+    Канал двух клиентов с сообщениями в компактном виде (см. ``MessageList``).
+    """
+
     id: Final[ChannelId]
     encryption_keys_messages: Final[dict[Id, Id]]
     messages_count: Final[dict[Id, int]]
-    messages: Final[list[Message]]
 
     def __init__(self, id: ChannelId):
+        super().__init__()
+
         self.id = id
         self.encryption_keys_messages = {}
-        self.messages = []
         self.messages_count = {id.clients[0]: 0, id.clients[1]: 0}
 
     def add_message(self, message: Message):
         if message.sender not in self.id.clients:
             raise ClientNotExistsException()
 
-        self.messages.append(message)
+        self.append(message.sender, message.content)
         self.messages_count[message.sender] += 1
+
+    def load(self, senders: bytes, offsets: bytes, contents: bytes):
+        super().load(senders, offsets, contents)
+
+        for client_id in self.messages_count:
+            self.messages_count[client_id] = self.senders.count(client_id)
@@ -0,0 +1,34 @@
+from typing import Final
+
+from model import Id
+
+from ..exceptions import ClientNotExistsException
+from .message_list import MessageList
+
+
+class Group(MessageList):
+    """
+    Групповой канал: каждое сообщение хранится один раз
+    для всех участников (см. ``MessageList``).
+    """
+
+    id: Final[Id]
+    members: Final[list[Id]]
+    """
+    ID участников в порядке добавления.
+    """
+
+    _member_set: Final[frozenset[Id]]
+
+    def __init__(self, id: Id, members: list[Id]):
+        super().__init__()
+
+        self.id = id
+        self.members = members
+        self._member_set = frozenset(members)
+
+    def add_message(self, sender_id: Id, content: bytes):
+        if sender_id not in self._member_set:
+            raise ClientNotExistsException()
+
+        self.append(sender_id, content)
@@ -6,20 +6,37 @@ from ..database import Database
 from ..exceptions import (
     ChannelNotExistsException,
     ClientNotExistsException,
+    GroupNotExistsException,
     InvalidIdException,
     InvalidRangeException,
 )
 from .channel import Channel
+from .group import Group
 
 
 class MemoryDatabase(Database):
+    nonblocking = True
+
     _passwords: Final[dict[Id, bytes]]  # пароли хранятся в открытом виде;
     # эта реализация интерфейса Database предназначена только для отладки
     _channels: Final[dict[ChannelId, Channel]]
+    _peers: Final[dict[Id, list[Id]]]
+    """
+    ID собеседников каждого клиента в порядке создания каналов.
+    """
+
+    _groups: Final[dict[Id, Group]]
+    _client_groups: Final[dict[Id, list[Id]]]
+    """
+    ID групп каждого клиента в порядке создания групп.
+    """
 
     def __init__(self):
         self._passwords = {}
         self._channels = {}
+        self._peers = {}
+        self._groups = {}
+        self._client_groups = {}
 
     def register_client(self, password: bytes) -> Id:
         id = random_id()
@@ -33,6 +50,8 @@ class MemoryDatabase(Database):
             raise ClientNotExistsException()
 
         del self._passwords[id]
+        self._peers.pop(id, None)
+        self._client_groups.pop(id, None)
 
     def check_password(self, client_id: Id, password: bytes) -> bool:
         if client_id not in self._passwords:
@@ -44,12 +63,25 @@ class MemoryDatabase(Database):
         if receiver_id not in self._passwords or sender_id not in self._passwords:
             raise ClientNotExistsException()
 
-        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+        self._append_message(sender_id, receiver_id, content)
 
-        if channel_id not in self._channels:
-            self._channels[channel_id] = Channel(channel_id)
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        if sender_id not in self._passwords:
+            return [False] * len(messages)
 
-        self._channels[channel_id].add_message(Message(sender_id, content))
+        results = []
+
+        for receiver_id, content in messages:
+            if receiver_id in self._passwords:
+                self._append_message(sender_id, receiver_id, content)
+
+                results.append(True)
+            else:
+                results.append(False)
+
+        return results
 
     def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
         if channel_id not in self._channels:
@@ -63,30 +95,22 @@ class MemoryDatabase(Database):
         if channel_id not in self._channels:
             raise ChannelNotExistsException()
 
-        messages = self._channels[channel_id].messages
+        channel = self._channels[channel_id]
 
         if (
             first_message_index < 0
             or count < 0
-            or first_message_index + count > len(messages)
+            or first_message_index + count > len(channel)
         ):
             raise InvalidRangeException()
 
-        return messages[first_message_index : first_message_index + count]
+        return channel.get_messages(first_message_index, count)
 
     def get_channel_peers(self, client_id: Id) -> list[Id]:
         if client_id not in self._passwords:
             raise ClientNotExistsException()
 
-        result = []
-
-        for channel in self._channels:
-            if channel.clients[0] == client_id:
-                result.append(channel.clients[1])
-            elif channel.clients[1] == client_id:
-                result.append(channel.clients[0])
-
-        return result
+        return list(self._peers.get(client_id, ()))
 
     def set_encryption_keys_message(
         self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
@@ -101,8 +125,8 @@ class MemoryDatabase(Database):
 
         if (
             message_id < 0
-            or message_id >= len(channel.messages)
-            or channel.messages[message_id].sender != keys_owner_id
+            or message_id >= len(channel)
+            or channel.senders[message_id] != keys_owner_id
         ):
             raise InvalidIdException()
 
@@ -123,3 +147,81 @@ class MemoryDatabase(Database):
             return None
 
         return channel.encryption_keys_messages[keys_owner_id]
+
+    def create_group(self, members: list[Id]) -> Id:
+        members = list(dict.fromkeys(members))
+
+        if any(client_id not in self._passwords for client_id in members):
+            raise ClientNotExistsException()
+
+        id = random_id()
+
+        self._add_group(id, members)
+
+        return id
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        return list(self._get_group(group_id).members)
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        if client_id not in self._passwords:
+            raise ClientNotExistsException()
+
+        return list(self._client_groups.get(client_id, ()))
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        self._get_group(group_id).add_message(sender_id, content)
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        return len(self._get_group(group_id))
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        group = self._get_group(group_id)
+
+        if (
+            first_message_index < 0
+            or count < 0
+            or first_message_index + count > len(group)
+        ):
+            raise InvalidRangeException()
+
+        return group.get_messages(first_message_index, count)
+
+    def _append_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        """
+        Добавляет сообщение, создавая канал при необходимости.
+        Существование клиентов проверяет вызывающий.
+        """
+
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+
+        if channel_id not in self._channels:
+            self._channels[channel_id] = self._create_channel(channel_id)
+
+            self._peers.setdefault(sender_id, []).append(receiver_id)
+
+            if receiver_id != sender_id:
+                self._peers.setdefault(receiver_id, []).append(sender_id)
+
+        self._channels[channel_id].add_message(Message(sender_id, content))
+
+    def _create_channel(self, channel_id: ChannelId) -> Channel:
+        return Channel(channel_id)
+
+    def _add_group(self, id: Id, members: list[Id]):
+        """
+        Добавляет группу с заданным ID, участники не проверяются.
+        """
+
+        self._groups[id] = Group(id, members)
+
+        for client_id in members:
+            self._client_groups.setdefault(client_id, []).append(id)
+
+    def _get_group(self, group_id: Id) -> Group:
+        if (group := self._groups.get(group_id)) is None:
+            raise GroupNotExistsException()
+
+        return group
@@ -0,0 +1,80 @@
+from array import array
+from typing import Final
+
+from model import Id, Message
+
+
+class MessageList:
+    """
+    Сообщения в компактном виде: вместо объекта ``Message``
+    на каждое сообщение - отправитель в ``senders``, содержимое
+    в общем буфере ``contents`` и его границы в ``offsets``.
+    Объекты ``Message`` создаются только при чтении.
+    """
+
+    senders: Final[array]
+    """
+    ID отправителя каждого сообщения.
+    """
+
+    offsets: Final[array]
+    """
+    Смещения содержимого сообщений в ``contents``; сообщение ``i`` занимает
+    ``contents[offsets[i] : offsets[i + 1]]``, последний элемент - длина ``contents``.
+    """
+
+    contents: Final[bytearray]
+    """
+    Содержимое всех сообщений подряд.
+    """
+
+    def __init__(self):
+        self.senders = array("q")
+        self.offsets = array("Q", (0,))
+        self.contents = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.senders)
+
+    def append(self, sender_id: Id, content: bytes):
+        self.senders.append(sender_id)
+        self.contents += content
+        self.offsets.append(len(self.contents))
+
+    def get_messages(self, first_message_index: int, count: int) -> list[Message]:
+        """
+        Возвращает сообщения из заданного диапазона, диапазон не проверяется.
+
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
+
+        end_index = first_message_index + count
+        offsets = self.offsets[first_message_index : end_index + 1]
+        base = offsets[0]
+        contents = bytes(self.contents[base : offsets[-1]])
+
+        return list(
+            map(
+                Message,
+                self.senders[first_message_index:end_index],
+                [
+                    contents[offsets[i] - base : offsets[i + 1] - base]
+                    for i in range(count)
+                ],
+            )
+        )
+
+    def load(self, senders: bytes, offsets: bytes, contents: bytes):
+        """
+        Заполняет пустой список сообщениями в виде байтов массивов
+        ``senders``, ``offsets`` (без начального нуля) и ``contents``.
+
+        :param senders: байты массива ``senders``
+        :param offsets: байты массива ``offsets`` без первого элемента
+        :param contents: содержимое сообщений
+        """
+
+        self.senders.frombytes(senders)
+        self.offsets.frombytes(offsets)
+        self.contents += contents
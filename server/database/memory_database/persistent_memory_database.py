@@ -0,0 +1,437 @@
+from os import _exit, close, dup, fork, fsync, listdir, path, remove, rename, waitpid
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import BinaryIO, Final, Optional
+
+from msgpack import OutOfData, Packer, Unpacker
+
+from model import ChannelId, Id
+
+from .channel import Channel
+from .group import Group
+from .memory_database import MemoryDatabase
+
+_REGISTER_CLIENT: Final[int] = 0
+_DELETE_CLIENT: Final[int] = 1
+_ADD_MESSAGE: Final[int] = 2
+_SET_ENCRYPTION_KEYS_MESSAGE: Final[int] = 3
+_CREATE_GROUP: Final[int] = 4
+_ADD_GROUP_MESSAGE: Final[int] = 5
+_ADD_MESSAGES: Final[int] = 6
+
+_WAL_PREFIX: Final[str] = "wal-"
+_SNAPSHOT_PREFIX: Final[str] = "snapshot-"
+_TEMPORARY_SUFFIX: Final[str] = ".tmp"
+
+
+class PersistentMemoryDatabase(MemoryDatabase):
+    """
+    ``MemoryDatabase``, сохраняющая изменения в каталоге:
+    каждое изменение дописывается в журнал (WAL), а раз в ``snapshot_interval``
+    секунд всё состояние записывается в снимок msgpack.
+
+    Снимок пишет дочерний процесс, созданный ``fork`` в фоновом потоке:
+    он получает копию памяти на момент снимка (страницы копируются только
+    при изменении), поэтому изменения останавливаются лишь на время ``fork``.
+    Одновременно начинается новый файл журнала; после записи снимка
+    журналы, которые он покрывает, удаляются.
+
+    При открытии загружается последний снимок и применяются только
+    более новые журналы. Журнал записывается на диск фоновым потоком каждые
+    ``sync_interval`` секунд без блокировки изменений, при сбое теряются
+    изменения не более чем за этот интервал. Поэтому методы, как и у
+    ``MemoryDatabase``, можно вызывать прямо из цикла событий.
+    """
+
+    _directory: Final[str]
+    _snapshot_interval: Final[float]
+    _wal_lock: Final[Lock]
+    """
+    Защищает журнал; изменение в памяти и его запись в журнал
+    выполняются под ним вместе, чтобы снимок был согласован с журналами.
+    """
+
+    _sync_lock: Final[Lock]
+    """
+    Упорядочивает записи журнала на диск, не удерживается при изменениях.
+    """
+
+    _unsynced_descriptors: Final[list[int]]
+    """
+    Копии дескрипторов закрытых при начале снимка журналов,
+    ещё не записанных на диск.
+    """
+
+    _wal_packer: Final[Packer]
+    _wal_number: int
+    _wal_file: BinaryIO
+    _wal_dirty: bool
+    _next_snapshot_time: float
+    _snapshot_pid: Optional[int]
+    _closed: bool
+
+    def __init__(
+        self, path: str, snapshot_interval: float = 300.0, sync_interval: float = 0.01
+    ):
+        """
+        :param path: каталог снимков и журналов, должен существовать
+        :param snapshot_interval: период записи снимков в секундах
+        :param sync_interval: период записи журнала на диск в секундах
+        """
+
+        super().__init__()
+
+        self._directory = path
+        self._snapshot_interval = snapshot_interval
+        self._wal_lock = Lock()
+        self._sync_lock = Lock()
+        self._unsynced_descriptors = []
+        self._wal_packer = Packer()
+        self._snapshot_pid = None
+        self._closed = False
+
+        self._wal_number = self._recover() + 1
+        self._wal_file = open(self._file_path(_WAL_PREFIX, self._wal_number), "ab")
+        self._wal_dirty = False
+        self._next_snapshot_time = monotonic() + snapshot_interval
+
+        Thread(
+            target=self._sync_periodically, args=(sync_interval,), daemon=True
+        ).start()
+
+    def register_client(self, password: bytes) -> Id:
+        with self._wal_lock:
+            id = super().register_client(password)
+
+            self._log(_REGISTER_CLIENT, id, password)
+
+        return id
+
+    def delete_client(self, id: Id):
+        with self._wal_lock:
+            super().delete_client(id)
+
+            self._log(_DELETE_CLIENT, id)
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        with self._wal_lock:
+            super().add_message(sender_id, receiver_id, content)
+
+            self._log(_ADD_MESSAGE, sender_id, receiver_id, content)
+
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        with self._wal_lock:
+            results = super().add_messages(sender_id, messages)
+            added = [message for message, result in zip(messages, results) if result]
+
+            if len(added) != 0:
+                self._log(_ADD_MESSAGES, sender_id, added)
+
+        return results
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._wal_lock:
+            super().set_encryption_keys_message(channel_id, keys_owner_id, message_id)
+
+            self._log(
+                _SET_ENCRYPTION_KEYS_MESSAGE,
+                *channel_id.clients,
+                keys_owner_id,
+                message_id,
+            )
+
+    def create_group(self, members: list[Id]) -> Id:
+        with self._wal_lock:
+            id = super().create_group(members)
+
+            self._log(_CREATE_GROUP, id, self._groups[id].members)
+
+        return id
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._wal_lock:
+            super().add_group_message(group_id, sender_id, content)
+
+            self._log(_ADD_GROUP_MESSAGE, group_id, sender_id, content)
+
+    def flush(self):
+        """
+        Дожидается записи журнала на диск.
+        """
+
+        self._sync()
+
+    def snapshot(self) -> bool:
+        """
+        Начинает запись снимка, не дожидаясь её окончания.
+        Возвращает False, если предыдущий снимок ещё записывается.
+        """
+
+        with self._wal_lock:
+            if self._snapshot_pid is not None:
+                return False
+
+            self._wal_file.flush()
+            self._unsynced_descriptors.append(dup(self._wal_file.fileno()))
+            self._wal_file.close()
+
+            snapshot_number = self._wal_number
+            self._wal_number += 1
+            self._wal_file = open(self._file_path(_WAL_PREFIX, self._wal_number), "ab")
+
+            self._next_snapshot_time = monotonic() + self._snapshot_interval
+            self._snapshot_pid = fork()
+
+            if self._snapshot_pid == 0:
+                try:
+                    self._write_snapshot(snapshot_number)
+                except BaseException:
+                    _exit(1)
+
+                _exit(0)
+
+        Thread(
+            target=self._wait_snapshot, args=(self._snapshot_pid, snapshot_number)
+        ).start()
+
+        return True
+
+    def close(self):
+        """
+        Записывает журнал на диск и закрывает его.
+        """
+
+        self._sync(closing=True)
+
+    def _log(self, *record):
+        """
+        Дописывает запись в журнал. Вызывается под ``_wal_lock``.
+        """
+
+        self._wal_file.write(self._wal_packer.pack(record))
+        self._wal_dirty = True
+
+    def _sync(self, closing: bool = False):
+        """
+        Записывает на диск журнал, дописанный до вызова. ``_wal_lock``
+        удерживается только на время передачи буфера в ОС:
+        ``fsync`` выполняется для копий дескрипторов после его освобождения.
+
+        :param closing: закрыть журнал
+        """
+
+        with self._sync_lock:
+            with self._wal_lock:
+                if self._closed:
+                    return
+
+                self._wal_file.flush()
+
+                descriptors = list(self._unsynced_descriptors)
+                self._unsynced_descriptors.clear()
+
+                if self._wal_dirty or closing:
+                    descriptors.append(dup(self._wal_file.fileno()))
+
+                    self._wal_dirty = False
+
+                if closing:
+                    self._closed = True
+                    self._wal_file.close()
+
+            for descriptor in descriptors:
+                try:
+                    fsync(descriptor)
+                finally:
+                    close(descriptor)
+
+    def _file_path(self, prefix: str, number: int) -> str:
+        return path.join(self._directory, f"{prefix}{number:016}")
+
+    def _files(self, prefix: str) -> list[int]:
+        """
+        Возвращает отсортированные номера файлов с указанным префиксом.
+        """
+
+        return sorted(
+            int(name.removeprefix(prefix))
+            for name in listdir(self._directory)
+            if name.startswith(prefix) and not name.endswith(_TEMPORARY_SUFFIX)
+        )
+
+    def _recover(self) -> int:
+        """
+        Загружает последний снимок, применяет более новые журналы
+        и возвращает номер последнего журнала.
+        """
+
+        for name in listdir(self._directory):
+            if name.endswith(_TEMPORARY_SUFFIX):
+                remove(path.join(self._directory, name))
+
+        snapshots = self._files(_SNAPSHOT_PREFIX)
+        last_number = 0
+
+        if len(snapshots) != 0:
+            last_number = snapshots[-1]
+
+            self._load_snapshot(last_number)
+
+        for wal_number in self._files(_WAL_PREFIX):
+            if wal_number > last_number:
+                self._replay(wal_number)
+
+                last_number = wal_number
+
+        return last_number
+
+    def _load_snapshot(self, number: int):
+        with open(self._file_path(_SNAPSHOT_PREFIX, number), "rb") as file:
+            unpacker = Unpacker(file, strict_map_key=False, max_buffer_size=0)
+
+            self._passwords.update(unpacker.unpack())
+
+            for _ in range(unpacker.unpack()):
+                (
+                    first_client,
+                    second_client,
+                    senders,
+                    offsets,
+                    contents,
+                    encryption_keys_messages,
+                ) = unpacker.unpack()
+                channel_id = ChannelId((first_client, second_client))
+                channel = self._channels[channel_id] = Channel(channel_id)
+
+                channel.load(senders, offsets, contents)
+                channel.encryption_keys_messages.update(encryption_keys_messages)
+
+            self._peers.update(unpacker.unpack())
+
+            try:
+                groups_count = unpacker.unpack()
+            except OutOfData:
+                # снимок записан до появления групп
+                return
+
+            for _ in range(groups_count):
+                id, members, senders, offsets, contents = unpacker.unpack()
+                group = self._groups[id] = Group(id, members)
+
+                group.load(senders, offsets, contents)
+
+            self._client_groups.update(unpacker.unpack())
+
+    def _write_snapshot(self, number: int):
+        """
+        Записывает снимок состояния, покрывающий журналы до ``number``.
+        Выполняется в дочернем процессе.
+        """
+
+        snapshot_path = self._file_path(_SNAPSHOT_PREFIX, number)
+        packer = Packer()
+
+        with open(snapshot_path + _TEMPORARY_SUFFIX, "wb") as file:
+            file.write(packer.pack(self._passwords))
+            file.write(packer.pack(len(self._channels)))
+
+            for channel_id, channel in self._channels.items():
+                file.write(
+                    packer.pack(
+                        [
+                            *channel_id.clients,
+                            channel.senders.tobytes(),
+                            channel.offsets[1:].tobytes(),
+                            channel.contents,
+                            channel.encryption_keys_messages,
+                        ]
+                    )
+                )
+
+            file.write(packer.pack(self._peers))
+            file.write(packer.pack(len(self._groups)))
+
+            for group in self._groups.values():
+                file.write(
+                    packer.pack(
+                        [
+                            group.id,
+                            group.members,
+                            group.senders.tobytes(),
+                            group.offsets[1:].tobytes(),
+                            group.contents,
+                        ]
+                    )
+                )
+
+            file.write(packer.pack(self._client_groups))
+            file.flush()
+            fsync(file.fileno())
+
+        rename(snapshot_path + _TEMPORARY_SUFFIX, snapshot_path)
+
+    def _wait_snapshot(self, pid: int, number: int):
+        """
+        Дожидается дочернего процесса снимка и удаляет покрытые им файлы.
+        """
+
+        _, status = waitpid(pid, 0)
+
+        if status == 0:
+            for snapshot_number in self._files(_SNAPSHOT_PREFIX):
+                if snapshot_number < number:
+                    remove(self._file_path(_SNAPSHOT_PREFIX, snapshot_number))
+
+            for wal_number in self._files(_WAL_PREFIX):
+                if wal_number <= number:
+                    remove(self._file_path(_WAL_PREFIX, wal_number))
+
+        self._snapshot_pid = None
+
+    def _replay(self, number: int):
+        """
+        Применяет изменения из журнала. Недописанная из-за сбоя
+        последняя запись пропускается.
+        """
+
+        with open(self._file_path(_WAL_PREFIX, number), "rb") as file:
+            for record_type, *arguments in Unpacker(file, strict_map_key=False):
+                if record_type == _REGISTER_CLIENT:
+                    id, password = arguments
+                    self._passwords[id] = password
+                elif record_type == _DELETE_CLIENT:
+                    MemoryDatabase.delete_client(self, *arguments)
+                elif record_type == _ADD_MESSAGE:
+                    MemoryDatabase.add_message(self, *arguments)
+                elif record_type == _ADD_MESSAGES:
+                    MemoryDatabase.add_messages(self, *arguments)
+                elif record_type == _SET_ENCRYPTION_KEYS_MESSAGE:
+                    first_client, second_client, keys_owner_id, message_id = arguments
+
+                    MemoryDatabase.set_encryption_keys_message(
+                        self,
+                        ChannelId((first_client, second_client)),
+                        keys_owner_id,
+                        message_id,
+                    )
+                elif record_type == _CREATE_GROUP:
+                    self._add_group(*arguments)
+                elif record_type == _ADD_GROUP_MESSAGE:
+                    MemoryDatabase.add_group_message(self, *arguments)
+
+    def _sync_periodically(self, interval: float):
+        """
+        Записывает журнал на диск и начинает снимки по расписанию.
+        """
+
+        while not self._closed:
+            sleep(interval)
+
+            self._sync()
+
+            if not self._closed and monotonic() >= self._next_snapshot_time:
+                self.snapshot()
@@ -0,0 +1 @@
+from .sharded_database import ShardedDatabase
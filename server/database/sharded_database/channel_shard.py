@@ -0,0 +1,150 @@
+from threading import Lock
+from typing import Final, Optional
+
+from model import ChannelId, Id, Message
+
+from ..exceptions import (
+    ChannelNotExistsException,
+    ClientNotExistsException,
+    GroupNotExistsException,
+    InvalidIdException,
+    InvalidRangeException,
+)
+from ..memory_database.channel import Channel
+from ..memory_database.group import Group
+
+
+class ChannelShard:
+    """
+    Каналы и группы одного шарда ``ShardedDatabase``. Существование клиентов
+    не проверяет, это делает ``ClientDirectory``.
+    Выполняется в отдельном процессе, методы вызываются из потоков менеджера.
+    """
+
+    _lock: Final[Lock]
+    _channels: Final[dict[ChannelId, Channel]]
+    _groups: Final[dict[Id, Group]]
+
+    def __init__(self):
+        self._lock = Lock()
+        self._channels = {}
+        self._groups = {}
+
+    def add_message(self, channel_id: ChannelId, sender_id: Id, content: bytes) -> bool:
+        """
+        Добавляет сообщение в канал, создавая канал при его отсутствии.
+        Возвращает True, если канал создан.
+
+        :param channel_id: ID канала
+        :param sender_id: ID отправителя
+        :param content: содержимое сообщения
+        """
+
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            created = channel is None
+
+            if created:
+                channel = self._channels[channel_id] = Channel(channel_id)
+
+            channel.add_message(Message(sender_id, content))
+
+        return created
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        with self._lock:
+            return dict(self._get_channel(channel_id).messages_count)
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            channel = self._get_channel(channel_id)
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count > len(channel)
+            ):
+                raise InvalidRangeException()
+
+            return channel.get_messages(first_message_index, count)
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._lock:
+            channel = self._get_channel(channel_id)
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            if (
+                message_id < 0
+                or message_id >= len(channel)
+                or channel.senders[message_id] != keys_owner_id
+            ):
+                raise InvalidIdException()
+
+            channel.encryption_keys_messages[keys_owner_id] = message_id
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        with self._lock:
+            channel = self._get_channel(channel_id)
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            return channel.encryption_keys_messages.get(keys_owner_id)
+
+    def create_group(self, group_id: Id, members: list[Id]):
+        """
+        Создаёт группу с заданными ID и участниками.
+
+        :param group_id: ID группы
+        :param members: ID участников
+        """
+
+        with self._lock:
+            self._groups[group_id] = Group(group_id, members)
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        with self._lock:
+            return list(self._get_group(group_id).members)
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._lock:
+            self._get_group(group_id).add_message(sender_id, content)
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        with self._lock:
+            return len(self._get_group(group_id))
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            group = self._get_group(group_id)
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count > len(group)
+            ):
+                raise InvalidRangeException()
+
+            return group.get_messages(first_message_index, count)
+
+    def _get_group(self, group_id: Id) -> Group:
+        if (group := self._groups.get(group_id)) is None:
+            raise GroupNotExistsException()
+
+        return group
+
+    def _get_channel(self, channel_id: ChannelId) -> Channel:
+        if (channel := self._channels.get(channel_id)) is None:
+            raise ChannelNotExistsException()
+
+        return channel
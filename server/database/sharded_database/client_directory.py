@@ -0,0 +1,98 @@
+from threading import Lock
+from typing import Final
+
+from model import Id, random_id
+
+from ..exceptions import ClientNotExistsException
+
+
+class ClientDirectory:
+    """
+    Данные клиентов ``ShardedDatabase``: пароли, собеседники и группы каждого клиента.
+    Выполняется в отдельном процессе, методы вызываются из потоков менеджера.
+    """
+
+    _lock: Final[Lock]
+    _passwords: Final[dict[Id, bytes]]
+    _peers: Final[dict[Id, list[Id]]]
+    """
+    ID собеседников каждого клиента в порядке создания каналов.
+    """
+
+    _groups: Final[dict[Id, list[Id]]]
+    """
+    ID групп каждого клиента в порядке создания.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._passwords = {}
+        self._peers = {}
+        self._groups = {}
+
+    def register_client(self, password: bytes) -> Id:
+        id = random_id()
+
+        with self._lock:
+            self._passwords[id] = password
+
+        return id
+
+    def delete_client(self, id: Id):
+        with self._lock:
+            if id not in self._passwords:
+                raise ClientNotExistsException()
+
+            del self._passwords[id]
+            self._peers.pop(id, None)
+            self._groups.pop(id, None)
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return self._passwords[client_id] == password
+
+    def check_clients_exist(self, *client_ids: Id):
+        """
+        Выбрасывает ``ClientNotExistsException``, если один из клиентов не существует.
+        """
+
+        with self._lock:
+            if any(client_id not in self._passwords for client_id in client_ids):
+                raise ClientNotExistsException()
+
+    def add_peers(self, first_client_id: Id, second_client_id: Id):
+        """
+        Запоминает, что между клиентами создан канал.
+        """
+
+        with self._lock:
+            self._peers.setdefault(first_client_id, []).append(second_client_id)
+
+            if first_client_id != second_client_id:
+                self._peers.setdefault(second_client_id, []).append(first_client_id)
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return list(self._peers.get(client_id, ()))
+
+    def add_group(self, group_id: Id, members: list[Id]):
+        """
+        Запоминает, что клиенты ``members`` - участники группы.
+        """
+
+        with self._lock:
+            for client_id in members:
+                self._groups.setdefault(client_id, []).append(group_id)
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            if client_id not in self._passwords:
+                raise ClientNotExistsException()
+
+            return list(self._groups.get(client_id, ()))
@@ -0,0 +1,176 @@
+from multiprocessing.managers import BaseManager
+from typing import Final, Optional
+
+from model import ChannelId, Id, Message, random_id
+
+from ..database import Database
+from .channel_shard import ChannelShard
+from .client_directory import ClientDirectory
+
+
+class _ShardManager(BaseManager):
+    """
+    Процесс, в котором выполняется один ``ChannelShard`` или ``ClientDirectory``.
+    Исключения методов передаются вызывающему.
+    """
+
+
+_ShardManager.register(
+    "ChannelShard",
+    ChannelShard,
+    exposed=[
+        "add_message",
+        "get_messages_count",
+        "get_messages",
+        "set_encryption_keys_message",
+        "get_encryption_keys_message",
+        "create_group",
+        "get_group_members",
+        "add_group_message",
+        "get_group_messages_count",
+        "get_group_messages",
+    ],
+)
+_ShardManager.register(
+    "ClientDirectory",
+    ClientDirectory,
+    exposed=[
+        "register_client",
+        "delete_client",
+        "check_password",
+        "check_clients_exist",
+        "add_peers",
+        "get_channel_peers",
+        "add_group",
+        "get_client_groups",
+    ],
+)
+
+
+class ShardedDatabase(Database):
+    """
+    Реализация ``Database``, каналы которой распределены по ``shards``
+    процессам-шардам по хешу ``ChannelId``, а пароли и собеседники клиентов
+    хранятся в отдельном процессе ``ClientDirectory``. Операции разных
+    каналов выполняются разными процессами и поэтому - на разных ядрах.
+
+    ``add_message`` обращается к ``ClientDirectory`` для проверки клиентов
+    и к шарду канала, а при создании канала - ещё раз к ``ClientDirectory``;
+    остальные операции с каналами - только к шарду. Группы распределяются
+    по шардам по хешу своего ID.
+
+    Как и ``MemoryDatabase``, не сохраняет данные между перезапусками.
+    Методы можно вызывать из нескольких потоков: у каждого потока
+    собственное подключение к каждому процессу.
+    """
+
+    threadsafe = True
+
+    _managers: Final[list[_ShardManager]]
+    _directory: Final[ClientDirectory]
+    _shards: Final[list[ChannelShard]]
+
+    def __init__(self, shards: int):
+        """
+        :param shards: количество процессов-шардов каналов
+        """
+
+        self._managers = []
+
+        for _ in range(shards + 1):
+            manager = _ShardManager()
+            manager.start()
+
+            self._managers.append(manager)
+
+        self._directory = self._managers[0].ClientDirectory()
+        self._shards = [manager.ChannelShard() for manager in self._managers[1:]]
+
+    def close(self):
+        """
+        Завершает процессы шардов, их данные теряются.
+        """
+
+        for manager in self._managers:
+            manager.shutdown()
+
+    def register_client(self, password: bytes) -> Id:
+        return self._directory.register_client(password)
+
+    def delete_client(self, id: Id):
+        self._directory.delete_client(id)
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        return self._directory.check_password(client_id, password)
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        self._directory.check_clients_exist(sender_id, receiver_id)
+
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+
+        if self._shard(channel_id).add_message(channel_id, sender_id, content):
+            self._directory.add_peers(*channel_id.clients)
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        return self._shard(channel_id).get_messages_count(channel_id)
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        return self._shard(channel_id).get_messages(
+            channel_id, first_message_index, count
+        )
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        return self._directory.get_channel_peers(client_id)
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        self._shard(channel_id).set_encryption_keys_message(
+            channel_id, keys_owner_id, message_id
+        )
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        return self._shard(channel_id).get_encryption_keys_message(
+            channel_id, keys_owner_id
+        )
+
+    def create_group(self, members: list[Id]) -> Id:
+        members = list(dict.fromkeys(members))
+
+        self._directory.check_clients_exist(*members)
+
+        id = random_id()
+
+        self._group_shard(id).create_group(id, members)
+        self._directory.add_group(id, members)
+
+        return id
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        return self._group_shard(group_id).get_group_members(group_id)
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        return self._directory.get_client_groups(client_id)
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        self._group_shard(group_id).add_group_message(group_id, sender_id, content)
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        return self._group_shard(group_id).get_group_messages_count(group_id)
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        return self._group_shard(group_id).get_group_messages(
+            group_id, first_message_index, count
+        )
+
+    def _shard(self, channel_id: ChannelId) -> ChannelShard:
+        return self._shards[hash(channel_id.clients) % len(self._shards)]
+
+    def _group_shard(self, group_id: Id) -> ChannelShard:
+        return self._shards[hash(group_id) % len(self._shards)]
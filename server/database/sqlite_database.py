@@ -0,0 +1,552 @@
+from sqlite3 import Connection, connect
+from threading import Condition, Lock, Thread
+from time import sleep
+from typing import Final, Optional
+
+from model import ChannelId, Id, Message, random_id
+
+from .database import Database
+from .exceptions import (
+    ChannelNotExistsException,
+    ClientNotExistsException,
+    GroupNotExistsException,
+    InvalidIdException,
+    InvalidRangeException,
+)
+
+_MIN_INTEGER: Final[int] = -(2**63)
+_MAX_INTEGER: Final[int] = 2**63 - 1
+
+
+def _fits(value: int) -> bool:
+    """
+    Проверяет, что число помещается в INTEGER SQLite (64 бита со знаком).
+    Клиентов, каналов, групп и сообщений с другими ID не существует,
+    а передача такого числа в запрос вызывает ``OverflowError``.
+    """
+
+    return _MIN_INTEGER <= value <= _MAX_INTEGER
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY,
+    password BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY,
+    first_client INTEGER NOT NULL,
+    second_client INTEGER NOT NULL,
+    first_client_messages INTEGER NOT NULL DEFAULT 0,
+    second_client_messages INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (first_client, second_client)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    channel INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    sender INTEGER NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (channel, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS peers (
+    client INTEGER NOT NULL,
+    peer INTEGER NOT NULL,
+    PRIMARY KEY (client, peer)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS encryption_keys_messages (
+    channel INTEGER NOT NULL,
+    keys_owner INTEGER NOT NULL,
+    message INTEGER NOT NULL,
+    PRIMARY KEY (channel, keys_owner)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS group_channels (
+    number INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL UNIQUE,
+    messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_number INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    client INTEGER NOT NULL,
+    PRIMARY KEY (group_number, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS group_members_client
+    ON group_members (client, group_number);
+CREATE TABLE IF NOT EXISTS group_messages (
+    group_number INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    sender INTEGER NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (group_number, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteDatabase(Database):
+    """
+    Реализация ``Database`` в файле SQLite в режиме WAL.
+
+    Изменения накапливаются в одной транзакции и фиксируются группой:
+    не позже чем через ``commit_interval`` секунд после первого изменения
+    или при накоплении ``max_batch`` изменений. Поэтому ``add_message``
+    не ждёт записи на диск, а при сбое теряются изменения
+    не более чем за ``commit_interval`` секунд. Чтение видит
+    и незафиксированные изменения.
+
+    Методы можно вызывать из нескольких потоков.
+    """
+
+    threadsafe = True
+
+    _connection: Final[Connection]
+    _lock: Final[Lock]
+    _has_pending_changes: Final[Condition]
+    _commit_interval: Final[float]
+    _max_batch: Final[int]
+    _pending_changes: int
+    _closed: bool
+
+    def __init__(self, path: str, commit_interval: float = 0.01, max_batch: int = 1024):
+        """
+        :param path: путь к файлу базы данных
+        :param commit_interval: наибольшее время до фиксации изменения в секундах
+        :param max_batch: количество изменений, при накоплении которого
+            транзакция фиксируется сразу (1 - фиксировать каждое изменение)
+        """
+
+        self._connection = connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = Lock()
+        self._has_pending_changes = Condition(self._lock)
+        self._commit_interval = commit_interval
+        self._max_batch = max_batch
+        self._pending_changes = 0
+        self._closed = False
+
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(_SCHEMA)
+
+        Thread(target=self._commit_periodically, daemon=True).start()
+
+    def flush(self):
+        """
+        Фиксирует накопленные изменения.
+        """
+
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """
+        Фиксирует накопленные изменения и закрывает базу данных.
+        """
+
+        with self._lock:
+            self._commit()
+
+            self._closed = True
+            self._has_pending_changes.notify()
+            self._connection.close()
+
+    def register_client(self, password: bytes) -> Id:
+        id = random_id()
+
+        with self._lock:
+            self._begin_change()
+            self._connection.execute(
+                "INSERT INTO clients (id, password) VALUES (?, ?)", (id, password)
+            )
+            self._end_change()
+
+        return id
+
+    def delete_client(self, id: Id):
+        with self._lock:
+            self._check_client_exists(id)
+
+            self._begin_change()
+            self._connection.execute("DELETE FROM clients WHERE id = ?", (id,))
+            self._connection.execute("DELETE FROM peers WHERE client = ?", (id,))
+            self._end_change()
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        if not _fits(client_id):
+            raise ClientNotExistsException()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT password FROM clients WHERE id = ?", (client_id,)
+            ).fetchone()
+
+        if row is None:
+            raise ClientNotExistsException()
+
+        return row[0] == password
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        with self._lock:
+            self._add_message(sender_id, receiver_id, content)
+            self._end_change()
+
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        results = []
+
+        with self._lock:
+            for receiver_id, content in messages:
+                try:
+                    self._add_message(sender_id, receiver_id, content)
+                except ClientNotExistsException:
+                    results.append(False)
+                else:
+                    results.append(True)
+
+            if any(results):
+                self._end_change()
+
+        return results
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        with self._lock:
+            row = self._select_channel(channel_id)
+
+        if row is None:
+            raise ChannelNotExistsException()
+
+        messages_count = {channel_id.clients[0]: row[1]}
+        messages_count[channel_id.clients[1]] = (
+            messages_count.get(channel_id.clients[1], 0) + row[2]
+        )
+
+        return messages_count
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            row = self._select_channel(channel_id)
+
+            if row is None:
+                raise ChannelNotExistsException()
+
+            channel, first_client_messages, second_client_messages = row
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count
+                > first_client_messages + second_client_messages
+            ):
+                raise InvalidRangeException()
+
+            rows = self._connection.execute(
+                "SELECT sender, content FROM messages"
+                " WHERE channel = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (channel, first_message_index, first_message_index + count),
+            ).fetchall()
+
+        return [Message(sender, content) for sender, content in rows]
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            self._check_client_exists(client_id)
+
+            rows = self._connection.execute(
+                "SELECT peer FROM peers WHERE client = ?", (client_id,)
+            ).fetchall()
+
+        return [peer for peer, in rows]
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._lock:
+            row = self._select_channel(channel_id)
+
+            if row is None:
+                raise ChannelNotExistsException()
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            if not _fits(message_id):
+                raise InvalidIdException()
+
+            sender = self._connection.execute(
+                "SELECT sender FROM messages WHERE channel = ? AND seq = ?",
+                (row[0], message_id),
+            ).fetchone()
+
+            if sender is None or sender[0] != keys_owner_id:
+                raise InvalidIdException()
+
+            self._begin_change()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO encryption_keys_messages"
+                " (channel, keys_owner, message) VALUES (?, ?, ?)",
+                (row[0], keys_owner_id, message_id),
+            )
+            self._end_change()
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        with self._lock:
+            row = self._select_channel(channel_id)
+
+            if row is None:
+                raise ChannelNotExistsException()
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            message = self._connection.execute(
+                "SELECT message FROM encryption_keys_messages"
+                " WHERE channel = ? AND keys_owner = ?",
+                (row[0], keys_owner_id),
+            ).fetchone()
+
+        return None if message is None else message[0]
+
+    def create_group(self, members: list[Id]) -> Id:
+        members = list(dict.fromkeys(members))
+        id = random_id()
+
+        with self._lock:
+            for client_id in members:
+                self._check_client_exists(client_id)
+
+            self._begin_change()
+
+            number = self._connection.execute(
+                "INSERT INTO group_channels (id) VALUES (?)", (id,)
+            ).lastrowid
+            self._connection.executemany(
+                "INSERT INTO group_members (group_number, position, client)"
+                " VALUES (?, ?, ?)",
+                (
+                    (number, position, client_id)
+                    for position, client_id in enumerate(members)
+                ),
+            )
+
+            self._end_change()
+
+        return id
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        with self._lock:
+            number, _ = self._select_group(group_id)
+
+            rows = self._connection.execute(
+                "SELECT client FROM group_members WHERE group_number = ?"
+                " ORDER BY position",
+                (number,),
+            ).fetchall()
+
+        return [client_id for client_id, in rows]
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            self._check_client_exists(client_id)
+
+            rows = self._connection.execute(
+                "SELECT group_channels.id FROM group_members"
+                " JOIN group_channels ON group_channels.number = group_number"
+                " WHERE client = ? ORDER BY group_number",
+                (client_id,),
+            ).fetchall()
+
+        return [group_id for group_id, in rows]
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._lock:
+            number, messages = self._select_group(group_id)
+
+            if (
+                not _fits(sender_id)
+                or self._connection.execute(
+                    "SELECT 1 FROM group_members WHERE client = ? AND group_number = ?",
+                    (sender_id, number),
+                ).fetchone()
+                is None
+            ):
+                raise ClientNotExistsException()
+
+            self._begin_change()
+            self._connection.execute(
+                "INSERT INTO group_messages (group_number, seq, sender, content)"
+                " VALUES (?, ?, ?, ?)",
+                (number, messages, sender_id, content),
+            )
+            self._connection.execute(
+                "UPDATE group_channels SET messages = messages + 1 WHERE number = ?",
+                (number,),
+            )
+            self._end_change()
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        with self._lock:
+            return self._select_group(group_id)[1]
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            number, messages = self._select_group(group_id)
+
+            if (
+                first_message_index < 0
+                or count < 0
+                or first_message_index + count > messages
+            ):
+                raise InvalidRangeException()
+
+            rows = self._connection.execute(
+                "SELECT sender, content FROM group_messages"
+                " WHERE group_number = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (number, first_message_index, first_message_index + count),
+            ).fetchall()
+
+        return [Message(sender, content) for sender, content in rows]
+
+    def _select_group(self, group_id: Id) -> tuple[int, int]:
+        """
+        Возвращает внутренний номер группы и количество её сообщений.
+
+        :param group_id: ID группы
+        """
+
+        if not _fits(group_id):
+            raise GroupNotExistsException()
+
+        row = self._connection.execute(
+            "SELECT number, messages FROM group_channels WHERE id = ?", (group_id,)
+        ).fetchone()
+
+        if row is None:
+            raise GroupNotExistsException()
+
+        return row
+
+    def _select_channel(self, channel_id: ChannelId) -> Optional[tuple[int, int, int]]:
+        """
+        Возвращает внутренний ID канала и количество сообщений каждого участника.
+
+        :param channel_id: ID канала
+        """
+
+        if not all(map(_fits, channel_id.clients)):
+            return None
+
+        return self._connection.execute(
+            "SELECT id, first_client_messages, second_client_messages FROM channels"
+            " WHERE first_client = ? AND second_client = ?",
+            channel_id.clients,
+        ).fetchone()
+
+    def _add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        """
+        Добавляет сообщение в транзакцию, не учитывая изменение.
+        Вызывается под ``_lock``.
+        """
+
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+
+        self._check_client_exists(sender_id)
+        self._check_client_exists(receiver_id)
+
+        self._begin_change()
+
+        row = self._select_channel(channel_id)
+
+        if row is None:
+            channel = self._connection.execute(
+                "INSERT INTO channels (first_client, second_client) VALUES (?, ?)",
+                channel_id.clients,
+            ).lastrowid
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO peers (client, peer) VALUES (?, ?)",
+                ((sender_id, receiver_id), (receiver_id, sender_id)),
+            )
+            seq = 0
+        else:
+            channel, first_client_messages, second_client_messages = row
+            seq = first_client_messages + second_client_messages
+
+        self._connection.execute(
+            "INSERT INTO messages (channel, seq, sender, content)"
+            " VALUES (?, ?, ?, ?)",
+            (channel, seq, sender_id, content),
+        )
+
+        if sender_id == channel_id.clients[0]:
+            self._connection.execute(
+                "UPDATE channels"
+                " SET first_client_messages = first_client_messages + 1"
+                " WHERE id = ?",
+                (channel,),
+            )
+        else:
+            self._connection.execute(
+                "UPDATE channels"
+                " SET second_client_messages = second_client_messages + 1"
+                " WHERE id = ?",
+                (channel,),
+            )
+
+    def _check_client_exists(self, client_id: Id):
+        if (
+            not _fits(client_id)
+            or self._connection.execute(
+                "SELECT 1 FROM clients WHERE id = ?", (client_id,)
+            ).fetchone()
+            is None
+        ):
+            raise ClientNotExistsException()
+
+    def _begin_change(self):
+        """
+        Открывает транзакцию, если она ещё не открыта. Вызывается под ``_lock``.
+        """
+
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN IMMEDIATE")
+
+    def _end_change(self):
+        """
+        Учитывает изменение и фиксирует транзакцию, если накоплено ``max_batch``
+        изменений, иначе будит поток периодической фиксации. Вызывается под ``_lock``.
+        """
+
+        self._pending_changes += 1
+
+        if self._pending_changes >= self._max_batch:
+            self._commit()
+        elif self._pending_changes == 1:
+            self._has_pending_changes.notify()
+
+    def _commit(self):
+        """
+        Вызывается под ``_lock``.
+        """
+
+        if self._connection.in_transaction:
+            self._connection.execute("COMMIT")
+
+        self._pending_changes = 0
+
+    def _commit_periodically(self):
+        while True:
+            with self._lock:
+                while self._pending_changes == 0 and not self._closed:
+                    self._has_pending_changes.wait()
+
+                if self._closed:
+                    return
+
+            sleep(self._commit_interval)
+
+            with self._lock:
+                if not self._closed:
+                    self._commit()
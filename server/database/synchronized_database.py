@@ -0,0 +1,109 @@
+from threading import Lock
+from typing import Final, Optional
+
+from model import ChannelId, Id, Message
+
+from .database import Database
+
+
+class SynchronizedDatabase(Database):
+    """
+    Обёртка, выполняющая каждый вызов базы данных под блокировкой.
+    Позволяет использовать не потокобезопасную реализацию ``Database``
+    из нескольких потоков.
+    """
+
+    threadsafe = True
+
+    _database: Final[Database]
+    _lock: Final[Lock]
+
+    def __init__(self, database: Database):
+        """
+        :param database: оборачиваемая база данных
+        """
+
+        self._database = database
+        self._lock = Lock()
+
+    @property
+    def nonblocking(self) -> bool:
+        return self._database.nonblocking
+
+    def register_client(self, password: bytes) -> Id:
+        with self._lock:
+            return self._database.register_client(password)
+
+    def delete_client(self, id: Id):
+        with self._lock:
+            self._database.delete_client(id)
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        with self._lock:
+            return self._database.check_password(client_id, password)
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        with self._lock:
+            self._database.add_message(sender_id, receiver_id, content)
+
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        with self._lock:
+            return self._database.add_messages(sender_id, messages)
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        with self._lock:
+            return dict(self._database.get_messages_count(channel_id))
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            return self._database.get_messages(channel_id, first_message_index, count)
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            return self._database.get_channel_peers(client_id)
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._lock:
+            self._database.set_encryption_keys_message(
+                channel_id, keys_owner_id, message_id
+            )
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        with self._lock:
+            return self._database.get_encryption_keys_message(channel_id, keys_owner_id)
+
+    def create_group(self, members: list[Id]) -> Id:
+        with self._lock:
+            return self._database.create_group(members)
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        with self._lock:
+            return list(self._database.get_group_members(group_id))
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            return self._database.get_client_groups(client_id)
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._lock:
+            self._database.add_group_message(group_id, sender_id, content)
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        with self._lock:
+            return self._database.get_group_messages_count(group_id)
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            return self._database.get_group_messages(
+                group_id, first_message_index, count
+            )
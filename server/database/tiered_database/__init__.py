@@ -0,0 +1 @@
+from .tiered_database import TieredDatabase
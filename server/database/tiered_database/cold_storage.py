@@ -0,0 +1,124 @@
+from contextlib import suppress
+from os import remove
+from sqlite3 import Connection, connect
+from threading import Lock
+from typing import Final, Iterable
+
+from model import Id, Message
+
+_SCHEMA = """
+CREATE TABLE messages (
+    channel INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    sender INTEGER NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (channel, seq)
+) WITHOUT ROWID;
+"""
+
+_FILE_SUFFIXES: Final[tuple[str, ...]] = ("", "-wal", "-shm")
+
+
+class ColdStorage:
+    """
+    Файл SQLite с сообщениями каналов, перенесёнными из памяти на диск.
+    Каналы обозначаются числами, выданными ``TieredDatabase``, поэтому
+    после перезапуска содержимое не нужно: файл создаётся заново при открытии,
+    а записи на диск не ожидаются.
+
+    Запись и чтение выполняются через разные соединения и не блокируют
+    друг друга. Методы можно вызывать из нескольких потоков.
+    """
+
+    _path: Final[str]
+    _writer: Final[Connection]
+    _writer_lock: Final[Lock]
+    _reader: Final[Connection]
+    _reader_lock: Final[Lock]
+
+    def __init__(self, path: str):
+        """
+        :param path: путь к файлу, существующий файл удаляется
+        """
+
+        self._path = path
+
+        self._remove_files()
+
+        self._writer = connect(path, isolation_level=None, check_same_thread=False)
+        self._writer_lock = Lock()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = OFF")
+        self._writer.executescript(_SCHEMA)
+
+        self._reader = connect(path, isolation_level=None, check_same_thread=False)
+        self._reader_lock = Lock()
+
+    def append(self, messages: Iterable[tuple[int, int, Id, bytes]]):
+        """
+        Записывает сообщения одной транзакцией.
+
+        :param messages: номер канала, индекс, отправитель и содержимое
+            каждого сообщения
+        """
+
+        with self._writer_lock:
+            self._writer.execute("BEGIN")
+            self._writer.executemany(
+                "INSERT INTO messages (channel, seq, sender, content)"
+                " VALUES (?, ?, ?, ?)",
+                messages,
+            )
+            self._writer.execute("COMMIT")
+
+    def get_messages(
+        self, channel: int, first_message_index: int, count: int
+    ) -> list[Message]:
+        """
+        Возвращает сообщения из заданного диапазона, диапазон не проверяется.
+
+        :param channel: номер канала
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        """
+
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT sender, content FROM messages"
+                " WHERE channel = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (channel, first_message_index, first_message_index + count),
+            ).fetchall()
+
+        return [Message(sender, content) for sender, content in rows]
+
+    def get_sender(self, channel: int, message_index: int) -> Id:
+        """
+        Возвращает ID отправителя сообщения.
+
+        :param channel: номер канала
+        :param message_index: индекс сообщения
+        """
+
+        with self._reader_lock:
+            (sender,) = self._reader.execute(
+                "SELECT sender FROM messages WHERE channel = ? AND seq = ?",
+                (channel, message_index),
+            ).fetchone()
+
+        return sender
+
+    def close(self):
+        """
+        Закрывает и удаляет файл.
+        """
+
+        with self._reader_lock, self._writer_lock:
+            self._reader.close()
+            self._writer.close()
+
+        self._remove_files()
+
+    def _remove_files(self):
+        for suffix in _FILE_SUFFIXES:
+            with suppress(FileNotFoundError):
+                remove(self._path + suffix)
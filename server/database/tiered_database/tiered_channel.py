@@ -0,0 +1,65 @@
+from array import array
+from typing import Final
+
+from model import ChannelId, Message
+
+from ..memory_database.channel import Channel
+
+
+class TieredChannel(Channel):
+    """
+    Канал, первые ``cold_messages_count`` сообщений которого перенесены
+    на диск; в массивах ``Channel`` хранятся только остальные.
+    Индексы сообщений в методах - сквозные, с учётом перенесённых.
+    """
+
+    storage_id: Final[int]
+    """
+    Номер канала в ``ColdStorage``.
+    """
+
+    cold_messages_count: int
+
+    def __init__(self, id: ChannelId, storage_id: int):
+        super().__init__(id)
+
+        self.storage_id = storage_id
+        self.cold_messages_count = 0
+
+    def __len__(self) -> int:
+        return self.cold_messages_count + len(self.senders)
+
+    def get_messages(self, first_message_index: int, count: int) -> list[Message]:
+        """
+        Возвращает сообщения, находящиеся в памяти, диапазон не проверяется.
+
+        :param first_message_index: индекс первого сообщения,
+            не меньше ``cold_messages_count``
+        :param count: количество сообщений
+        """
+
+        return super().get_messages(
+            first_message_index - self.cold_messages_count, count
+        )
+
+    def hot_size(self) -> int:
+        """
+        Возвращает объём содержимого сообщений в памяти в байтах.
+        """
+
+        return len(self.contents)
+
+    def drop_cold(self, count: int):
+        """
+        Удаляет из памяти первые ``count`` сообщений, уже записанные на диск.
+
+        :param count: количество сообщений
+        """
+
+        base = self.offsets[count]
+
+        del self.senders[:count]
+        del self.contents[:base]
+
+        self.offsets[:] = array("Q", [offset - base for offset in self.offsets[count:]])
+        self.cold_messages_count += count
@@ -0,0 +1,396 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import count as count_from
+from threading import Lock, Thread
+from time import sleep
+from typing import Final, Iterator, Optional
+
+from model import ChannelId, Id, Message
+
+from ..exceptions import (
+    ChannelNotExistsException,
+    ClientNotExistsException,
+    InvalidIdException,
+    InvalidRangeException,
+)
+from ..memory_database import MemoryDatabase
+from .cold_storage import ColdStorage
+from .tiered_channel import TieredChannel
+
+READ_BLOCK_SIZE: Final[int] = 64
+"""
+Количество сообщений в блоке кэша прочитанных с диска сообщений.
+"""
+
+_MESSAGE_OVERHEAD: Final[int] = 160
+"""
+Приблизительный объём объекта ``Message`` без содержимого в байтах,
+учитывается в объёме кэша прочитанных с диска сообщений.
+"""
+
+
+class TieredDatabase(MemoryDatabase):
+    """
+    ``MemoryDatabase``, в памяти которой остаются только последние
+    сообщения каждого канала: не больше ``hot_messages`` сообщений
+    и ``hot_size`` байт содержимого. Более старые сообщения фоновый поток
+    раз в ``move_interval`` секунд переносит в ``ColdStorage``,
+    поэтому занимаемая память не зависит от объёма истории.
+
+    ``get_messages`` читает диапазон из памяти и с диска одинаково;
+    недавно прочитанные с диска блоки сообщений хранятся в LRU-кэше
+    объёмом ``read_cache_size`` байт.
+
+    Сообщения групп всегда хранятся в памяти.
+
+    Как и ``MemoryDatabase``, не сохраняет данные между перезапусками.
+    Методы можно вызывать из нескольких потоков.
+    """
+
+    nonblocking = False
+    threadsafe = True
+
+    _cold_storage: Final[ColdStorage]
+    _hot_messages: Final[int]
+    _hot_size: Final[int]
+    _read_cache_size: Final[int]
+    _lock: Final[Lock]
+    _move_lock: Final[Lock]
+    _storage_ids: Final[Iterator[int]]
+    _overflowing_channels: Final[set[ChannelId]]
+    """
+    Каналы, в памяти которых сообщений больше, чем допускается.
+    """
+
+    _read_cache_lock: Final[Lock]
+    _read_cache: Final[OrderedDict[tuple[int, int], list[Message]]]
+    """
+    Прочитанные с диска блоки в порядке использования,
+    ключ - номер канала в ``ColdStorage`` и номер блока.
+    """
+
+    _read_cache_used: int
+    _closed: bool
+
+    def __init__(
+        self,
+        path: str,
+        hot_messages: int = 1024,
+        hot_size: int = 256 * 1024,
+        read_cache_size: int = 64 * 1024 * 1024,
+        move_interval: float = 0.1,
+    ):
+        """
+        :param path: путь к файлу ``ColdStorage``, существующий файл удаляется
+        :param hot_messages: наибольшее количество сообщений канала в памяти
+        :param hot_size: наибольший объём содержимого сообщений канала
+            в памяти в байтах
+        :param read_cache_size: объём кэша прочитанных с диска сообщений в байтах
+        :param move_interval: период переноса сообщений на диск в секундах
+        """
+
+        super().__init__()
+
+        self._cold_storage = ColdStorage(path)
+        self._hot_messages = hot_messages
+        self._hot_size = hot_size
+        self._read_cache_size = read_cache_size
+        self._lock = Lock()
+        self._move_lock = Lock()
+        self._storage_ids = count_from()
+        self._overflowing_channels = set()
+        self._read_cache_lock = Lock()
+        self._read_cache = OrderedDict()
+        self._read_cache_used = 0
+        self._closed = False
+
+        Thread(
+            target=self._move_periodically, args=(move_interval,), daemon=True
+        ).start()
+
+    def close(self):
+        """
+        Останавливает перенос сообщений и удаляет файл ``ColdStorage``.
+        """
+
+        with self._move_lock:
+            self._closed = True
+            self._cold_storage.close()
+
+    def move_to_cold_storage(self):
+        """
+        Переносит на диск сообщения, не умещающиеся в памяти.
+        Запись на диск выполняется без блокировки остальных методов.
+        """
+
+        with self._move_lock:
+            if self._closed:
+                return
+
+            with self._lock:
+                moves = [
+                    self._prepare_move(self._channels[channel_id])
+                    for channel_id in self._overflowing_channels
+                ]
+
+                self._overflowing_channels.clear()
+
+            if len(moves) == 0:
+                return
+
+            self._cold_storage.append(
+                message for _, _, messages in moves for message in messages
+            )
+
+            with self._lock:
+                for channel, messages_count, _ in moves:
+                    channel.drop_cold(messages_count)
+
+    def register_client(self, password: bytes) -> Id:
+        with self._lock:
+            return super().register_client(password)
+
+    def delete_client(self, id: Id):
+        with self._lock:
+            super().delete_client(id)
+
+    def check_password(self, client_id: Id, password: bytes) -> bool:
+        with self._lock:
+            return super().check_password(client_id, password)
+
+    def add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        with self._lock:
+            self._add_message(sender_id, receiver_id, content)
+
+    def add_messages(
+        self, sender_id: Id, messages: list[tuple[Id, bytes]]
+    ) -> list[bool]:
+        results = []
+
+        with self._lock:
+            for receiver_id, content in messages:
+                try:
+                    self._add_message(sender_id, receiver_id, content)
+                except ClientNotExistsException:
+                    results.append(False)
+                else:
+                    results.append(True)
+
+        return results
+
+    def get_messages_count(self, channel_id: ChannelId) -> dict[Id, int]:
+        with self._lock:
+            return dict(super().get_messages_count(channel_id))
+
+    def get_messages(
+        self, channel_id: ChannelId, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            channel = self._channels[channel_id]
+            end_index = first_message_index + count
+
+            if first_message_index < 0 or count < 0 or end_index > len(channel):
+                raise InvalidRangeException()
+
+            cold_messages_count = channel.cold_messages_count
+            hot_index = max(first_message_index, cold_messages_count)
+            hot_messages = (
+                channel.get_messages(hot_index, end_index - hot_index)
+                if end_index > hot_index
+                else []
+            )
+
+        if first_message_index >= cold_messages_count:
+            return hot_messages
+
+        # перенесённые на диск сообщения не изменяются, поэтому читаются без _lock
+        return (
+            self._read_cold(
+                channel.storage_id,
+                cold_messages_count,
+                first_message_index,
+                min(end_index, cold_messages_count),
+            )
+            + hot_messages
+        )
+
+    def get_channel_peers(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            return super().get_channel_peers(client_id)
+
+    def set_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id, message_id: Id
+    ):
+        with self._lock:
+            if channel_id not in self._channels:
+                raise ChannelNotExistsException()
+
+            channel = self._channels[channel_id]
+
+            if keys_owner_id not in channel_id.clients:
+                raise ClientNotExistsException()
+
+            if message_id < 0 or message_id >= len(channel):
+                raise InvalidIdException()
+
+            if message_id < channel.cold_messages_count:
+                sender = self._cold_storage.get_sender(channel.storage_id, message_id)
+            else:
+                sender = channel.senders[message_id - channel.cold_messages_count]
+
+            if sender != keys_owner_id:
+                raise InvalidIdException()
+
+            channel.encryption_keys_messages[keys_owner_id] = message_id
+
+    def get_encryption_keys_message(
+        self, channel_id: ChannelId, keys_owner_id: Id
+    ) -> Optional[Id]:
+        with self._lock:
+            return super().get_encryption_keys_message(channel_id, keys_owner_id)
+
+    def create_group(self, members: list[Id]) -> Id:
+        with self._lock:
+            return super().create_group(members)
+
+    def get_group_members(self, group_id: Id) -> list[Id]:
+        with self._lock:
+            return super().get_group_members(group_id)
+
+    def get_client_groups(self, client_id: Id) -> list[Id]:
+        with self._lock:
+            return super().get_client_groups(client_id)
+
+    def add_group_message(self, group_id: Id, sender_id: Id, content: bytes):
+        with self._lock:
+            super().add_group_message(group_id, sender_id, content)
+
+    def get_group_messages_count(self, group_id: Id) -> int:
+        with self._lock:
+            return super().get_group_messages_count(group_id)
+
+    def get_group_messages(
+        self, group_id: Id, first_message_index: int, count: int
+    ) -> list[Message]:
+        with self._lock:
+            return super().get_group_messages(group_id, first_message_index, count)
+
+    def _add_message(self, sender_id: Id, receiver_id: Id, content: bytes):
+        """
+        Добавляет сообщение и отмечает переполненный канал. Вызывается под ``_lock``.
+        """
+
+        super().add_message(sender_id, receiver_id, content)
+
+        channel_id = ChannelId.from_ids((sender_id, receiver_id))
+        channel = self._channels[channel_id]
+
+        if (
+            len(channel.senders) > self._hot_messages
+            or channel.hot_size() > self._hot_size
+        ):
+            self._overflowing_channels.add(channel_id)
+
+    def _create_channel(self, channel_id: ChannelId) -> TieredChannel:
+        return TieredChannel(channel_id, next(self._storage_ids))
+
+    def _prepare_move(
+        self, channel: TieredChannel
+    ) -> tuple[TieredChannel, int, list[tuple[int, int, Id, bytes]]]:
+        """
+        Возвращает канал, количество переносимых сообщений и записи
+        для ``ColdStorage.append``. Вызывается под ``_lock``.
+        """
+
+        offsets = channel.offsets
+        messages_count = max(
+            len(channel.senders) - self._hot_messages,
+            bisect_left(offsets, offsets[-1] - self._hot_size),
+        )
+        contents = bytes(channel.contents[: offsets[messages_count]])
+
+        return (
+            channel,
+            messages_count,
+            [
+                (
+                    channel.storage_id,
+                    channel.cold_messages_count + i,
+                    channel.senders[i],
+                    contents[offsets[i] : offsets[i + 1]],
+                )
+                for i in range(messages_count)
+            ],
+        )
+
+    def _read_cold(
+        self,
+        storage_id: int,
+        cold_messages_count: int,
+        first_message_index: int,
+        end_index: int,
+    ) -> list[Message]:
+        """
+        Читает перенесённые на диск сообщения. Блоки, целиком
+        перенесённые на диск, читаются полностью и сохраняются в кэше.
+        """
+
+        messages = []
+        index = first_message_index
+
+        while index < end_index:
+            block_number = index // READ_BLOCK_SIZE
+            block_start = block_number * READ_BLOCK_SIZE
+            block_end = block_start + READ_BLOCK_SIZE
+            stop = min(end_index, block_end)
+
+            if block_end > cold_messages_count:
+                messages += self._cold_storage.get_messages(
+                    storage_id, index, stop - index
+                )
+            else:
+                block = self._read_block(storage_id, block_number)
+                messages += block[index - block_start : stop - block_start]
+
+            index = stop
+
+        return messages
+
+    def _read_block(self, storage_id: int, block_number: int) -> list[Message]:
+        key = (storage_id, block_number)
+
+        with self._read_cache_lock:
+            block = self._read_cache.get(key)
+
+            if block is not None:
+                self._read_cache.move_to_end(key)
+
+                return block
+
+        block = self._cold_storage.get_messages(
+            storage_id, block_number * READ_BLOCK_SIZE, READ_BLOCK_SIZE
+        )
+
+        with self._read_cache_lock:
+            if key not in self._read_cache:
+                self._read_cache[key] = block
+                self._read_cache_used += self._block_size(block)
+
+            while self._read_cache_used > self._read_cache_size:
+                _, evicted_block = self._read_cache.popitem(last=False)
+                self._read_cache_used -= self._block_size(evicted_block)
+
+        return block
+
+    @staticmethod
+    def _block_size(block: list[Message]) -> int:
+        return sum(len(message.content) + _MESSAGE_OVERHEAD for message in block)
+
+    def _move_periodically(self, interval: float):
+        while not self._closed:
+            sleep(interval)
+
+            self.move_to_cold_storage()
@@ -0,0 +1,150 @@
+from asyncio import AbstractEventLoop, Event, Queue, get_running_loop
+from contextlib import suppress
+from enum import Enum, auto
+from typing import Final
+
+from network import Packet, packets
+from network.streams.packet_stream import PacketStream
+from network.streams.stream import StreamClosedException
+
+from .metrics import ServerMetrics
+
+
+class SlowConsumerPolicy(Enum):
+    """
+    Действие при переполнении очереди доставки клиента.
+    """
+
+    BLOCK = auto()
+    """
+    Отправитель ждёт, пока в очереди освободится место.
+    """
+
+    DISCONNECT = auto()
+    """
+    Получатель отключается.
+    """
+
+    DROP = auto()
+    """
+    Сообщения перестают отправляться получателю, пока очередь не опустеет,
+    после чего он получает ``NewMessagesDropped`` и сам загружает пропущенное.
+    """
+
+
+class IncomingMessageQueue:
+    """
+    Ограниченная очередь уведомлений о новых сообщениях (``NewMessage``,
+    ``NewGroupMessage``), ожидающих отправки подключенному клиенту.
+    """
+
+    _stream: Final[PacketStream]
+    _queue: Final[Queue[Packet]]
+    _policy: Final[SlowConsumerPolicy]
+    _metrics: Final[ServerMetrics]
+    _space_available: Final[Event]
+    _dropping: bool
+    _discarded: bool
+
+    loop: Final[AbstractEventLoop]
+    """
+    Цикл событий, в котором создана очередь; ``put`` следует вызывать в нём.
+    """
+
+    def __init__(
+        self,
+        stream: PacketStream,
+        maxsize: int,
+        policy: SlowConsumerPolicy,
+        metrics: ServerMetrics,
+    ):
+        """
+        :param stream: поток пакетов получателя
+        :param maxsize: максимальная длина очереди (0 - без ограничения)
+        :param policy: действие при переполнении очереди
+        :param metrics: счётчики сервера
+        """
+
+        self._stream = stream
+        self._queue = Queue(maxsize)
+        self._policy = policy
+        self._metrics = metrics
+        self._space_available = Event()
+        self._dropping = False
+        self._discarded = False
+
+        self.loop = get_running_loop()
+
+    async def put(self, packet: Packet):
+        """
+        Добавляет уведомление в очередь, при её переполнении действует согласно политике.
+
+        :param packet: уведомление о новом сообщении
+        """
+
+        if self._dropping:
+            self._metrics.dropped_pushes += 1
+
+            return
+
+        if self._queue.full():
+            if self._policy == SlowConsumerPolicy.DROP:
+                self._metrics.dropped_pushes += 1
+                self._dropping = True
+
+                return
+            elif self._policy == SlowConsumerPolicy.DISCONNECT:
+                self._metrics.slow_consumer_disconnects += 1
+                self._stream.abort()
+
+                return
+
+            self._metrics.blocked_pushes += 1
+
+            while self._queue.full() and not self._discarded:
+                self._space_available.clear()
+                await self._space_available.wait()
+
+        if self._discarded:
+            return
+
+        self._queue.put_nowait(packet)
+        self._metrics.queued_messages += 1
+        self._metrics.max_queue_depth = max(
+            self._metrics.max_queue_depth, self._queue.qsize()
+        )
+
+    async def deliver(self):
+        """
+        Отправляет сообщения из очереди клиенту, пока поток не будет закрыт.
+        """
+
+        with suppress(StreamClosedException):
+            while True:
+                packet = await self._queue.get()
+                self._metrics.queued_messages -= 1
+                self._space_available.set()
+
+                await self._stream.write(packet)
+
+                if self._dropping and self._queue.empty():
+                    self._dropping = False
+
+                    await self._stream.write(packets.NewMessagesDropped())
+
+    def discard(self):
+        """
+        Отбрасывает неотправленные сообщения и освобождает ожидающих отправителей.
+        Вызывается после отключения клиента.
+        """
+
+        self._discarded = True
+        self._metrics.queued_messages -= self._queue.qsize()
+        self._space_available.set()
+
+    def depth(self) -> int:
+        """
+        Возвращает количество сообщений в очереди.
+        """
+
+        return self._queue.qsize()
@@ -0,0 +1,26 @@
+from asyncio import get_running_loop, sleep
+
+from .metrics import ServerMetrics
+
+
+async def monitor_loop_lag(metrics: ServerMetrics, interval: float):
+    """
+    Периодически измеряет задержку цикла событий: насколько позже
+    запланированного просыпается задача. Длительные синхронные операции
+    в потоке цикла событий увеличивают задержку для всех соединений.
+
+    :param metrics: метрики сервера, в которые записывается задержка
+    :param interval: период измерений в секундах
+    """
+
+    loop = get_running_loop()
+
+    while True:
+        start = loop.time()
+
+        await sleep(interval)
+
+        metrics.event_loop_lag = max(0.0, loop.time() - start - interval)
+        metrics.max_event_loop_lag = max(
+            metrics.max_event_loop_lag, metrics.event_loop_lag
+        )
@@ -0,0 +1,236 @@
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Final, Optional
+
+from model import ChannelId
+from network import WireFormat
+from network.packets import GetMessagesSuccess
+
+from .database import AsyncDatabase
+from .metrics import ServerMetrics
+
+BLOCK_SIZE: Final[int] = 64
+"""
+Количество сообщений в блоке кэша.
+"""
+
+
+class _Block:
+    contents: Final[bytearray]
+    """
+    Сериализованные сообщения подряд.
+    """
+
+    offsets: Final[array]
+    """
+    Границы сообщений в ``contents``, первый элемент - 0.
+    """
+
+    def __init__(self):
+        self.contents = bytearray()
+        self.offsets = array("I", (0,))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def size(self) -> int:
+        """
+        Возвращает занимаемый блоком объём в байтах.
+        """
+
+        return len(self.contents) + len(self.offsets) * self.offsets.itemsize
+
+    def extend(self, serialized_messages: list[bytes]):
+        for serialized_message in serialized_messages:
+            self.contents += serialized_message
+            self.offsets.append(len(self.contents))
+
+    def slice(self, start: int, stop: int) -> bytes:
+        return bytes(self.contents[self.offsets[start] : self.offsets[stop]])
+
+
+class MessageRangeCache:
+    """
+    LRU-кэш сериализованных сообщений каналов, ограниченный объёмом в байтах.
+    Сообщения канала хранятся блоками по ``BLOCK_SIZE``, отдельно
+    для каждого формата сериализации; ответ на ``GetMessages`` собирается
+    из блоков без повторного кодирования сообщений.
+
+    Сохранённые сообщения не изменяются и не удаляются, поэтому блоки
+    не нужно сбрасывать: последний неполный блок канала дописывается
+    при чтении, из базы данных загружается только недостающий конец диапазона.
+
+    Методы можно вызывать из нескольких потоков.
+    """
+
+    _database: Final[AsyncDatabase]
+    _max_size: Final[int]
+    _metrics: Final[ServerMetrics]
+    _lock: Final[Lock]
+    _blocks: Final[OrderedDict[tuple[ChannelId, WireFormat, int], _Block]]
+    """
+    Блоки в порядке использования, ключ - канал, формат и номер блока.
+    """
+
+    _size: int
+
+    def __init__(self, database: AsyncDatabase, max_size: int, metrics: ServerMetrics):
+        """
+        :param database: база данных
+        :param max_size: наибольший объём кэша в байтах
+        :param metrics: счётчики сервера
+        """
+
+        self._database = database
+        self._max_size = max_size
+        self._metrics = metrics
+        self._lock = Lock()
+        self._blocks = OrderedDict()
+        self._size = 0
+
+    def size(self) -> int:
+        """
+        Возвращает объём кэша в байтах.
+        """
+
+        with self._lock:
+            return self._size
+
+    async def get_messages(
+        self,
+        channel_id: ChannelId,
+        first_message_index: int,
+        count: int,
+        wire_format: WireFormat,
+    ) -> bytes:
+        """
+        Возвращает сообщения диапазона, сериализованные подряд
+        (см. ``GetMessagesSuccess.serialize_spliced``). Исключения
+        базы данных, например ``InvalidRangeException``, пробрасываются.
+
+        :param channel_id: ID канала
+        :param first_message_index: индекс первого сообщения
+        :param count: количество сообщений
+        :param wire_format: формат сериализации
+        """
+
+        if first_message_index < 0 or count <= 0:
+            messages = await self._database.get_messages(
+                channel_id, first_message_index, count
+            )
+
+            return b"".join(
+                GetMessagesSuccess.serialize_messages(messages, wire_format)
+            )
+
+        end_index = first_message_index + count
+
+        with self._lock:
+            parts, missing_index, load_index = self._read(
+                channel_id, wire_format, first_message_index, end_index
+            )
+
+        cached_size = sum(map(len, parts))
+
+        if missing_index == end_index:
+            self._metrics.message_range_cache_hits += 1
+        else:
+            messages = await self._database.get_messages(
+                channel_id, load_index, end_index - load_index
+            )
+            serialized_messages = GetMessagesSuccess.serialize_messages(
+                messages, wire_format
+            )
+
+            with self._lock:
+                self._store(
+                    channel_id, wire_format, load_index, end_index, serialized_messages
+                )
+
+            parts.extend(serialized_messages[missing_index - load_index :])
+
+            self._metrics.message_range_cache_misses += 1
+
+        self._metrics.message_range_cache_bytes_saved += cached_size
+
+        return b"".join(parts)
+
+    def _read(
+        self,
+        channel_id: ChannelId,
+        wire_format: WireFormat,
+        first_message_index: int,
+        end_index: int,
+    ) -> tuple[list[bytes], int, int]:
+        """
+        Читает из кэша начало диапазона. Возвращает прочитанные части,
+        индекс первого отсутствующего в кэше сообщения (``end_index``,
+        если диапазон прочитан полностью) и индекс, с которого следует загрузить
+        сообщения, чтобы дописать его блок. Вызывается под ``_lock``.
+        """
+
+        parts = []
+        index = first_message_index
+
+        while index < end_index:
+            block_number = index // BLOCK_SIZE
+            block_start = block_number * BLOCK_SIZE
+            key = (channel_id, wire_format, block_number)
+            block = self._blocks.get(key)
+            cached_end = block_start + (0 if block is None else len(block))
+
+            if cached_end <= index:
+                return parts, index, cached_end
+
+            self._blocks.move_to_end(key)
+
+            stop = min(end_index, cached_end)
+            parts.append(block.slice(index - block_start, stop - block_start))
+            index = stop
+
+        return parts, end_index, end_index
+
+    def _store(
+        self,
+        channel_id: ChannelId,
+        wire_format: WireFormat,
+        first_message_index: int,
+        end_index: int,
+        serialized_messages: list[bytes],
+    ):
+        """
+        Дописывает загруженные сообщения в блоки, вытесняя давно
+        не использованные блоки при превышении объёма. Блок дописывается,
+        только если сообщения продолжают его: другой запрос мог дописать
+        или вытеснить его после ``_read``. Вызывается под ``_lock``.
+        """
+
+        index = first_message_index
+
+        while index < end_index:
+            block_number = index // BLOCK_SIZE
+            block_start = block_number * BLOCK_SIZE
+            stop = min(end_index, block_start + BLOCK_SIZE)
+            key = (channel_id, wire_format, block_number)
+            block: Optional[_Block] = self._blocks.get(key)
+
+            if block is None and index == block_start:
+                block = self._blocks[key] = _Block()
+                self._size += block.size()
+
+            if block is not None and block_start + len(block) == index:
+                self._size -= block.size()
+                block.extend(
+                    serialized_messages[
+                        index - first_message_index : stop - first_message_index
+                    ]
+                )
+                self._size += block.size()
+                self._blocks.move_to_end(key)
+
+            index = stop
+
+        while self._size > self._max_size and len(self._blocks) != 0:
+            _, block = self._blocks.popitem(last=False)
+            self._size -= block.size()
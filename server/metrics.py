@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ServerMetrics:
+    """
+    Счётчики состояния сервера.
+    """
+
+    queued_messages: int = 0
+    """
+    Количество сообщений, ожидающих отправки во всех очередях доставки.
+    """
+
+    max_queue_depth: int = 0
+    """
+    Наибольшая наблюдавшаяся длина одной очереди доставки.
+    """
+
+    blocked_pushes: int = 0
+    """
+    Количество сообщений, отправитель которых ждал освобождения очереди доставки.
+    """
+
+    dropped_pushes: int = 0
+    """
+    Количество сообщений, не отправленных получателю из-за переполнения очереди.
+    """
+
+    slow_consumer_disconnects: int = 0
+    """
+    Количество отключений клиентов из-за переполнения очереди доставки.
+    """
+
+    event_loop_lag: float = 0.0
+    """
+    Последняя измеренная задержка цикла событий в секундах.
+    """
+
+    max_event_loop_lag: float = 0.0
+    """
+    Наибольшая измеренная задержка цикла событий в секундах.
+    """
+
+    routed_messages: int = 0
+    """
+    Количество сообщений, пересланных клиентам других рабочих процессов.
+    """
+
+    message_range_cache_hits: int = 0
+    """
+    Количество запросов ``GetMessages``, ответ на которые полностью собран из кэша.
+    """
+
+    message_range_cache_misses: int = 0
+    """
+    Количество запросов ``GetMessages``, для ответа на которые
+    пришлось загрузить сообщения из базы данных.
+    """
+
+    message_range_cache_bytes_saved: int = 0
+    """
+    Объём сериализованных сообщений в байтах, взятых из кэша вместо повторного кодирования.
+    """
+
+    @property
+    def message_range_cache_hit_rate(self) -> float:
+        """
+        Доля запросов ``GetMessages``, ответ на которые полностью собран из кэша.
+        """
+
+        requests = self.message_range_cache_hits + self.message_range_cache_misses
+
+        return 0.0 if requests == 0 else self.message_range_cache_hits / requests
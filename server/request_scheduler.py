@@ -0,0 +1,108 @@
+from asyncio import Semaphore, Task, create_task, wait
+from functools import partial
+from typing import Awaitable, Callable, Collection, Final, Hashable, Optional
+
+from network.streams.packet_stream import PacketStream
+
+
+class RequestScheduler:
+    """
+    Параллельно обрабатывает запросы одного соединения, не более ``max_in_flight``
+    одновременно. Ответы отправляются по мере готовности, клиент сопоставляет их
+    с запросами по ``request_id``.
+
+    Запросы с общим ключом порядка выполняются строго в порядке поступления:
+    каждый следующий ждёт завершения предыдущих. У запроса может быть
+    несколько ключей, например у отправки сообщений нескольким получателям.
+    """
+
+    _stream: Final[PacketStream]
+    _in_flight: Final[Semaphore]
+    _tasks: Final[set[Task]]
+    _last_tasks: Final[dict[Hashable, Task]]
+    """
+    Последний запрос с каждым ключом порядка.
+    """
+
+    _failure: Optional[BaseException]
+
+    def __init__(self, stream: PacketStream, max_in_flight: int):
+        """
+        :param stream: поток пакетов соединения
+        :param max_in_flight: максимальное количество одновременно обрабатываемых запросов
+        """
+
+        self._stream = stream
+        self._in_flight = Semaphore(max_in_flight)
+        self._tasks = set()
+        self._last_tasks = {}
+        self._failure = None
+
+    async def schedule(
+        self,
+        handler: Callable[[], Awaitable],
+        order_keys: Collection[Hashable] = (),
+    ):
+        """
+        Запускает обработку запроса. Ожидает, пока число обрабатываемых запросов
+        не станет меньше предела, поэтому чтение следующих запросов приостанавливается.
+
+        :param handler: обработчик запроса
+        :param order_keys: ключи порядка, пусто - порядок не важен
+        """
+
+        await self._in_flight.acquire()
+
+        previous = {
+            self._last_tasks[order_key]
+            for order_key in order_keys
+            if order_key in self._last_tasks
+        }
+        task = create_task(self._run(handler, previous))
+
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+
+        for order_key in order_keys:
+            self._last_tasks[order_key] = task
+            task.add_done_callback(partial(self._forget, order_key))
+
+    @staticmethod
+    async def _run(handler: Callable[[], Awaitable], previous: set[Task]):
+        if previous:
+            # исход предыдущих запросов обрабатывается в _on_done
+            await wait(previous)
+
+        await handler()
+
+    def _forget(self, order_key: Hashable, task: Task):
+        if self._last_tasks.get(order_key) is task:
+            del self._last_tasks[order_key]
+
+    def _on_done(self, task: Task):
+        self._tasks.discard(task)
+        self._in_flight.release()
+
+        if (
+            not task.cancelled()
+            and (exception := task.exception()) is not None
+            and self._failure is None
+        ):
+            self._failure = exception
+            self._stream.abort()
+
+    def failure(self) -> Optional[BaseException]:
+        """
+        Возвращает исключение первого завершившегося с ошибкой обработчика.
+        После ошибки соединение разрывается.
+        """
+
+        return self._failure
+
+    def cancel(self):
+        """
+        Отменяет обработку всех запросов.
+        """
+
+        for task in self._tasks:
+            task.cancel()
@@ -1,13 +1,25 @@
 from asyncio import (
-    CancelledError,
     StreamReader,
     StreamWriter,
     create_task,
+    get_running_loop,
+    run_coroutine_threadsafe,
     start_server,
+    wrap_future,
 )
-from asyncio.queues import Queue
 from contextlib import suppress
-from typing import Final
+from functools import partial
+from threading import Lock
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Final,
+    Hashable,
+    Optional,
+    Type,
+    Union,
+)
 
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 
@@ -15,80 +27,199 @@ from exceptions import ProtocolException
 from model import ChannelId, Id, Message
 from network import Packet, packets
 from network.streams.encrypted_packet_splitter_stream import (
+    CryptoExecutor,
     EncryptedPacketSplitterStream,
+    SessionTicketIssuer,
+    SignedStaticKey,
     accept_key_exchange,
 )
 from network.streams.packet_stream import PacketStream
 from network.streams.simple_packet_splitter_stream import SimplePacketSplitterStream
 from network.streams.stream import StreamClosedException
 
-from .database import Database
+from .database import AsyncDatabase, Database, as_async_database
 from .database.exceptions import (
     ChannelNotExistsException,
     ClientNotExistsException,
+    GroupNotExistsException,
     InvalidIdException,
     InvalidRangeException,
 )
 from .exceptions import LoginFailException
+from .incoming_message_queue import IncomingMessageQueue
+from .loop_lag_monitor import monitor_loop_lag
+from .message_range_cache import MessageRangeCache
+from .metrics import ServerMetrics
+from .request_scheduler import RequestScheduler
+from .server_config import ServerConfig
+
+if TYPE_CHECKING:
+    from .cluster import RouterClient
 
 
 class Server:
-    _database: Final[Database]
-    _incoming_message_queues: Final[dict[Id, Queue[Message]]]
+    _database: Final[AsyncDatabase]
+    _incoming_message_queues: Final[dict[Id, IncomingMessageQueue]]
+    _incoming_message_queues_lock: Final[Lock]
+    """
+    Защищает ``_incoming_message_queues``, если ``handle_connections``
+    выполняется в нескольких потоках.
+    """
     _key: Final[RSAPrivateKey]
+    _config: Final[ServerConfig]
+    _ticket_issuer: Final[Optional[SessionTicketIssuer]]
+    _static_key: Final[SignedStaticKey]
+    _crypto_executor: Final[CryptoExecutor]
+    _router: Final[Optional["RouterClient"]]
+    _message_range_cache: Final[Optional[MessageRangeCache]]
+    _packet_handlers: Final[
+        dict[Type[Packet], Callable[[PacketStream, Id, Packet], Awaitable]]
+    ]
+    """
+    Таблица обработчиков пакетов авторизованного клиента, ключ - тип пакета.
+    """
+
+    metrics: Final[ServerMetrics]
+
+    def __init__(
+        self,
+        database: Union[Database, AsyncDatabase],
+        key: RSAPrivateKey,
+        config: ServerConfig = ServerConfig(),
+        crypto_executor: CryptoExecutor = CryptoExecutor(),
+        router: Optional["RouterClient"] = None,
+        ticket_key: Optional[bytes] = None,
+        static_key: Optional[SignedStaticKey] = None,
+    ):
+        """
+        :param database: база данных; синхронная оборачивается
+            в ``as_async_database``
+        :param key: приватный ключ сервера
+        :param config: настройки сервера
+        :param crypto_executor: пул для операций с приватным ключом
+            и шифрования больших пакетов
+        :param router: подключение к маршрутизатору сообщений между рабочими
+            процессами, если сервер запущен в нескольких процессах
+        :param ticket_key: ключ билетов возобновления сессии
+            (``SessionTicketIssuer.generate_key``), None - новый случайный
+        :param static_key: статический ключ X25519, None - новый,
+            подписанный ``key``
+        """
 
-    def __init__(self, database: Database, key: RSAPrivateKey):
-        self._database = database
+        self._database = as_async_database(database)
         self._incoming_message_queues = {}
+        self._incoming_message_queues_lock = Lock()
         self._key = key
+        self._config = config
+        self._ticket_issuer = (
+            None
+            if config.session_ticket_lifetime is None
+            else SessionTicketIssuer(config.session_ticket_lifetime, ticket_key)
+        )
+        self._static_key = (
+            SignedStaticKey.generate(key) if static_key is None else static_key
+        )
+        self._crypto_executor = crypto_executor
+        self._router = router
+        self._packet_handlers = {
+            packets.GetMessagesCount: self._handle_get_messages_count,
+            packets.SendMessage: self._handle_send_message,
+            packets.SendMessageMulti: self._handle_send_message_multi,
+            packets.GetMessages: self._handle_get_messages,
+            packets.GetChannelPeers: self._handle_get_channel_peers,
+            packets.SetEncryptionKeysMessage: self._handle_set_encryption_keys_message,
+            packets.GetEncryptionKeysMessage: self._handle_get_encryption_keys_message,
+            packets.CreateGroup: self._handle_create_group,
+            packets.GetGroups: self._handle_get_groups,
+            packets.GetGroupMembers: self._handle_get_group_members,
+            packets.SendGroupMessage: self._handle_send_group_message,
+            packets.GetGroupMessagesCount: self._handle_get_group_messages_count,
+            packets.GetGroupMessages: self._handle_get_group_messages,
+        }
+
+        self.metrics = ServerMetrics()
+        self._message_range_cache = (
+            None
+            if config.message_range_cache_size == 0
+            else MessageRangeCache(
+                self._database, config.message_range_cache_size, self.metrics
+            )
+        )
+
+        if router is not None:
+            router.on_message = self._deliver
 
-    async def handle_connections(self, host: str, port: int):
+    async def handle_connections(self, host: str, port: int, reuse_port: bool = False):
         """
         Запускает обработку входящих подключений в данном потоке.
+        Может выполняться одновременно в нескольких потоках, каждый
+        со своим циклом событий, если база данных потокобезопасна.
 
         :param host: имя хоста
         :param port: порт
+        :param reuse_port: разрешить другим процессам и потокам принимать
+            подключения на том же порту (SO_REUSEPORT)
         """
 
-        server = await start_server(self._handle_connection, host, port)
+        server = await start_server(
+            self._handle_connection, host, port, reuse_port=reuse_port
+        )
+        loop_lag_monitor = create_task(
+            monitor_loop_lag(self.metrics, self._config.event_loop_lag_interval)
+        )
 
-        await server.serve_forever()
+        try:
+            await server.serve_forever()
+        finally:
+            loop_lag_monitor.cancel()
 
-    async def _authorize(self, stream: PacketStream) -> Id:
+    async def _authorize(
+        self, stream: PacketStream, incoming_message_queue: IncomingMessageQueue
+    ) -> Id:
         """
-        Регистрирует или авторизует клиента и возвращает его ID.
+        Регистрирует или авторизует клиента, занимает его ID
+        (``_claim_client``) и возвращает его.
 
         :param stream: поток пакетов
+        :param incoming_message_queue: очередь доставки уведомлений клиенту
         """
 
-        raw_packet = await stream.read()
+        packet = await stream.read()
 
-        if (packet := Packet.try_deserialize(raw_packet, packets.Register)) is not None:
-            client_id = self._database.register_client(packet.password)
+        if isinstance(packet, packets.Register):
+            client_id = await self._database.register_client(packet.password)
+            response = packets.RegisterSuccess(client_id)
 
-            await stream.write(packets.RegisterSuccess(client_id))
+            await self._claim_client(client_id, incoming_message_queue)
+        elif isinstance(packet, packets.Login):
+            client_id = packet.id
+            response = packets.LoginSuccess()
 
-            return client_id
-        if (packet := Packet.try_deserialize(raw_packet, packets.Login)) is not None:
             try:
-                if (
-                    packet.id not in self._incoming_message_queues
-                    and self._database.check_password(packet.id, packet.password)
-                ):
-                    await stream.write(packets.LoginSuccess())
-
-                    return packet.id
-                else:
-                    await stream.write(packets.LoginFail())
-
-                    raise LoginFailException()
+                authorized = not self._is_client_online(client_id) and (
+                    await self._database.check_password(client_id, packet.password)
+                )
             except ClientNotExistsException:
+                authorized = False
+
+            if not authorized or not await self._claim_client(
+                client_id, incoming_message_queue
+            ):
                 await stream.write(packets.LoginFail())
 
                 raise LoginFailException()
         else:
             raise ProtocolException()
 
+        try:
+            await stream.write(response)
+        except BaseException:
+            await self._release_client(client_id)
+
+            raise
+
+        return client_id
+
     async def _handle_connection(self, reader: StreamReader, writer: StreamWriter):
         """
         Запускает обработку входящего подключения в данном потоке.
@@ -99,161 +230,512 @@ class Server:
 
         with suppress(StreamClosedException, ProtocolException, LoginFailException):
             stream = SimplePacketSplitterStream(reader, writer)
-            key_exchange_result = await accept_key_exchange(stream, self._key)
+            key_exchange_result = await accept_key_exchange(
+                stream,
+                self._key,
+                self._ticket_issuer,
+                lambda client_id: not self._is_client_online(client_id),
+                self._static_key,
+                self._crypto_executor,
+            )
             stream = PacketStream(
                 EncryptedPacketSplitterStream(
-                    stream,
-                    key_exchange_result.key,
-                    key_exchange_result.our_nonce,
-                    key_exchange_result.peer_nonce,
-                )
+                    stream, key_exchange_result.cipher, self._crypto_executor
+                ),
+                None,
+                self._config.max_queued_packets,
+            )
+            incoming_message_queue = IncomingMessageQueue(
+                stream,
+                self._config.incoming_message_queue_size,
+                self._config.slow_consumer_policy,
+                self.metrics,
             )
 
-            client_id = await self._authorize(stream)
+            if (client_id := key_exchange_result.client_id) is None:
+                client_id = await self._authorize(stream, incoming_message_queue)
+            elif not await self._claim_client(client_id, incoming_message_queue):
+                # Клиент возобновил сессию одновременно с другим подключением
+                # с тем же ID, и то заняло ID раньше
+                raise LoginFailException()
 
-            await self._handle_authorized_connection(stream, client_id)
+            try:
+                if (
+                    self._ticket_issuer is not None
+                    and key_exchange_result.resumption_secret is not None
+                ):
+                    await stream.write(
+                        packets.NewSessionTicket(
+                            client_id,
+                            self._ticket_issuer.issue(
+                                client_id, key_exchange_result.resumption_secret
+                            ),
+                        )
+                    )
+
+                await self._handle_authorized_connection(
+                    stream, client_id, incoming_message_queue
+                )
+            finally:
+                incoming_message_queue.discard()
+
+                await self._release_client(client_id)
 
         if not stream.is_closed():
             await stream.close()
 
-    async def _handle_authorized_connection(self, stream: PacketStream, client_id: Id):
-        incoming_message_queue = Queue()
-        self._incoming_message_queues[client_id] = incoming_message_queue
+    async def _handle_authorized_connection(
+        self,
+        stream: PacketStream,
+        client_id: Id,
+        incoming_message_queue: IncomingMessageQueue,
+    ):
+        incoming_messages_handler = create_task(incoming_message_queue.deliver())
+
+        if self._config.max_in_flight_requests > 1:
+            request_scheduler = RequestScheduler(
+                stream, self._config.max_in_flight_requests
+            )
+        else:
+            request_scheduler = None
 
-        async def handle_incoming_messages():
+        try:
             while True:
                 try:
-                    message = await incoming_message_queue.get()
-
-                    await stream.write(packets.NewMessage(message))
-                except CancelledError:
-                    break
+                    packet = await stream.read()
+                except StreamClosedException:
+                    if (
+                        request_scheduler is not None
+                        and (failure := request_scheduler.failure()) is not None
+                    ):
+                        raise failure
 
-        incoming_messages_handler = create_task(handle_incoming_messages())
+                    raise
 
-        try:
-            while True:
-                raw_packet = await stream.read()
+                if (handler := self._packet_handlers.get(type(packet))) is None:
+                    raise ProtocolException()
 
-                if (
-                    packet := Packet.try_deserialize(
-                        raw_packet, packets.GetMessagesCount
+                if request_scheduler is None:
+                    await handler(stream, client_id, packet)
+                else:
+                    await request_scheduler.schedule(
+                        partial(handler, stream, client_id, packet),
+                        self._request_order_keys(client_id, packet),
                     )
-                ) is not None:
-                    try:
-                        messages_count = self._database.get_messages_count(
-                            ChannelId.from_ids((client_id, packet.peer_id))
-                        )
-                    except ChannelNotExistsException:
-                        await stream.write(
-                            packets.GetMessagesCountFailNoSuchClient(packet.request_id)
-                        )
-                    else:
-                        await stream.write(
-                            packets.GetMessagesCountSuccess(
-                                packet.request_id, messages_count
-                            )
-                        )
+        finally:
+            if request_scheduler is not None:
+                request_scheduler.cancel()
 
-                elif (
-                    packet := Packet.try_deserialize(raw_packet, packets.SendMessage)
-                ) is not None:
-                    try:
-                        self._database.add_message(
-                            client_id, packet.receiver_id, packet.content
-                        )
-                    except ClientNotExistsException:
-                        await stream.write(
-                            packets.SendMessageFailNoSuchClient(packet.request_id)
-                        )
-                    else:
-                        if packet.receiver_id in self._incoming_message_queues:
-                            await self._incoming_message_queues[packet.receiver_id].put(
-                                Message(client_id, packet.content)
-                            )
-
-                        await stream.write(
-                            packets.SendMessageSuccess(packet.request_id)
-                        )
-                elif (
-                    packet := Packet.try_deserialize(raw_packet, packets.GetMessages)
-                ) is not None:
-                    try:
-                        messages = self._database.get_messages(
-                            ChannelId.from_ids((client_id, packet.peer_id)),
-                            packet.first_message_index,
-                            packet.count,
-                        )
-                    except InvalidRangeException:
-                        await stream.write(
-                            packets.GetMessagesFailInvalidRange(packet.request_id)
-                        )
-                    else:
-                        await stream.write(
-                            packets.GetMessagesSuccess(packet.request_id, messages)
-                        )
-                elif (
-                    packet := Packet.try_deserialize(
-                        raw_packet, packets.GetChannelPeers
-                    )
-                ) is not None:
-                    peers = self._database.get_channel_peers(client_id)
+            incoming_messages_handler.cancel()
 
-                    await stream.write(
-                        packets.GetChannelPeersSuccess(packet.request_id, peers)
-                    )
-                elif (
-                    packet := Packet.try_deserialize(
-                        raw_packet, packets.SetEncryptionKeysMessage
-                    )
-                ) is not None:
-                    try:
-                        channel_id = ChannelId.from_ids((client_id, packet.peer_id))
+    async def _claim_client(
+        self, client_id: Id, incoming_message_queue: IncomingMessageQueue
+    ) -> bool:
+        """
+        Отмечает клиента подключённым к этому процессу, если он ещё
+        не подключён ни к одному процессу. Проверка и отметка атомарны
+        в пределах процесса (под ``_incoming_message_queues_lock``)
+        и между процессами (в ``MessageRouter``), поэтому из одновременных
+        подключений с одним ID успешно только одно. Занятый ID освобождается
+        ``_release_client``.
+
+        :param client_id: ID клиента
+        :param incoming_message_queue: очередь доставки уведомлений клиенту
+        """
 
-                        self._database.set_encryption_keys_message(
-                            channel_id, client_id, packet.message_id
-                        )
-                    except (ClientNotExistsException, ChannelNotExistsException):
-                        await stream.write(
-                            packets.SetEncryptionKeysMessageFailNoSuchClient(
-                                packet.request_id
-                            )
-                        )
-                    except InvalidIdException:
-                        await stream.write(
-                            packets.SetEncryptionKeysMessageFailInvalidId(
-                                packet.request_id
-                            )
-                        )
-                    else:
-                        await stream.write(
-                            packets.SetEncryptionKeysMessageSuccess(packet.request_id)
-                        )
-                elif (
-                    packet := Packet.try_deserialize(
-                        raw_packet, packets.GetEncryptionKeysMessage
-                    )
-                ) is not None:
-                    channel_id = ChannelId.from_ids((client_id, packet.peer_id))
+        with self._incoming_message_queues_lock:
+            if client_id in self._incoming_message_queues:
+                return False
 
-                    try:
-                        result = self._database.get_encryption_keys_message(
-                            channel_id, packet.keys_owner_id
-                        )
-                    except (ChannelNotExistsException, ClientNotExistsException):
-                        await stream.write(
-                            packets.GetEncryptionKeysMessageFailNoSuchClient(
-                                packet.request_id
-                            )
-                        )
-                    else:
-                        await stream.write(
-                            packets.GetEncryptionKeysMessageSuccess(
-                                packet.request_id, result
-                            )
-                        )
-                else:
-                    raise ProtocolException()
+            self._incoming_message_queues[client_id] = incoming_message_queue
+
+        claimed = False
+
+        try:
+            claimed = self._router is None or await self._router.claim(client_id)
         finally:
-            incoming_messages_handler.cancel()
+            if not claimed:
+                with self._incoming_message_queues_lock:
+                    del self._incoming_message_queues[client_id]
+
+        return claimed
+
+    async def _release_client(self, client_id: Id):
+        """
+        Отмечает клиента, занятого ``_claim_client``, отключённым.
+
+        :param client_id: ID клиента
+        """
+
+        with self._incoming_message_queues_lock:
             del self._incoming_message_queues[client_id]
+
+        if self._router is not None:
+            with suppress(StreamClosedException):
+                await self._router.release(client_id)
+
+    def _is_client_online(self, client_id: Id) -> bool:
+        """
+        Проверяет, подключён ли клиент к этому или другому рабочему процессу.
+
+        :param client_id: ID клиента
+        """
+
+        with self._incoming_message_queues_lock:
+            if client_id in self._incoming_message_queues:
+                return True
+
+        return self._router is not None and self._router.is_online(client_id)
+
+    async def _deliver(self, receiver_id: Id, packet: Packet) -> bool:
+        """
+        Ставит уведомление в очередь доставки получателя, подключённого
+        к этому процессу. Возвращает False, если получатель не подключён
+        к этому процессу.
+
+        :param receiver_id: ID получателя
+        :param packet: уведомление о новом сообщении
+        """
+
+        with self._incoming_message_queues_lock:
+            incoming_message_queue = self._incoming_message_queues.get(receiver_id)
+
+        if incoming_message_queue is None:
+            return False
+
+        await self._put(incoming_message_queue, packet)
+
+        return True
+
+    async def _deliver_to_group(
+        self, sender_id: Id, members: list[Id], packet: packets.NewGroupMessage
+    ):
+        """
+        Рассылает уведомление участникам группы, кроме отправителя:
+        очереди подключённых к этому процессу участников выбираются за одно
+        взятие ``_incoming_message_queues_lock``, остальным уведомление
+        пересылается через маршрутизатор.
+
+        :param sender_id: ID отправителя
+        :param members: ID участников группы
+        :param packet: уведомление
+        """
+
+        with self._incoming_message_queues_lock:
+            receivers = [
+                (member_id, self._incoming_message_queues.get(member_id))
+                for member_id in members
+                if member_id != sender_id
+            ]
+
+        for member_id, incoming_message_queue in receivers:
+            if incoming_message_queue is not None:
+                await self._put(incoming_message_queue, packet)
+            elif self._router is not None and await self._router.route(
+                member_id, packet
+            ):
+                self.metrics.routed_messages += 1
+
+    @staticmethod
+    async def _put(incoming_message_queue: IncomingMessageQueue, packet: Packet):
+        """
+        Ставит уведомление в очередь доставки. Если очередь принадлежит циклу
+        событий другого потока, уведомление передаётся в него
+        через ``run_coroutine_threadsafe``.
+        """
+
+        if incoming_message_queue.loop is get_running_loop():
+            await incoming_message_queue.put(packet)
+        else:
+            await wrap_future(
+                run_coroutine_threadsafe(
+                    incoming_message_queue.put(packet), incoming_message_queue.loop
+                )
+            )
+
+    @staticmethod
+    def _request_order_keys(client_id: Id, packet: Packet) -> tuple[Hashable, ...]:
+        """
+        Возвращает ключи, запросы с которыми обрабатываются в порядке поступления:
+        каналы для ``SendMessage`` и ``SendMessageMulti`` и ID группы
+        для ``SendGroupMessage``, чтобы сообщения сохранялись и доставлялись
+        в порядке отправки.
+        """
+
+        if isinstance(packet, packets.SendMessage):
+            return (ChannelId.from_ids((client_id, packet.receiver_id)),)
+
+        if isinstance(packet, packets.SendMessageMulti):
+            return tuple(
+                {
+                    ChannelId.from_ids((client_id, receiver_id))
+                    for receiver_id in packet.receiver_ids
+                }
+            )
+
+        if isinstance(packet, packets.SendGroupMessage):
+            return (packet.group_id,)
+
+        return ()
+
+    async def _handle_get_messages_count(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetMessagesCount
+    ):
+        try:
+            messages_count = await self._database.get_messages_count(
+                ChannelId.from_ids((client_id, packet.peer_id))
+            )
+        except ChannelNotExistsException:
+            await stream.write(
+                packets.GetMessagesCountFailNoSuchClient(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.GetMessagesCountSuccess(packet.request_id, messages_count)
+            )
+
+    async def _handle_send_message(
+        self, stream: PacketStream, client_id: Id, packet: packets.SendMessage
+    ):
+        try:
+            await self._database.add_message(
+                client_id, packet.receiver_id, packet.content
+            )
+        except ClientNotExistsException:
+            await stream.write(packets.SendMessageFailNoSuchClient(packet.request_id))
+        else:
+            notification = packets.NewMessage(Message(client_id, packet.content))
+
+            if (
+                not await self._deliver(packet.receiver_id, notification)
+                and self._router is not None
+            ):
+                if await self._router.route(packet.receiver_id, notification):
+                    self.metrics.routed_messages += 1
+
+            await stream.write(packets.SendMessageSuccess(packet.request_id))
+
+    async def _handle_send_message_multi(
+        self, stream: PacketStream, client_id: Id, packet: packets.SendMessageMulti
+    ):
+        if len(packet.receiver_ids) != len(packet.contents):
+            raise ProtocolException()
+
+        results = await self._database.add_messages(
+            client_id, list(zip(packet.receiver_ids, packet.contents))
+        )
+
+        for receiver_id, content, added in zip(
+            packet.receiver_ids, packet.contents, results
+        ):
+            if not added:
+                continue
+
+            notification = packets.NewMessage(Message(client_id, content))
+
+            if (
+                not await self._deliver(receiver_id, notification)
+                and self._router is not None
+            ):
+                if await self._router.route(receiver_id, notification):
+                    self.metrics.routed_messages += 1
+
+        await stream.write(packets.SendMessageMultiSuccess(packet.request_id, results))
+
+    async def _handle_get_messages(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetMessages
+    ):
+        channel_id = ChannelId.from_ids((client_id, packet.peer_id))
+
+        try:
+            if self._message_range_cache is None:
+                messages = await self._database.get_messages(
+                    channel_id, packet.first_message_index, packet.count
+                )
+            else:
+                serialized_messages = await self._message_range_cache.get_messages(
+                    channel_id,
+                    packet.first_message_index,
+                    packet.count,
+                    stream.wire_format,
+                )
+        except InvalidRangeException:
+            await stream.write(packets.GetMessagesFailInvalidRange(packet.request_id))
+        else:
+            if self._message_range_cache is None:
+                await stream.write(
+                    packets.GetMessagesSuccess(packet.request_id, messages)
+                )
+            else:
+                await stream.write_serialized(
+                    packets.GetMessagesSuccess.serialize_spliced(
+                        packet.request_id,
+                        packet.count,
+                        serialized_messages,
+                        stream.wire_format,
+                    )
+                )
+
+    async def _handle_get_channel_peers(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetChannelPeers
+    ):
+        peers = await self._database.get_channel_peers(client_id)
+
+        await stream.write(packets.GetChannelPeersSuccess(packet.request_id, peers))
+
+    async def _handle_set_encryption_keys_message(
+        self,
+        stream: PacketStream,
+        client_id: Id,
+        packet: packets.SetEncryptionKeysMessage,
+    ):
+        try:
+            channel_id = ChannelId.from_ids((client_id, packet.peer_id))
+
+            await self._database.set_encryption_keys_message(
+                channel_id, client_id, packet.message_id
+            )
+        except (ClientNotExistsException, ChannelNotExistsException):
+            await stream.write(
+                packets.SetEncryptionKeysMessageFailNoSuchClient(packet.request_id)
+            )
+        except InvalidIdException:
+            await stream.write(
+                packets.SetEncryptionKeysMessageFailInvalidId(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.SetEncryptionKeysMessageSuccess(packet.request_id)
+            )
+
+    async def _handle_get_encryption_keys_message(
+        self,
+        stream: PacketStream,
+        client_id: Id,
+        packet: packets.GetEncryptionKeysMessage,
+    ):
+        channel_id = ChannelId.from_ids((client_id, packet.peer_id))
+
+        try:
+            result = await self._database.get_encryption_keys_message(
+                channel_id, packet.keys_owner_id
+            )
+        except (ChannelNotExistsException, ClientNotExistsException):
+            await stream.write(
+                packets.GetEncryptionKeysMessageFailNoSuchClient(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.GetEncryptionKeysMessageSuccess(packet.request_id, result)
+            )
+
+    async def _get_group_members(self, client_id: Id, group_id: Id) -> list[Id]:
+        """
+        Возвращает участников группы; для клиента, не состоящего в группе,
+        группа не существует.
+        """
+
+        members = await self._database.get_group_members(group_id)
+
+        if client_id not in members:
+            raise GroupNotExistsException()
+
+        return members
+
+    async def _handle_create_group(
+        self, stream: PacketStream, client_id: Id, packet: packets.CreateGroup
+    ):
+        try:
+            group_id = await self._database.create_group([client_id, *packet.members])
+        except ClientNotExistsException:
+            await stream.write(packets.CreateGroupFailNoSuchClient(packet.request_id))
+        else:
+            await stream.write(packets.CreateGroupSuccess(packet.request_id, group_id))
+
+    async def _handle_get_groups(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetGroups
+    ):
+        groups = await self._database.get_client_groups(client_id)
+
+        await stream.write(packets.GetGroupsSuccess(packet.request_id, groups))
+
+    async def _handle_get_group_members(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetGroupMembers
+    ):
+        try:
+            members = await self._get_group_members(client_id, packet.group_id)
+        except GroupNotExistsException:
+            await stream.write(
+                packets.GetGroupMembersFailNoSuchGroup(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.GetGroupMembersSuccess(packet.request_id, members)
+            )
+
+    async def _handle_send_group_message(
+        self, stream: PacketStream, client_id: Id, packet: packets.SendGroupMessage
+    ):
+        try:
+            members = await self._get_group_members(client_id, packet.group_id)
+
+            await self._database.add_group_message(
+                packet.group_id, client_id, packet.content
+            )
+        except GroupNotExistsException:
+            await stream.write(
+                packets.SendGroupMessageFailNoSuchGroup(packet.request_id)
+            )
+        else:
+            await self._deliver_to_group(
+                client_id,
+                members,
+                packets.NewGroupMessage(
+                    packet.group_id, Message(client_id, packet.content)
+                ),
+            )
+
+            await stream.write(packets.SendGroupMessageSuccess(packet.request_id))
+
+    async def _handle_get_group_messages_count(
+        self,
+        stream: PacketStream,
+        client_id: Id,
+        packet: packets.GetGroupMessagesCount,
+    ):
+        try:
+            await self._get_group_members(client_id, packet.group_id)
+
+            messages_count = await self._database.get_group_messages_count(
+                packet.group_id
+            )
+        except GroupNotExistsException:
+            await stream.write(
+                packets.GetGroupMessagesCountFailNoSuchGroup(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.GetGroupMessagesCountSuccess(packet.request_id, messages_count)
+            )
+
+    async def _handle_get_group_messages(
+        self, stream: PacketStream, client_id: Id, packet: packets.GetGroupMessages
+    ):
+        try:
+            await self._get_group_members(client_id, packet.group_id)
+
+            messages = await self._database.get_group_messages(
+                packet.group_id, packet.first_message_index, packet.count
+            )
+        except GroupNotExistsException:
+            await stream.write(
+                packets.GetGroupMessagesFailNoSuchGroup(packet.request_id)
+            )
+        except InvalidRangeException:
+            await stream.write(
+                packets.GetGroupMessagesFailInvalidRange(packet.request_id)
+            )
+        else:
+            await stream.write(
+                packets.GetGroupMessagesSuccess(packet.request_id, messages)
+            )
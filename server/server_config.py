@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from .incoming_message_queue import SlowConsumerPolicy
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    incoming_message_queue_size: int = 1024
+    """
+    Максимальное количество сообщений в очереди доставки одного клиента
+    (0 - без ограничения).
+    """
+
+    slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.BLOCK
+    """
+    Действие при переполнении очереди доставки клиента.
+    """
+
+    max_queued_packets: int = 1024
+    """
+    Максимальное количество полученных от клиента и ещё не обработанных пакетов
+    (0 - без ограничения). При достижении предела чтение из соединения приостанавливается.
+    """
+
+    session_ticket_lifetime: Optional[float] = 24 * 60 * 60
+    """
+    Время действия билета возобновления сессии в секундах
+    (None - билеты не выдаются).
+    """
+
+    event_loop_lag_interval: float = 0.1
+    """
+    Период измерения задержки цикла событий в секундах.
+    """
+
+    max_in_flight_requests: int = 1
+    """
+    Максимальное количество одновременно обрабатываемых запросов одного соединения
+    (1 - запросы обрабатываются по одному). ``SendMessage`` одного канала
+    всегда обрабатываются в порядке поступления.
+    """
+
+    message_range_cache_size: int = 64 * 1024 * 1024
+    """
+    Наибольший объём кэша сериализованных сообщений для ответов
+    на ``GetMessages`` в байтах (0 - кэш отключён).
+    """
@@ -1,7 +1,8 @@
 from argparse import ArgumentParser
-from asyncio import run
+from asyncio import get_running_loop, run
 from base64 import b64decode
 from contextlib import suppress
+from functools import partial
 from os import path, urandom
 
 from aioconsole import ainput
@@ -54,12 +55,18 @@ async def main():
         server_port = int(input("Введите порт сервера: "))
         server_key = input("Введите открытый ключ сервера: ")
         server_key = load_der_public_key(b64decode(server_key, validate=True))
-        key = generate_private_key(public_exponent=65537, key_size=3072)
+        # генерация ключа занимает до секунды, поэтому выполняется в пуле потоков
+        # одновременно с подключением к серверу
+        key = get_running_loop().run_in_executor(
+            None, partial(generate_private_key, public_exponent=65537, key_size=3072)
+        )
         server_password = urandom(32)
 
         await client.connect(server_host, server_port, server_key)
         await client.register(server_password)
 
+        key = await key
+
         client_info = PrivateClientInfo(
             client.get_id(), key, server_password, server_key, server_host, server_port
         )